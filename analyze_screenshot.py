@@ -2,14 +2,25 @@
 # -*- coding: utf-8 -*-
 """
 截图分析工具
-分析单张截图的检测结果，显示检测框和调试信息
+分析单张截图的检测结果，显示检测框和调试信息；
+批量模式只加载一次模型，多线程解码、批量推理，输出CSV/JSON表格和HTML报告
 """
 
 import cv2
 import numpy as np
 import argparse
-from ultralytics import YOLO
+import collections
+import csv
+import glob
+import html
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from warm_worker import get_detector
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
 
 
 def analyze_image(
@@ -36,9 +47,11 @@ def analyze_image(
         print(f"❌ 图像文件不存在: {image_path}")
         return
 
-    # 加载模型
+    # 加载模型（检测结果有缓存，同一模型分析过的画面不再推理；
+    # 常驻推理进程在运行时交给它检测，不用在这里加载模型）
     try:
-        model = YOLO(model_path)
+        detector = get_detector(model_path)
+        names = detector.names
         print("✅ 模型加载成功")
     except Exception as e:
         print(f"❌ 模型加载失败: {e}")
@@ -54,7 +67,7 @@ def analyze_image(
 
     # 进行预测
     print("🔮 正在进行预测...")
-    results = model(image_path)
+    boxes = detector.detect(image)
 
     # 分析结果
     detections = []
@@ -62,43 +75,35 @@ def analyze_image(
     platform_center = None
     all_platforms = []  # 存储所有平台信息
 
-    for result in results:
-        boxes = result.boxes
-        if boxes is not None:
-            for box in boxes:
-                # 获取边界框坐标
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = box.conf[0].cpu().numpy()
-                class_id = int(box.cls[0].cpu().numpy())
-
-                # 获取类别名称
-                class_name = model.names[class_id]
-
-                # 计算中心点
-                center_x = int((x1 + x2) / 2)
-                center_y = int((y1 + y2) / 2)
-
-                # 记录检测信息
-                detection = {
-                    "class": class_name,
-                    "confidence": confidence,
-                    "bbox": (int(x1), int(y1), int(x2), int(y2)),
+    for x1, y1, x2, y2, confidence, class_id in boxes:
+        # 获取类别名称
+        class_name = names[int(class_id)]
+
+        # 计算中心点
+        center_x = int((x1 + x2) / 2)
+        center_y = int((y1 + y2) / 2)
+
+        # 记录检测信息
+        detection = {
+            "class": class_name,
+            "confidence": confidence,
+            "bbox": (int(x1), int(y1), int(x2), int(y2)),
+            "center": (center_x, center_y),
+            "size": (int(x2 - x1), int(y2 - y1)),
+        }
+        detections.append(detection)
+
+        # 记录特定对象的中心点
+        if class_name == "humen":  # 玩家
+            player_center = (center_x, center_y)
+        elif class_name == "cube":  # 平台
+            all_platforms.append(
+                {
                     "center": (center_x, center_y),
-                    "size": (int(x2 - x1), int(y2 - y1)),
+                    "confidence": confidence,
+                    "y": center_y,
                 }
-                detections.append(detection)
-
-                # 记录特定对象的中心点
-                if class_name == "humen":  # 玩家
-                    player_center = (center_x, center_y)
-                elif class_name == "cube":  # 平台
-                    all_platforms.append(
-                        {
-                            "center": (center_x, center_y),
-                            "confidence": confidence,
-                            "y": center_y,
-                        }
-                    )
+            )
 
     # 显示检测结果统计
     print(f"\n📊 检测结果统计:")
@@ -321,19 +326,255 @@ def analyze_image(
     }
 
 
+def list_images(source: str) -> list:
+    """目录（递归）或glob模式下的所有图片"""
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*")
+    else:
+        pattern = source
+    return sorted(
+        p
+        for p in glob.glob(pattern, recursive=True)
+        if p.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(p)
+    )
+
+
+def _decode(path: str) -> tuple:
+    start = time.perf_counter()
+    frame = cv2.imread(path)
+    return path, frame, (time.perf_counter() - start) * 1000
+
+
+def _decoded_batches(paths: list, batch_size: int, workers: int):
+    """在线程池中解码（cv2.imread会释放GIL），最多预取两批，按原顺序成批产出"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        batch = []
+        for path in paths:
+            pending.append(pool.submit(_decode, path))
+            if len(pending) >= batch_size * 2:
+                batch.append(pending.popleft().result())
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        while pending:
+            batch.append(pending.popleft().result())
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def analyze_batch(
+    model_path: str,
+    source: str,
+    output_dir: str = "./analysis",
+    batch_size: int = 16,
+    workers: int = 4,
+    imgsz: int = 640,
+    save_images: bool = False,
+) -> list:
+    """
+    批量分析目录或glob下的所有截图
+
+    Args:
+        model_path: 模型文件路径
+        source: 图片目录或glob模式
+        output_dir: 输出目录（analysis.csv、analysis.json、report.html）
+        batch_size: 每批推理的图片数
+        workers: 解码线程数
+        imgsz: 推理尺寸
+        save_images: 是否保存带检测框的图片（HTML报告中可以点开查看）
+
+    Returns:
+        list: 每张图片的分析结果
+    """
+    from debug_overlay import draw_overlay
+    from main import box_center, select_target
+
+    paths = list_images(source)
+    if not paths:
+        print(f"❌ 没有找到图片: {source}")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    if save_images:
+        os.makedirs(os.path.join(output_dir, "images"), exist_ok=True)
+
+    # 模型在第一次未命中缓存时才加载，重新审查已分析过的画面不需要加载模型
+    detector = get_detector(model_path, imgsz=imgsz, conf=0.2, iou=0.9)
+    print(f"📦 共 {len(paths)} 张图片")
+
+    rows = []
+    for batch in _decoded_batches(paths, batch_size, workers):
+        valid = [(path, frame, ms) for path, frame, ms in batch if frame is not None]
+        for path, frame, ms in batch:
+            if frame is None:
+                rows.append(
+                    {"image": path, "error": "无法读取图像", "decode_ms": round(ms, 2)}
+                )
+        if not valid:
+            continue
+
+        start = time.perf_counter()
+        outputs = detector.detect_batch([frame for _, frame, _ in valid])
+        inference_ms = (time.perf_counter() - start) * 1000 / len(valid)
+
+        for (path, frame, decode_ms), detections in zip(valid, outputs):
+            start = time.perf_counter()
+            decision = select_target(detections)
+            select_ms = (time.perf_counter() - start) * 1000
+
+            row = {
+                "image": path,
+                "width": frame.shape[1],
+                "height": frame.shape[0],
+                "detections": len(detections),
+                "players": int((detections[:, 5] == 1).sum()),
+                "platforms": int((detections[:, 5] == 0).sum()),
+                "max_conf": (
+                    round(float(detections[:, 4].max()), 3) if len(detections) else 0.0
+                ),
+                "distance": float(decision["distance"]),
+                "reason": decision["reason"] or "ok",
+                "player": box_center(decision["player"]),
+                "target": box_center(decision["target"]),
+                "decode_ms": round(decode_ms, 2),
+                "inference_ms": round(inference_ms, 2),
+                "select_ms": round(select_ms, 3),
+                "boxes": detections.round(2).tolist(),
+            }
+            if save_images:
+                name = f"{len(rows):06d}_{os.path.basename(path)}"
+                cv2.imwrite(
+                    os.path.join(output_dir, "images", name),
+                    draw_overlay(frame, detections, decision, copy=False),
+                )
+                row["annotated"] = f"images/{name}"
+            rows.append(row)
+
+        print(f"🔮 已分析 {len(rows)}/{len(paths)}")
+
+    if detector.cache:
+        stats = detector.cache.stats()
+        print(f"🗄️ 检测缓存: 命中 {stats['hits']}, 未命中 {stats['misses']}")
+    write_reports(rows, output_dir, model_path)
+    return rows
+
+
+def write_reports(rows: list, output_dir: str, model_path: str = ""):
+    """写出 analysis.csv、analysis.json 和 report.html"""
+    columns = [
+        "image",
+        "width",
+        "height",
+        "detections",
+        "players",
+        "platforms",
+        "max_conf",
+        "distance",
+        "reason",
+        "player",
+        "target",
+        "decode_ms",
+        "inference_ms",
+        "select_ms",
+        "error",
+    ]
+    csv_path = os.path.join(output_dir, "analysis.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(output_dir, "analysis.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=1)
+
+    reasons = collections.Counter(row.get("reason", "error") for row in rows)
+    timed = [row for row in rows if "inference_ms" in row]
+
+    def mean(key):
+        return sum(row[key] for row in timed) / len(timed) if timed else 0.0
+
+    summary = "".join(
+        f"<li>{html.escape(reason)}: {count} ({count / len(rows):.1%})</li>"
+        for reason, count in reasons.most_common()
+    )
+    table_rows = []
+    for row in rows:
+        image = html.escape(row["image"])
+        if row.get("annotated"):
+            image = f'<a href="{html.escape(row["annotated"])}">{image}</a>'
+        css = "" if row.get("reason") == "ok" else ' class="fail"'
+        table_rows.append(
+            f"<tr{css}><td>{image}</td><td>{row.get('detections', '')}</td>"
+            f"<td>{row.get('players', '')}</td><td>{row.get('platforms', '')}</td>"
+            f"<td>{row.get('max_conf', '')}</td><td>{row.get('distance', '')}</td>"
+            f"<td>{html.escape(str(row.get('reason', row.get('error', ''))))}</td>"
+            f"<td>{row.get('player') or ''}</td><td>{row.get('target') or ''}</td>"
+            f"<td>{row.get('decode_ms', '')}</td><td>{row.get('inference_ms', '')}</td></tr>"
+        )
+
+    page = f"""<!DOCTYPE html>
+<html lang="zh"><head><meta charset="utf-8"><title>截图分析报告</title>
+<style>
+body {{ font-family: sans-serif; margin: 16px; }}
+table {{ border-collapse: collapse; font-size: 13px; }}
+td, th {{ border: 1px solid #ccc; padding: 2px 6px; }}
+tr.fail {{ background: #fee; }}
+</style></head><body>
+<h2>🔍 截图分析报告</h2>
+<p>模型: {html.escape(model_path)} ｜ 图片: {len(rows)} ｜
+平均解码 {mean("decode_ms"):.1f}ms ｜ 平均推理 {mean("inference_ms"):.1f}ms/张</p>
+<ul>{summary}</ul>
+<table><tr><th>图片</th><th>检测数</th><th>玩家</th><th>平台</th><th>最高置信度</th>
+<th>距离</th><th>结果</th><th>玩家位置</th><th>目标位置</th><th>解码ms</th><th>推理ms</th></tr>
+{"".join(table_rows)}
+</table></body></html>
+"""
+    with open(os.path.join(output_dir, "report.html"), "w", encoding="utf-8") as f:
+        f.write(page)
+
+    print(f"\n📊 结果分布:")
+    for reason, count in reasons.most_common():
+        print(f"   {reason}: {count} ({count / len(rows):.1%})")
+    print(f"💾 报告已保存: {os.path.join(output_dir, 'report.html')}")
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="跳一跳截图分析工具")
     parser.add_argument("--model", default="./best.pt", help="模型文件路径")
-    parser.add_argument("--image", required=True, help="图像文件路径")
-    parser.add_argument("--output", help="输出图像路径")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--image", help="图像文件路径")
+    source.add_argument("--batch", help="批量分析：图片目录或glob模式")
+    parser.add_argument("--output", help="输出图像路径（批量模式下为输出目录）")
     parser.add_argument("--no-window", action="store_true", help="不显示窗口")
+    parser.add_argument("--batch-size", type=int, default=16, help="每批推理的图片数")
+    parser.add_argument("--workers", type=int, default=4, help="解码线程数")
+    parser.add_argument("--imgsz", type=int, default=640, help="推理尺寸")
+    parser.add_argument(
+        "--save-images", action="store_true", help="批量模式下保存带检测框的图片"
+    )
 
     args = parser.parse_args()
 
     print("🔍 跳一跳截图分析工具")
     print("=" * 50)
 
+    if args.batch:
+        rows = analyze_batch(
+            args.model,
+            args.batch,
+            output_dir=args.output or "./analysis",
+            batch_size=args.batch_size,
+            workers=args.workers,
+            imgsz=args.imgsz,
+            save_images=args.save_images,
+        )
+        print("\n✅ 分析完成" if rows else "\n❌ 分析失败")
+        return
+
     # 分析图像
     result = analyze_image(
         model_path=args.model,
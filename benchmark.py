@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测和目标选择流水线的基准测试
+在仓库自带的截图和images/上离线运行，测量图片解码、模型加载、冷/热推理、
+目标选择和端到端Jump.predict的耗时，可以指定多个模型后端和输入尺寸；
+结果保存为JSON，compare子命令对比两次结果并标出性能回退
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+from PIL import Image
+
+from event_log import ERROR, log
+from replay_runner import summarize_latencies
+
+DEFAULT_IMAGES = ["./*.png", "./*.jpg", "./images/*.png", "./images/*.jpg"]
+
+
+def find_images(patterns: list) -> list:
+    """按glob模式查找测试图片"""
+    images = []
+    for pattern in patterns:
+        images.extend(sorted(glob.glob(pattern)))
+    return images
+
+
+def time_calls(func, args_list: list, repeat: int = 1) -> list:
+    """对每组参数调用func repeat次，返回每次耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            func(*args)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_decode(images: list, repeat: int) -> dict:
+    """图片解码：OpenCV和PIL"""
+    return {
+        "decode/cv2": summarize_latencies(
+            time_calls(cv2.imread, [(p,) for p in images], repeat)
+        ),
+        "decode/pil": summarize_latencies(
+            time_calls(
+                lambda p: Image.open(p).convert("RGB").load(),
+                [(p,) for p in images],
+                repeat,
+            )
+        ),
+    }
+
+
+def bench_model(model_path: str, frames: list, imgsz: int, repeat: int, cold_runs: int):
+    """
+    模型加载、冷推理（加载后第一次）和热推理
+
+    Returns:
+        tuple: (结果字典, 热推理得到的检测结果列表)
+    """
+    from ultralytics import YOLO
+
+    name = f"{os.path.basename(model_path)}@{imgsz}"
+    load_ms, cold_ms = [], []
+    for _ in range(cold_runs):
+        start = time.perf_counter()
+        model = YOLO(model_path)
+        load_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        model.predict(frames[0], imgsz=imgsz, conf=0.2, iou=0.9, verbose=False)
+        cold_ms.append((time.perf_counter() - start) * 1000)
+
+    detections = []
+
+    def infer(frame):
+        results = model.predict(frame, imgsz=imgsz, conf=0.2, iou=0.9, verbose=False)
+        detections.append(results[0].boxes.data.cpu().numpy())
+
+    warm_ms = time_calls(infer, [(f,) for f in frames], repeat)
+    return (
+        {
+            f"model_load/{os.path.basename(model_path)}": summarize_latencies(load_ms),
+            f"inference_cold/{name}": summarize_latencies(cold_ms),
+            f"inference_warm/{name}": summarize_latencies(warm_ms),
+        },
+        detections[: len(frames)],
+    )
+
+
+def bench_select(detections: list, repeat: int) -> dict:
+    """目标选择（纯numpy逻辑）"""
+    from main import select_target
+
+    return {
+        "select": summarize_latencies(
+            time_calls(select_target, [(d,) for d in detections], repeat)
+        )
+    }
+
+
+def bench_predict(model_path: str, images: list, imgsizes: list, repeat: int) -> dict:
+    """端到端Jump.predict（解码+推理+保存+选择），每个输入尺寸分别测量"""
+    from device_controller import ReplayDeviceController
+    from detection_cache import make_params_key
+    from main import Jump
+
+    controller = ReplayDeviceController(os.path.dirname(images[0]) or ".")
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_predict_") as workdir:
+        # 测量的是真实推理，不走检测缓存
+        jump = Jump(model_path, controller, cache=False, save_folder=workdir)
+        for imgsz in imgsizes:
+            jump.predict_params["imgsz"] = imgsz
+            jump.cache_params = make_params_key(model_path, **jump.predict_params)
+            name = f"{os.path.basename(model_path)}@{imgsz}"
+            # 换输入尺寸后的第一次调用单独统计，不计入热调用的分布
+            results[f"predict_cold/{name}"] = summarize_latencies(
+                time_calls(jump.predict, [(images[0],)], 1)
+            )
+            results[f"predict/{name}"] = summarize_latencies(
+                time_calls(jump.predict, [(p,) for p in images], repeat)
+            )
+    return results
+
+
+def environment_info() -> dict:
+    """记录运行环境，便于对比时确认条件一致"""
+    info = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        info["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    try:
+        import torch
+
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+def run_suite(
+    models: list,
+    imgsizes: list,
+    image_patterns: list = None,
+    repeat: int = 5,
+    cold_runs: int = 3,
+) -> dict:
+    """
+    运行完整基准测试
+
+    Args:
+        models: 模型路径列表（.pt/.onnx/.torchscript/openvino目录等ultralytics支持的格式）
+        imgsizes: 推理尺寸列表
+        image_patterns: 测试图片的glob模式
+        repeat: 每张图片重复次数
+        cold_runs: 冷启动测量次数（每次重新加载模型）
+
+    Returns:
+        dict: {"env": 运行环境, "images": 图片列表, "results": {测试项: 耗时分布}}
+    """
+    images = find_images(image_patterns or DEFAULT_IMAGES)
+    if not images:
+        raise FileNotFoundError("没有找到测试图片")
+    frames = [cv2.imread(p) for p in images]
+    print(f"🖼️ 测试图片: {len(images)} 张")
+    # 日志照常记录（保持和实际运行相同的开销），只是不刷屏
+    console_level = log.console_level
+    log.console_level = ERROR
+
+    results = {}
+    try:
+        results.update(bench_decode(images, repeat))
+
+        for model_path in models:
+            for imgsz in imgsizes:
+                print(f"🔮 {model_path} @ {imgsz}")
+                model_results, detections = bench_model(
+                    model_path, frames, imgsz, repeat, cold_runs
+                )
+                results.update(model_results)
+            if "select" not in results:
+                results.update(bench_select(detections, repeat * 20))
+            print(f"🎯 {model_path} 端到端 Jump.predict")
+            results.update(bench_predict(model_path, images, imgsizes, repeat))
+    finally:
+        log.console_level = console_level
+
+    return {"env": environment_info(), "images": images, "results": results}
+
+
+def compare(
+    baseline: dict,
+    current: dict,
+    threshold: float = 0.10,
+    metric: str = "p50",
+    min_delta_ms: float = 0.05,
+):
+    """
+    对比两次结果
+
+    Args:
+        baseline: 基线结果
+        current: 当前结果
+        threshold: 变慢超过该比例视为回退
+        metric: 对比的统计量
+        min_delta_ms: 绝对变化小于该值时不算回退（避免微秒级测试项的抖动）
+
+    Returns:
+        list: [(测试项, 基线值, 当前值, 变化比例, 是否回退)]
+    """
+    rows = []
+    for key, stats in current["results"].items():
+        base = baseline["results"].get(key)
+        if not base or metric not in base or metric not in stats:
+            continue
+        before, after = base[metric], stats[metric]
+        change = (after - before) / before if before else 0.0
+        regressed = change > threshold and after - before >= min_delta_ms
+        rows.append((key, before, after, change, regressed))
+    return rows
+
+
+def print_results(report: dict):
+    """打印结果表"""
+    print(f"\n📊 基准测试结果 (ms):")
+    for key, stats in report["results"].items():
+        print(
+            f"   {key:<40} p50={stats['p50']:>10.3f}  p99={stats['p99']:>10.3f}  n={stats['count']}"
+        )
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="跳一跳检测流水线基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="运行基准测试")
+    run_parser.add_argument("--models", nargs="+", default=["./best.pt"], help="模型路径")
+    run_parser.add_argument("--imgsz", nargs="+", type=int, default=[640], help="推理尺寸")
+    run_parser.add_argument("--images", nargs="+", help="测试图片glob模式")
+    run_parser.add_argument("--repeat", type=int, default=5, help="每张图片重复次数")
+    run_parser.add_argument("--cold-runs", type=int, default=3, help="冷启动测量次数")
+    run_parser.add_argument("--output", help="结果JSON路径，默认 benchmarks/bench_<时间>.json")
+
+    compare_parser = subparsers.add_parser("compare", help="对比两次结果")
+    compare_parser.add_argument("baseline", help="基线结果JSON")
+    compare_parser.add_argument("current", help="当前结果JSON")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="回退阈值")
+    compare_parser.add_argument("--metric", default="p50", help="对比的统计量")
+    compare_parser.add_argument(
+        "--min-delta", type=float, default=0.05, help="不算回退的最小绝对变化（毫秒）"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_suite(args.models, args.imgsz, args.images, args.repeat, args.cold_runs)
+        print_results(report)
+        output = args.output or f"benchmarks/bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {output}")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold, args.metric, args.min_delta)
+    regressions = [row for row in rows if row[4]]
+    print(f"📊 对比 {args.metric} (阈值 {args.threshold:.0%}):")
+    for key, before, after, change, regressed in rows:
+        flag = "❌ 回退" if regressed else ("✅ 提升" if change < -args.threshold else "  ")
+        print(f"   {flag} {key:<40} {before:>10.3f} → {after:>10.3f} ({change:+.1%})")
+
+    if regressions:
+        print(f"\n❌ 发现 {len(regressions)} 项性能回退")
+        sys.exit(1)
+    print("\n✅ 没有性能回退")
+
+
+if __name__ == "__main__":
+    main()
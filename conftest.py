@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试公共设置
+"""
+
+import pytest
+
+from event_log import log
+
+
+@pytest.fixture(autouse=True)
+def flush_event_log():
+    """每个测试结束时输出事件日志，日志留在该测试捕获的输出里，不会出现在测试汇总之后"""
+    yield
+    log.flush()
@@ -1,4 +1,16 @@
-from pylabel import importer
+import argparse
 
-dataset = importer.ImportVOC(path="./dataset/yolo_label/")
-dataset.export.ExportToYoloV5()
+
+def main():
+    parser = argparse.ArgumentParser(description="把VOC格式的标注转换为YOLO格式")
+    parser.add_argument("--path", default="./dataset/yolo_label/", help="VOC标注目录")
+    args = parser.parse_args()
+
+    from pylabel import importer
+
+    dataset = importer.ImportVOC(path=args.path)
+    dataset.export.ExportToYoloV5()
+
+
+if __name__ == "__main__":
+    main()
@@ -43,8 +43,20 @@ def make_yolo_dataset(images_folder, labels_folder, output_folder, train_ratio=0
  
     print("数据集划分完成！")
  
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='把标注好的截图划分为YOLO训练/验证/测试集')
+    parser.add_argument('--images', default='./dataset/screenshot_dataset/', help='截图目录')
+    parser.add_argument('--labels', default='./dataset/yolo_label/', help='YOLO标签目录')
+    parser.add_argument('--output', default='./dataset/yolo_dataset/', help='输出目录')
+    parser.add_argument('--train-ratio', type=float, default=0.8, help='训练集比例')
+    parser.add_argument('--val-ratio', type=float, default=0.1, help='验证集比例')
+    args = parser.parse_args()
+
+    make_yolo_dataset(args.images, args.labels, args.output, train_ratio=args.train_ratio,
+                      val_ratio=args.val_ratio, test_ratio=1 - args.train_ratio - args.val_ratio)
+ 
 if __name__ == "__main__":
-    images_folder = './dataset/screenshot_dataset/'
-    labels_folder = './dataset/yolo_label/'
-    output_folder = './dataset/yolo_dataset/'
-    make_yolo_dataset(images_folder, labels_folder, output_folder)
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无桌面环境的调试面板
+本地HTTP服务以MJPEG流播放带检测框的画面，同时显示各阶段耗时和最近的跳跃记录；
+一个面板可以挂多个会话（多台设备）。JPEG只在有人观看时编码，每帧只编码一次，
+在HTTP线程中完成，不占用跳跃循环；每个客户端按最大帧率限流
+"""
+
+import collections
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import cv2
+
+PAGE = """<!DOCTYPE html>
+<html lang="zh">
+<head>
+<meta charset="utf-8">
+<title>跳一跳调试面板</title>
+<style>
+body { font-family: sans-serif; background: #1e1e1e; color: #ddd; margin: 16px; }
+.session { display: inline-block; vertical-align: top; margin: 0 16px 16px 0; }
+.session img { height: 640px; background: #000; display: block; }
+table { border-collapse: collapse; font-size: 13px; margin-top: 8px; }
+td, th { padding: 2px 8px; text-align: right; }
+.fail { color: #f66; }
+</style>
+</head>
+<body>
+<h2>🎮 跳一跳调试面板</h2>
+<div id="sessions"></div>
+<script>
+function row(cells, tag) {
+  return "<tr>" + cells.map(c => `<${tag || "td"}>${c}</${tag || "td"}>`).join("") + "</tr>";
+}
+async function refresh() {
+  const status = await (await fetch("/api/status")).json();
+  const root = document.getElementById("sessions");
+  for (const [name, s] of Object.entries(status)) {
+    const id = "s_" + encodeURIComponent(name).replace(/%/g, "_");
+    let el = document.getElementById(id);
+    if (!el) {
+      el = document.createElement("div");
+      el.className = "session";
+      el.id = id;
+      el.innerHTML = `<h3>${name}</h3><img src="/stream/${encodeURIComponent(name)}">` +
+        `<table class="stages"></table><table class="history"></table>`;
+      root.appendChild(el);
+    }
+    el.querySelector(".stages").innerHTML =
+      row(["阶段", "次数", "p50 ms", "p99 ms", "max ms"], "th") +
+      Object.entries(s.stages).map(([k, v]) =>
+        row([k, v.count, v.p50_ms, v.p99_ms, v.max_ms])).join("");
+    el.querySelector(".history").innerHTML =
+      row(["时间", "距离", "按压ms", "结果"], "th") +
+      s.history.slice().reverse().map(h => {
+        const outcome = h.reason || (h.tapped === false ? "tap_failed" : "ok");
+        return row([new Date(h.t * 1000).toLocaleTimeString(),
+                    (h.distance || 0).toFixed(1), h.press_time ?? "",
+                    outcome === "ok" ? "ok" : `<span class="fail">${outcome}</span>`]);
+      }).join("");
+  }
+}
+refresh();
+setInterval(refresh, 1000);
+</script>
+</body>
+</html>
+"""
+
+
+class DashboardSession:
+    """一个会话（一台设备）的最新画面、跳跃记录和耗时"""
+
+    def __init__(self, name: str, metrics=None, history: int = 30, quality: int = 70):
+        """
+        Args:
+            name: 会话名
+            metrics: MetricsRegistry，用于显示各阶段耗时
+            history: 保留的跳跃记录条数
+            quality: JPEG质量
+        """
+        self.name = name
+        self.metrics = metrics
+        self.quality = quality
+        self.history = collections.deque(maxlen=history)
+        self._frame = None
+        self._seq = 0
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._lock = threading.Lock()
+        self._updated = threading.Condition(self._lock)
+
+    def publish_frame(self, image):
+        """发布一帧渲染好的图像（只保存引用，不编码），可以作为 OverlayRenderer 的输出"""
+        with self._updated:
+            self._frame = image
+            self._seq += 1
+            self._updated.notify_all()
+
+    def record_jump(self, result: dict):
+        """记录一次跳跃（Jump.jump 的返回值）"""
+        self.history.append(dict(result, t=time.time()))
+
+    def jpeg(self, after_seq: int = 0, timeout: float = 5.0) -> tuple:
+        """
+        等待比after_seq新的一帧并返回JPEG数据，多个客户端共享同一次编码
+
+        Returns:
+            tuple: (帧序号, JPEG字节)，超时且没有新帧时JPEG为None
+        """
+        with self._updated:
+            if self._seq <= after_seq:
+                self._updated.wait(timeout)
+            if self._frame is None or self._seq <= after_seq:
+                return after_seq, None
+            if self._jpeg_seq != self._seq:
+                ok, data = cv2.imencode(
+                    ".jpg", self._frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+                )
+                self._jpeg = data.tobytes() if ok else None
+                self._jpeg_seq = self._seq
+            return self._jpeg_seq, self._jpeg
+
+    def status(self) -> dict:
+        """各阶段耗时和最近的跳跃记录"""
+        stages = {}
+        if self.metrics:
+            for stage, histogram in list(self.metrics.histograms.items()):
+                stages[stage] = histogram.snapshot()
+        return {"stages": stages, "history": list(self.history), "frames": self._seq}
+
+
+class DashboardServer:
+    """在后台线程中提供调试面板"""
+
+    def __init__(
+        self,
+        port: int = 9109,
+        host: str = "127.0.0.1",
+        max_fps: float = 5.0,
+        keepalive: float = 5.0,
+    ):
+        """
+        Args:
+            port: 监听端口，0表示随机端口
+            host: 监听地址，远程查看无桌面的机器时设为0.0.0.0
+            max_fps: 每个客户端的最大帧率
+            keepalive: 没有新帧时多久重发一次当前帧（秒），借此发现已断开的客户端
+        """
+        self.sessions = {}
+        self.max_fps = max_fps
+        self.keepalive = keepalive
+        self._closed = threading.Event()
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                path = unquote(handler.path.split("?")[0])
+                if path == "/":
+                    handler._send(200, "text/html; charset=utf-8", PAGE.encode("utf-8"))
+                elif path == "/api/status":
+                    body = json.dumps(dashboard.status(), ensure_ascii=False, default=float)
+                    handler._send(200, "application/json", body.encode("utf-8"))
+                elif path.startswith("/snapshot/"):
+                    session = dashboard.sessions.get(path[len("/snapshot/") :])
+                    _, data = session.jpeg(0, timeout=0) if session else (0, None)
+                    if data is None:
+                        handler.send_error(404)
+                    else:
+                        handler._send(200, "image/jpeg", data)
+                elif path.startswith("/stream/"):
+                    session = dashboard.sessions.get(path[len("/stream/") :])
+                    if session is None:
+                        handler.send_error(404)
+                    else:
+                        handler._stream(session)
+                else:
+                    handler.send_error(404)
+
+            def _send(handler, code, content_type, body):
+                handler.send_response(code)
+                handler.send_header("Content-Type", content_type)
+                handler.send_header("Content-Length", str(len(body)))
+                handler.send_header("Cache-Control", "no-cache")
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def _stream(handler, session):
+                handler.send_response(200)
+                handler.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                handler.send_header("Cache-Control", "no-cache")
+                handler.end_headers()
+                min_interval = 1.0 / dashboard.max_fps
+                seq = 0
+                try:
+                    while not dashboard._closed.is_set():
+                        start = time.monotonic()
+                        seq, data = session.jpeg(seq, timeout=dashboard.keepalive)
+                        if data is None:
+                            # 画面没有更新时也要写点东西，客户端断开后写入会失败，
+                            # 线程才能退出：重发当前帧，还没有帧时写空行（multipart前导）
+                            _, data = session.jpeg(0, timeout=0)
+                            if data is None:
+                                handler.wfile.write(b"\r\n")
+                                handler.wfile.flush()
+                                continue
+                        handler.wfile.write(
+                            b"--frame\r\nContent-Type: image/jpeg\r\n"
+                            + f"Content-Length: {len(data)}\r\n\r\n".encode()
+                            + data
+                            + b"\r\n"
+                        )
+                        handler.wfile.flush()
+                        # 每个客户端限流，慢客户端只会跳过中间的帧
+                        time.sleep(max(0.0, min_interval - (time.monotonic() - start)))
+                except OSError:
+                    pass  # 客户端已断开
+
+            def log_message(handler, format, *args):
+                pass  # 不在控制台打印访问日志
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"🖥️ 调试面板: http://{host}:{self.port}/")
+
+    def add_session(self, name: str, metrics=None) -> DashboardSession:
+        """添加一个会话，同名会话会被替换"""
+        session = DashboardSession(name, metrics)
+        self.sessions[name] = session
+        return session
+
+    def status(self) -> dict:
+        return {name: session.status() for name, session in list(self.sessions.items())}
+
+    def close(self):
+        """停止服务"""
+        self._closed.set()
+        self.server.shutdown()
+        self.server.server_close()
@@ -5,236 +5,95 @@
 显示检测框、距离计算和按压时间等调试信息
 """
 
-import cv2
-import numpy as np
+import argparse
 import time
 import random
-from main import Jump
+from main import Jump, press_time_for
 from device_controller import WindowsDeviceController, AdbDeviceController
+from debug_dashboard import DashboardServer
+from debug_overlay import OverlayRenderer
+from event_log import log
+from profiler import add_profile_arguments, profiler_from_args
+from session_stats import device_label
 import os
 
 
 class DebugJump(Jump):
     """带调试功能的Jump类"""
 
-    def __init__(self, model_path: str, device_controller=None, debug=True):
+    def __init__(
+        self, model_path: str, device_controller=None, debug=True, dashboard=None
+    ):
+        """
+        Args:
+            model_path: 模型路径
+            device_controller: 设备控制器
+            debug: 是否打开OpenCV调试窗口
+            dashboard: 调试面板会话（可选），见 debug_dashboard.DashboardSession
+        """
         super().__init__(model_path, device_controller)
         self.debug = debug
         self.debug_window_name = "跳一跳调试窗口"
         self.last_screenshot_path = "./debug_screenshot.png"
 
-        if self.debug:
-            cv2.namedWindow(self.debug_window_name, cv2.WINDOW_NORMAL)
-            cv2.resizeWindow(self.debug_window_name, 800, 600)
+        # 调试画面在后台线程中渲染，跟不上时丢帧
+        self.dashboard = dashboard
+        sinks = [dashboard.publish_frame] if dashboard else []
+        self.renderer = None
+        if self.debug or sinks:
+            self.renderer = OverlayRenderer(
+                self.debug_window_name if self.debug else None, sinks
+            )
 
     def predict_with_debug(self, image_path: str):
         """
         带调试信息的预测函数
 
+        和正常运行使用同一个 predict（只解码一次、同样的目标选择），
+        调试画面交给后台线程用内存中的帧渲染，不阻塞跳跃
+
         Args:
             image_path: 图片路径
 
         Returns:
             tuple: (distance, debug_info)
         """
-        # 使用原始预测方法
-        results = self.model(image_path)
-
-        # 读取图像用于调试显示
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"❌ 无法读取图像: {image_path}")
-            return 0, {}
+        distance = self.predict(image_path)
+        prediction = self.last_prediction
+        detections = prediction["detections"]
 
         debug_info = {
             "player_detected": False,
             "platform_detected": False,
             "player_center": None,
             "platform_center": None,
-            "distance": 0,
+            "distance": distance,
             "detections": [],
         }
-
-        player_center = None
-        platform_center = None
-        all_platforms = []  # 存储所有平台信息
-
-        # 处理检测结果
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    # 获取边界框坐标
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    confidence = box.conf[0].cpu().numpy()
-                    class_id = int(box.cls[0].cpu().numpy())
-
-                    # 获取类别名称
-                    class_name = self.model.names[class_id]
-
-                    # 计算中心点
-                    center_x = int((x1 + x2) / 2)
-                    center_y = int((y1 + y2) / 2)
-
-                    # 记录检测信息
-                    detection = {
-                        "class": class_name,
-                        "confidence": confidence,
-                        "bbox": (int(x1), int(y1), int(x2), int(y2)),
-                        "center": (center_x, center_y),
-                    }
-                    debug_info["detections"].append(detection)
-
-                    # 在图像上绘制检测框
-                    color = (0, 255, 0) if class_name == "humen" else (255, 0, 0)
-                    cv2.rectangle(
-                        image, (int(x1), int(y1)), (int(x2), int(y2)), color, 2
-                    )
-
-                    # 绘制标签
-                    label = f"{class_name}: {confidence:.2f}"
-                    cv2.putText(
-                        image,
-                        label,
-                        (int(x1), int(y1) - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        color,
-                        2,
-                    )
-
-                    # 绘制中心点
-                    cv2.circle(image, (center_x, center_y), 5, color, -1)
-
-                    # 记录中心点位置
-                    if class_name == "humen":  # 玩家
-                        player_center = (center_x, center_y)
-                        debug_info["player_detected"] = True
-                        debug_info["player_center"] = player_center
-                    elif class_name == "cube":  # 平台
-                        # 收集所有平台信息
-                        all_platforms.append(
-                            {
-                                "center": (center_x, center_y),
-                                "confidence": confidence,
-                                "y": center_y,
-                            }
-                        )
-                        debug_info["platform_detected"] = True
-
-        # 选择目标平台（应用与main.py相同的逻辑）
-        if player_center and all_platforms:
-            player_y = player_center[1]
-
-            # 过滤掉Y坐标大于等于玩家的平台（已经跳过的或当前站立的平台）
-            valid_platforms = [
-                p
-                for p in all_platforms
-                if p["y"] < player_y - 20  # 添加20像素的缓冲区
-            ]
-
-            if valid_platforms:
-                # 选择最近的前方平台（Y坐标最大的）
-                target_platform = max(valid_platforms, key=lambda p: p["y"])
-                platform_center = target_platform["center"]
-                debug_info["platform_center"] = platform_center
-
-                print(
-                    f"🎯 目标选择: 玩家Y={player_y}, 目标平台Y={target_platform['y']}, 有效平台数={len(valid_platforms)}"
-                )
-            else:
-                print("⚠️ 未找到有效的目标平台（所有平台都在玩家后方）")
-                platform_center = None
-
-        # 计算距离
-        distance = 0
-        if player_center and platform_center:
-            distance = np.sqrt(
-                (platform_center[0] - player_center[0]) ** 2
-                + (platform_center[1] - player_center[1]) ** 2
-            )
-            debug_info["distance"] = distance
-
-            # 绘制距离线
-            cv2.line(image, player_center, platform_center, (0, 255, 255), 2)
-
-            # 在线的中点显示距离
-            mid_x = (player_center[0] + platform_center[0]) // 2
-            mid_y = (player_center[1] + platform_center[1]) // 2
-            cv2.putText(
-                image,
-                f"Distance: {distance:.1f}",
-                (mid_x, mid_y),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                (0, 255, 255),
-                2,
+        for x1, y1, x2, y2, confidence, class_id in detections:
+            class_name = self.model.names[int(class_id)]
+            debug_info["detections"].append(
+                {
+                    "class": class_name,
+                    "confidence": float(confidence),
+                    "bbox": (int(x1), int(y1), int(x2), int(y2)),
+                    "center": (int((x1 + x2) / 2), int((y1 + y2) / 2)),
+                }
             )
+            if class_name == "humen":
+                debug_info["player_detected"] = True
+            elif class_name == "cube":
+                debug_info["platform_detected"] = True
 
-        # 显示调试信息
-        if self.debug:
-            self._display_debug_info(image, debug_info)
+        if prediction["player"] is not None:
+            debug_info["player_center"] = tuple(int(v) for v in prediction["player"][:2])
+        if prediction["target"] is not None:
+            debug_info["platform_center"] = tuple(int(v) for v in prediction["target"][:2])
 
-        return distance, debug_info
-
-    def _display_debug_info(self, image, debug_info):
-        """显示调试信息"""
-        # 在图像上添加文本信息
-        info_y = 30
-        line_height = 25
-
-        # 检测状态
-        player_status = "✓" if debug_info["player_detected"] else "✗"
-        platform_status = "✓" if debug_info["platform_detected"] else "✗"
-
-        cv2.putText(
-            image,
-            f"Player: {player_status}",
-            (10, info_y),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (0, 255, 0) if debug_info["player_detected"] else (0, 0, 255),
-            2,
-        )
-        info_y += line_height
-
-        cv2.putText(
-            image,
-            f"Platform: {platform_status}",
-            (10, info_y),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (0, 255, 0) if debug_info["platform_detected"] else (0, 0, 255),
-            2,
-        )
-        info_y += line_height
-
-        # 距离信息
-        cv2.putText(
-            image,
-            f"Distance: {debug_info['distance']:.1f}",
-            (10, info_y),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 255),
-            2,
-        )
-        info_y += line_height
-
-        # 检测数量
-        cv2.putText(
-            image,
-            f"Detections: {len(debug_info['detections'])}",
-            (10, info_y),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 255),
-            2,
-        )
+        if self.renderer:
+            self.renderer.submit(prediction.get("frame"), detections, prediction)
 
-        # 显示图像
-        cv2.imshow(self.debug_window_name, image)
-        cv2.waitKey(1)  # 非阻塞显示
+        return distance, debug_info
 
     def debug_jump(self, k: float = 7.0, screenshot_path: str = None):
         """
@@ -247,45 +106,52 @@ class DebugJump(Jump):
         if screenshot_path is None:
             screenshot_path = self.last_screenshot_path
 
-        print("\n" + "=" * 50)
-        print("🎮 开始新一轮跳跃")
+        log.info("debug_jump_start", "\n" + "=" * 50 + "\n🎮 开始新一轮跳跃")
 
         # 截图
-        print("📸 正在截图...")
+        log.debug("debug_capture", "📸 正在截图...")
         if not self.screenshot(screenshot_path):
-            print("❌ 截图失败")
+            log.error("debug_capture_failed", "❌ 截图失败")
             return False
 
         # 预测并获取调试信息
-        print("🔍 正在分析图像...")
+        log.debug("debug_analyze", "🔍 正在分析图像...")
         distance, debug_info = self.predict_with_debug(screenshot_path)
 
         # 显示详细调试信息
-        print(f"📊 检测结果:")
-        print(f"   玩家检测: {'✓' if debug_info['player_detected'] else '✗'}")
-        print(f"   平台检测: {'✓' if debug_info['platform_detected'] else '✗'}")
-        print(f"   检测数量: {len(debug_info['detections'])}")
-
-        if debug_info["player_center"]:
-            print(f"   玩家位置: {debug_info['player_center']}")
-        if debug_info["platform_center"]:
-            print(f"   平台位置: {debug_info['platform_center']}")
-
-        print(f"   计算距离: {distance:.2f}")
+        log.info(
+            "debug_detections",
+            "📊 检测结果:\n"
+            "   玩家检测: {player}\n"
+            "   平台检测: {platform}\n"
+            "   检测数量: {count}\n"
+            "   玩家位置: {player_center}\n"
+            "   平台位置: {platform_center}\n"
+            "   计算距离: {distance:.2f}",
+            player="✓" if debug_info["player_detected"] else "✗",
+            platform="✓" if debug_info["platform_detected"] else "✗",
+            count=len(debug_info["detections"]),
+            player_center=debug_info["player_center"],
+            platform_center=debug_info["platform_center"],
+            distance=float(distance),
+        )
 
         # 检查是否检测到必要的对象
         if not debug_info["player_detected"]:
-            print("⚠️ 警告: 未检测到玩家")
+            log.warning("debug_no_player", "⚠️ 警告: 未检测到玩家")
         if not debug_info["platform_detected"]:
-            print("⚠️ 警告: 未检测到目标平台")
+            log.warning("debug_no_platform", "⚠️ 警告: 未检测到目标平台")
 
         if distance == 0:
-            print("❌ 无法计算距离，跳过本次跳跃")
+            log.warning("debug_skip", "❌ 无法计算距离，跳过本次跳跃")
+            if self.dashboard:
+                self.dashboard.record_jump(
+                    {"distance": 0.0, "reason": self.last_prediction["reason"]}
+                )
             return False
 
-        # 计算按压时间
-        press_time = int(distance * k)
-        print(f"⏱️ 按压时间计算: {distance:.2f} × {k} = {press_time}ms")
+        # 计算按压时间（和 Jump.jump 一样按标定补偿注入偏差）
+        press_time = press_time_for(distance, k, self.tap_calibration)
 
         # 获取屏幕尺寸用于随机点击位置
         screen_width, screen_height = self.device_controller.get_screen_size()
@@ -294,27 +160,57 @@ class DebugJump(Jump):
         x = random.randint(int(screen_width * 0.3), int(screen_width * 0.7))
         y = random.randint(int(screen_height * 0.6), int(screen_height * 0.8))
 
-        print(f"🖱️ 点击位置: ({x}, {y})")
-        print(f"⏰ 按压时长: {press_time}ms")
+        log.info(
+            "debug_press",
+            "⏱️ 按压时间计算: {distance:.2f} × {k} → {press_time}ms\n"
+            "🖱️ 点击位置: ({x}, {y})",
+            distance=float(distance),
+            k=k,
+            press_time=press_time,
+            x=x,
+            y=y,
+        )
 
         # 执行点击
-        if self.tap(x, y, duration_ms=press_time):
-            print("✅ 跳跃执行成功")
+        tapped = self.tap(x, y, duration_ms=press_time)
+        if tapped:
+            log.info("debug_tap", "✅ 跳跃执行成功")
         else:
-            print("❌ 跳跃执行失败")
+            log.error("debug_tap_failed", "❌ 跳跃执行失败")
+        if self.dashboard:
+            self.dashboard.record_jump(
+                {
+                    "distance": float(distance),
+                    "reason": None,
+                    "press_time": press_time,
+                    "tapped": bool(tapped),
+                }
+            )
 
-        print("⏳ 等待2秒...")
-        time.sleep(2)
+        # 和 Jump.jump 一样按按压时长等待跳跃动画结束，调试模式保持实际的跳跃节奏
+        settle_seconds = press_time / 1000 + 1
+        log.debug("debug_settle", "⏳ 等待{seconds:.1f}秒...", seconds=settle_seconds)
+        if self.renderer:
+            # 等待期间在主线程中分小段刷新调试窗口，本次的画面不用等到下一轮才显示
+            remaining = settle_seconds
+            while remaining > 0:
+                step = min(0.1, remaining)
+                self.device_controller.settle(step)
+                self.renderer.pump()
+                remaining -= step
+        else:
+            self.device_controller.settle(settle_seconds)
 
         return True
 
-    def run_debug_mode(self, k: float = 1.18, max_jumps: int = 100):
+    def run_debug_mode(self, k: float = 1.18, max_jumps: int = 100, profiler=None):
         """
         运行调试模式
 
         Args:
             k: 跳跃系数
             max_jumps: 最大跳跃次数
+            profiler: 性能剖析器（可选），见 profiler.JumpProfiler
         """
         print("🚀 启动跳一跳调试模式")
         print(f"📋 参数设置:")
@@ -332,9 +228,9 @@ class DebugJump(Jump):
 
         try:
             while jump_count < max_jumps:
-                # 检查键盘输入
-                if self.debug:
-                    key = cv2.waitKey(1) & 0xFF
+                # 检查键盘输入（按键由渲染线程的窗口收集）
+                if self.renderer:
+                    key = self.renderer.poll_key()
                     if key == ord("q"):
                         print("👋 用户退出")
                         break
@@ -358,19 +254,37 @@ class DebugJump(Jump):
                 print(f"\n🎯 第 {jump_count} 次跳跃")
 
                 # 执行调试跳跃
-                if not self.debug_jump(k):
+                if profiler and not profiler.done:
+                    with profiler.jump():
+                        jumped = self.debug_jump(k)
+                else:
+                    jumped = self.debug_jump(k)
+                if not jumped:
                     print("⚠️ 跳跃失败，继续下一次")
 
         except KeyboardInterrupt:
             print("\n⏹️ 程序被中断")
         finally:
-            if self.debug:
-                cv2.destroyAllWindows()
+            if self.renderer:
+                self.renderer.close()
+                print(
+                    f"🖼️ 调试画面: 渲染 {self.renderer.rendered} 帧, "
+                    f"丢弃 {self.renderer.dropped} 帧"
+                )
+            if profiler:
+                profiler.finish()
             print(f"📈 总共执行了 {jump_count} 次跳跃")
 
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="跳一跳调试工具")
+    parser.add_argument("--dashboard-port", type=int, help="开启网页调试面板（MJPEG）")
+    parser.add_argument("--dashboard-host", default="127.0.0.1", help="调试面板监听地址")
+    parser.add_argument("--no-window", action="store_true", help="不打开OpenCV窗口（无桌面环境）")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     print("🎮 跳一跳调试工具")
     print("=" * 50)
 
@@ -392,14 +306,24 @@ def main():
         device_controller = AdbDeviceController()
 
     # 创建调试Jump实例
-    debug_jump = DebugJump("./best.pt", device_controller, debug=True)
+    dashboard = None
+    if args.dashboard_port:
+        server = DashboardServer(args.dashboard_port, args.dashboard_host)
+        dashboard = server.add_session(device_label(device_controller))
+    debug_jump = DebugJump(
+        "./best.pt", device_controller, debug=not args.no_window, dashboard=dashboard
+    )
+    if dashboard:
+        dashboard.metrics = debug_jump.metrics
 
     # 设置参数
     k = float(input("请输入跳跃系数 (默认1.18): ").strip() or "1.18")
     max_jumps = int(input("请输入最大跳跃次数 (默认100): ").strip() or "100")
 
     # 运行调试模式
-    debug_jump.run_debug_mode(k=k, max_jumps=max_jumps)
+    debug_jump.run_debug_mode(
+        k=k, max_jumps=max_jumps, profiler=profiler_from_args(args)
+    )
 
 
 if __name__ == "__main__":
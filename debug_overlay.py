@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调试画面渲染
+根据内存中的帧、检测结果数组和目标选择结果画出检测框、距离线和状态信息；
+OverlayRenderer在后台线程中渲染，只保留最新一帧，渲染跟不上时直接丢帧，
+跳跃循环不会被画图拖慢；OpenCV窗口（HighGUI）只能在主线程中操作，
+渲染好的画面由主循环调用 poll_key() 时显示
+"""
+
+import collections
+import queue
+import threading
+
+import cv2
+
+CLASS_NAMES = {0: "cube", 1: "humen"}
+PLAYER_COLOR = (0, 255, 0)
+PLATFORM_COLOR = (255, 0, 0)
+TARGET_COLOR = (0, 255, 255)
+
+
+def _center(xywh) -> tuple:
+    return int(xywh[0]), int(xywh[1])
+
+
+def draw_overlay(frame, detections, decision: dict, copy: bool = True):
+    """
+    在帧上画出调试信息
+
+    Args:
+        frame: BGR图像
+        detections: 检测结果数组，每行 [x1, y1, x2, y2, conf, cls]
+        decision: select_target 的返回值
+        copy: 是否在副本上绘制
+
+    Returns:
+        np.ndarray: 绘制后的图像
+    """
+    image = frame.copy() if copy else frame
+
+    for x1, y1, x2, y2, conf, cls in detections:
+        name = CLASS_NAMES.get(int(cls), str(int(cls)))
+        color = PLAYER_COLOR if int(cls) == 1 else PLATFORM_COLOR
+        cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
+        cv2.putText(
+            image,
+            f"{name}: {conf:.2f}",
+            (int(x1), int(y1) - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            color,
+            2,
+        )
+        cv2.circle(image, (int((x1 + x2) / 2), int((y1 + y2) / 2)), 5, color, -1)
+
+    player, target = decision.get("player"), decision.get("target")
+    distance = decision.get("distance") or 0
+    if player is not None and target is not None:
+        start, end = _center(player), _center(target)
+        cv2.line(image, start, end, TARGET_COLOR, 2)
+        cv2.putText(
+            image,
+            f"Distance: {distance:.1f}",
+            ((start[0] + end[0]) // 2, (start[1] + end[1]) // 2),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            TARGET_COLOR,
+            2,
+        )
+
+    has_player = any(int(d[5]) == 1 for d in detections)
+    has_platform = any(int(d[5]) == 0 for d in detections)
+    lines = [
+        (f"Player: {'OK' if has_player else 'X'}", PLAYER_COLOR if has_player else (0, 0, 255)),
+        (
+            f"Platform: {'OK' if has_platform else 'X'}",
+            PLAYER_COLOR if has_platform else (0, 0, 255),
+        ),
+        (f"Distance: {distance:.1f}", (255, 255, 255)),
+        (f"Detections: {len(detections)}", (255, 255, 255)),
+    ]
+    if decision.get("reason"):
+        lines.append((f"Reason: {decision['reason']}", (0, 0, 255)))
+    for i, (text, color) in enumerate(lines):
+        cv2.putText(
+            image, text, (10, 30 + i * 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2
+        )
+    return image
+
+
+class OverlayRenderer:
+    """后台渲染线程：submit() 只替换待渲染的最新帧，不等待渲染完成"""
+
+    def __init__(self, window_name: str = None, sinks: list = None):
+        """
+        启动渲染线程
+
+        Args:
+            window_name: OpenCV窗口名，None表示不开窗口（无桌面环境时）
+            sinks: 额外的输出，每个都是接收渲染结果图像的可调用对象
+        """
+        self.window_name = window_name
+        self.sinks = list(sinks or [])
+        self.rendered = 0
+        self.dropped = 0
+        self._pending = queue.Queue(maxsize=1)
+        self._rendered = queue.Queue(maxsize=1)  # 等主线程显示的画面
+        self._keys = collections.deque()
+        self._window_open = False
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, detections, decision: dict):
+        """提交一帧，上一帧还没开始渲染就被丢弃"""
+        if frame is None:
+            return
+        if _replace_latest(self._pending, (frame, detections, decision)):
+            self.dropped += 1
+
+    def pump(self):
+        """在主线程中调用：显示最新渲染好的画面，处理窗口事件，按键留给 poll_key()"""
+        if not self.window_name:
+            return
+        if not self._window_open:
+            cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(self.window_name, 800, 600)
+            self._window_open = True
+        try:
+            cv2.imshow(self.window_name, self._rendered.get_nowait())
+        except queue.Empty:
+            pass
+        key = cv2.waitKey(1) & 0xFF
+        if key != 0xFF:
+            self._keys.append(key)
+
+    def poll_key(self) -> int:
+        """
+        在主线程中调用：刷新窗口并取出按下的键
+
+        Returns:
+            int: 窗口中按下的键，没有窗口或没有按键时返回-1
+        """
+        self.pump()
+        return self._keys.popleft() if self._keys else -1
+
+    def _run(self):
+        # 这个线程只画图和调用sinks，不碰OpenCV窗口
+        while not self._closed.is_set():
+            try:
+                frame, detections, decision = self._pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            image = draw_overlay(frame, detections, decision)
+            self.rendered += 1
+            for sink in self.sinks:
+                sink(image)
+            if self.window_name:
+                _replace_latest(self._rendered, image)
+
+    def close(self):
+        """停止渲染线程并关闭窗口（和 poll_key() 一样在主线程中调用）"""
+        self._closed.set()
+        self._thread.join(timeout=2.0)
+        if self._window_open:
+            cv2.destroyWindow(self.window_name)
+            self._window_open = False
+
+
+def _replace_latest(slot: queue.Queue, item) -> bool:
+    """把容量为1的队列中的内容换成item，返回是否丢弃了旧内容"""
+    dropped = False
+    try:
+        slot.get_nowait()
+        dropped = True
+    except queue.Empty:
+        pass
+    try:
+        slot.put_nowait(item)
+    except queue.Full:
+        dropped = True
+    return dropped
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+决策回归测试
+把一组固定的帧走完整的截图→推理→选目标→按压时间流程，与保存的基准结果（golden）比较
+选中的目标、距离和按压时间（允许一定误差），并报告吞吐。
+改动 Jump.predict、推理后端或预处理以提速之后，用它证明跳跃决策没有变化；
+只用CPU、不需要手机或Windows窗口
+
+    python decision_regression.py record --corpus ./dataset/regression --model ./best.pt
+    python decision_regression.py check --corpus ./dataset/regression
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from detection_cache import weights_hash
+from device_controller import ReplayDeviceController
+from event_log import log
+from main import Jump, box_center, press_time_for, select_target
+from replay_runner import summarize_latencies
+
+GOLDEN_FILE = "golden.json"
+
+# 默认允许的误差
+DEFAULT_TOLERANCES = {
+    "target_px": 3.0,  # 目标中心偏移（像素）
+    "distance_rel": 0.01,  # 距离相对误差
+    "press_ms": 3,  # 按压时间（毫秒）
+}
+
+
+def decision_row(frame: str, decision: dict, press_time: int, detections) -> dict:
+    """
+    一帧的决策记录，同时保存检测结果，之后可以只回放选目标和按压时间的部分
+
+    Args:
+        frame: 帧文件名
+        decision: select_target 的结果
+        press_time: 按压时间（毫秒）
+        detections: 检测结果数组
+
+    Returns:
+        dict: frame/reason/distance/press_time/player/target/detections
+    """
+    return {
+        "frame": os.path.basename(frame),
+        "reason": decision["reason"] or "ok",
+        "distance": round(float(decision["distance"]), 3),
+        "press_time": int(press_time),
+        "player": box_center(decision["player"]),
+        "target": box_center(decision["target"]),
+        "detections": np.asarray(detections, dtype=np.float64).tolist(),
+    }
+
+
+def run_corpus(model_path: str, corpus: str, k: float = 1.61) -> dict:
+    """
+    把语料中的帧逐一走完整的 Jump.jump 流程
+
+    模型加载和预热不计入吞吐；关闭检测缓存，每一帧都真正推理
+
+    Args:
+        model_path: 模型文件路径
+        corpus: 帧目录或录制会话目录
+        k: 跳跃系数
+
+    Returns:
+        dict: rows（每帧的决策记录）、latency_ms（每帧耗时分布）、
+              frames_per_second、predict_params、tap_calibration
+    """
+    controller = ReplayDeviceController(corpus)
+    # 不保存推理结果图片，PNG编码和写盘不计入每帧耗时
+    jump = Jump(model_path, controller, cache=False, save_folder=False)
+
+    rows, latencies = [], []
+    with tempfile.TemporaryDirectory() as workdir:
+        screenshot_path = os.path.join(workdir, "frame.png")
+        wall_start = time.perf_counter()
+        while not controller.exhausted:
+            start = time.perf_counter()
+            result = jump.jump(k=k, screenshot_path=screenshot_path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            rows.append(
+                decision_row(
+                    controller.current_frame,
+                    jump.last_prediction,
+                    result["press_time"],
+                    jump.last_prediction["detections"],
+                )
+            )
+        wall_seconds = time.perf_counter() - wall_start
+
+    return {
+        "rows": rows,
+        "latency_ms": summarize_latencies(latencies),
+        "frames_per_second": (
+            round(len(rows) / wall_seconds, 2) if wall_seconds > 0 else 0.0
+        ),
+        "predict_params": jump.predict_params,
+        "tap_calibration": jump.tap_calibration,
+    }
+
+
+def replay_selection(golden: dict, k: float = None) -> dict:
+    """
+    只回放选目标和按压时间：把基准中保存的检测结果重新送入 select_target，不加载模型
+
+    Args:
+        golden: 基准结果
+        k: 跳跃系数，默认使用基准中的系数
+
+    Returns:
+        dict: 与 run_corpus 相同的结构
+    """
+    k = golden["k"] if k is None else k
+    rows, latencies = [], []
+    wall_start = time.perf_counter()
+    for expected in golden["frames"]:
+        start = time.perf_counter()
+        # 模型输出的是float32，按原精度回放，结果应与记录时完全相同
+        detections = np.asarray(expected["detections"], dtype=np.float32).reshape(-1, 6)
+        decision = select_target(detections)
+        press_time = press_time_for(
+            decision["distance"], k, golden.get("tap_calibration")
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        rows.append(decision_row(expected["frame"], decision, press_time, detections))
+    wall_seconds = time.perf_counter() - wall_start
+
+    return {
+        "rows": rows,
+        "latency_ms": summarize_latencies(latencies),
+        "frames_per_second": (
+            round(len(rows) / wall_seconds, 2) if wall_seconds > 0 else 0.0
+        ),
+    }
+
+
+def compare_rows(expected: dict, actual: dict, tolerances: dict = None) -> list:
+    """
+    比较一帧的基准决策和实际决策
+
+    Args:
+        expected: 基准记录
+        actual: 实际记录
+        tolerances: 允许的误差，见 DEFAULT_TOLERANCES
+
+    Returns:
+        list: 超出误差的项目说明，空列表表示一致
+    """
+    tolerances = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+    problems = []
+    if expected["reason"] != actual["reason"]:
+        problems.append(f"结果 {expected['reason']} → {actual['reason']}")
+        return problems
+
+    if expected["target"] is not None and actual["target"] is not None:
+        offset = float(np.hypot(*np.subtract(actual["target"], expected["target"])))
+        if offset > tolerances["target_px"]:
+            problems.append(f"目标中心偏移 {offset:.1f}px")
+
+    delta = abs(actual["distance"] - expected["distance"])
+    if delta > tolerances["distance_rel"] * max(expected["distance"], 1.0):
+        problems.append(f"距离 {expected['distance']:.1f} → {actual['distance']:.1f}")
+
+    if abs(actual["press_time"] - expected["press_time"]) > tolerances["press_ms"]:
+        problems.append(f"按压时间 {expected['press_time']}ms → {actual['press_time']}ms")
+    return problems
+
+
+def load_golden(path: str) -> dict:
+    """读取基准结果"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record(
+    model_path: str, corpus: str, golden_path: str = None, k: float = 1.61
+) -> dict:
+    """
+    用当前模型和代码生成基准结果
+
+    Args:
+        model_path: 模型文件路径
+        corpus: 帧目录或录制会话目录
+        golden_path: 基准结果路径，默认为语料目录下的 golden.json
+        k: 跳跃系数
+
+    Returns:
+        dict: 基准结果
+    """
+    golden_path = golden_path or os.path.join(corpus, GOLDEN_FILE)
+    run = run_corpus(model_path, corpus, k)
+    golden = {
+        "model": model_path,
+        "weights": weights_hash(model_path),
+        "predict_params": run["predict_params"],
+        "k": k,
+        "tap_calibration": run["tap_calibration"],
+        "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "frames_per_second": run["frames_per_second"],
+        "frames": run["rows"],
+    }
+    with open(golden_path, "w", encoding="utf-8") as f:
+        json.dump(golden, f, ensure_ascii=False, indent=1)
+    log.info(
+        "golden_recorded",
+        "💾 已记录 {frames} 帧的基准决策: {path}",
+        frames=len(golden["frames"]),
+        path=golden_path,
+    )
+    return golden
+
+
+def check(
+    corpus: str,
+    golden_path: str = None,
+    model_path: str = None,
+    selection_only: bool = False,
+    tolerances: dict = None,
+) -> dict:
+    """
+    重新运行语料并与基准结果比较
+
+    Args:
+        corpus: 帧目录或录制会话目录
+        golden_path: 基准结果路径，默认为语料目录下的 golden.json
+        model_path: 模型文件路径，默认使用记录基准时的模型
+        selection_only: 只回放选目标和按压时间（使用基准中的检测结果，不需要模型）
+        tolerances: 允许的误差，见 DEFAULT_TOLERANCES
+
+    Returns:
+        dict: frames、mismatches（[{frame, problems}]）、latency_ms、
+              frames_per_second、baseline_fps、passed
+    """
+    golden = load_golden(golden_path or os.path.join(corpus, GOLDEN_FILE))
+    if selection_only:
+        run = replay_selection(golden)
+    else:
+        model_path = model_path or golden["model"]
+        if weights_hash(model_path) != golden["weights"]:
+            log.warning(
+                "golden_weights_differ",
+                "⚠️ 模型权重与记录基准时不同，差异可能来自模型本身: {model}",
+                model=model_path,
+            )
+        run = run_corpus(model_path, corpus, golden["k"])
+
+    expected_rows = {row["frame"]: row for row in golden["frames"]}
+    mismatches = []
+    for actual in run["rows"]:
+        expected = expected_rows.pop(actual["frame"], None)
+        if expected is None:
+            mismatches.append({"frame": actual["frame"], "problems": ["基准中没有这一帧"]})
+            continue
+        problems = compare_rows(expected, actual, tolerances)
+        if problems:
+            mismatches.append({"frame": actual["frame"], "problems": problems})
+    for frame in expected_rows:
+        mismatches.append({"frame": frame, "problems": ["语料中缺少这一帧"]})
+
+    return {
+        "frames": len(run["rows"]),
+        "mismatches": mismatches,
+        "latency_ms": run["latency_ms"],
+        "frames_per_second": run["frames_per_second"],
+        "baseline_fps": None if selection_only else golden.get("frames_per_second"),
+        "passed": not mismatches,
+    }
+
+
+def print_report(report: dict):
+    """打印回归测试报告"""
+    print(f"\n🧪 决策回归: {report['frames']} 帧, 不一致 {len(report['mismatches'])} 帧")
+    latency = report["latency_ms"]
+    if latency.get("count"):
+        print(
+            f"   吞吐: {report['frames_per_second']} 帧/秒 "
+            f"(p50 {latency['p50']:.1f}ms, p99 {latency['p99']:.1f}ms)"
+        )
+    if report.get("baseline_fps"):
+        print(f"   记录基准时: {report['baseline_fps']} 帧/秒")
+    for mismatch in report["mismatches"]:
+        print(f"   ❌ {mismatch['frame']}: {'; '.join(mismatch['problems'])}")
+    print("✅ 决策与基准一致" if report["passed"] else "❌ 决策与基准不一致")
+
+
+def main():
+    """主函数"""
+    from event_log import WARNING
+
+    parser = argparse.ArgumentParser(description="跳一跳决策回归测试")
+    parser.add_argument("--corpus", default="./dataset/regression", help="帧目录或录制会话目录")
+    parser.add_argument("--golden", help="基准结果路径，默认为语料目录下的 golden.json")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="用当前模型和代码记录基准结果")
+    record_parser.add_argument("--model", default="./best.pt", help="模型文件路径")
+    record_parser.add_argument("--k", type=float, default=1.61, help="跳跃系数")
+
+    check_parser = subparsers.add_parser("check", help="与基准结果比较")
+    check_parser.add_argument("--model", help="模型文件路径，默认使用记录基准时的模型")
+    check_parser.add_argument(
+        "--selection-only", action="store_true", help="只回放选目标和按压时间，不加载模型"
+    )
+    check_parser.add_argument(
+        "--target-px",
+        type=float,
+        default=DEFAULT_TOLERANCES["target_px"],
+        help="目标中心允许偏移（像素）",
+    )
+    check_parser.add_argument(
+        "--distance-rel",
+        type=float,
+        default=DEFAULT_TOLERANCES["distance_rel"],
+        help="距离允许的相对误差",
+    )
+    check_parser.add_argument(
+        "--press-ms",
+        type=int,
+        default=DEFAULT_TOLERANCES["press_ms"],
+        help="按压时间允许误差（毫秒）",
+    )
+    check_parser.add_argument("--output", help="JSON报告输出路径")
+
+    args = parser.parse_args()
+    log.console_level = WARNING  # 逐帧的选目标日志太多
+
+    if args.command == "record":
+        golden = record(args.model, args.corpus, args.golden, args.k)
+        print(
+            f"💾 已记录 {len(golden['frames'])} 帧的基准决策 "
+            f"({golden['frames_per_second']} 帧/秒)"
+        )
+        return
+
+    report = check(
+        args.corpus,
+        args.golden,
+        args.model,
+        args.selection_only,
+        {
+            "target_px": args.target_px,
+            "distance_rel": args.distance_rel,
+            "press_ms": args.press_ms,
+        },
+    )
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if not report["passed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
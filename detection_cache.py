@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按内容寻址的检测结果缓存
+键由 (模型权重哈希, 推理参数, 画面像素哈希) 组成，同一个模型在同一帧上只推理一次：
+崩溃后重新分析、点击失败后画面没变的重试、重复审查都直接命中缓存。
+内存中一层LRU，磁盘上一层SQLite，超过大小上限时淘汰最久未使用的条目
+"""
+
+import argparse
+import collections
+import hashlib
+import importlib.metadata
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_PATH = "./dataset/detection_cache.db"
+
+_weights_hashes = {}
+
+
+def weights_hash(model_path: str) -> str:
+    """模型权重文件的哈希（按路径、大小和修改时间缓存，文件不变时不重复计算）"""
+    if not os.path.isfile(model_path):
+        return f"name:{model_path}"  # 如 yolov8n.pt 这类由ultralytics下载的官方模型
+    stat = os.stat(model_path)
+    signature = (os.path.abspath(model_path), stat.st_size, stat.st_mtime_ns)
+    digest = _weights_hashes.get(signature)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(model_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()[:16]
+        _weights_hashes[signature] = digest
+    return digest
+
+
+def frame_hash(frame: np.ndarray) -> str:
+    """画面像素的哈希（同一画面不管存成png还是jpg路径都一样命中）"""
+    # 只用于内容寻址不涉及安全，sha1在1080×1920的画面上约10ms，比blake2b快
+    sha = hashlib.sha1(str(frame.shape).encode())
+    sha.update(np.ascontiguousarray(frame).data)
+    return sha.hexdigest()
+
+
+def make_params_key(model_path: str, **params) -> str:
+    """模型和推理参数部分的键，推理前算一次即可"""
+    # 从包元数据读取版本，不导入ultralytics（会连带导入torch，要好几秒）
+    try:
+        version = importlib.metadata.version("ultralytics")
+    except importlib.metadata.PackageNotFoundError:
+        version = None
+    params = dict(params, ultralytics=version)
+    return f"{weights_hash(model_path)}|{json.dumps(params, sort_keys=True)}"
+
+
+class DetectionCache:
+    """两级缓存：内存LRU + SQLite"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        memory_items: int = 256,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        打开缓存
+
+        Args:
+            path: SQLite数据库路径，None表示只用内存
+            memory_items: 内存LRU的条目数
+            max_bytes: 磁盘层的大小上限，超出时淘汰最久未使用的条目
+        """
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.db = None
+        self.disk_bytes = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS detections ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, "
+                "last_used REAL NOT NULL)"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS detections_last_used ON detections(last_used)"
+            )
+            self.disk_bytes = self.db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM detections"
+            ).fetchone()[0]
+
+    @staticmethod
+    def key(params_key: str, frame: np.ndarray) -> str:
+        """完整的缓存键"""
+        return hashlib.sha1(f"{params_key}|{frame_hash(frame)}".encode()).hexdigest()
+
+    def get(self, key: str):
+        """
+        查找检测结果
+
+        Returns:
+            np.ndarray: [x1, y1, x2, y2, conf, cls] 数组，未命中时返回None
+        """
+        with self._lock:
+            detections = self._memory.get(key)
+            if detections is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return detections.copy()
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT data FROM detections WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    with self.db:
+                        self.db.execute(
+                            "UPDATE detections SET last_used = ? WHERE key = ?",
+                            (time.time(), key),
+                        )
+                    detections = np.frombuffer(row[0], dtype=np.float32).reshape(-1, 6)
+                    self._remember(key, detections)
+                    self.hits += 1
+                    return detections.copy()
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, detections: np.ndarray):
+        """保存检测结果"""
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+        with self._lock:
+            self._remember(key, detections)
+            if self.db is None:
+                return
+            data = detections.tobytes()
+            with self.db:
+                previous = self.db.execute(
+                    "SELECT size FROM detections WHERE key = ?", (key,)
+                ).fetchone()
+                self.db.execute(
+                    "INSERT OR REPLACE INTO detections (key, data, size, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, data, len(data) + len(key), time.time()),
+                )
+            self.disk_bytes += len(data) + len(key) - (previous[0] if previous else 0)
+            if self.disk_bytes > self.max_bytes:
+                self._evict()
+
+    def _remember(self, key: str, detections: np.ndarray):
+        self._memory[key] = detections
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """淘汰最久未使用的条目，直到降到上限的90%"""
+        target = self.max_bytes * 0.9
+        with self.db:
+            rows = self.db.execute(
+                "SELECT key, size FROM detections ORDER BY last_used"
+            ).fetchall()
+            removed = []
+            for key, size in rows:
+                if self.disk_bytes <= target:
+                    break
+                removed.append((key,))
+                self.disk_bytes -= size
+            self.db.executemany("DELETE FROM detections WHERE key = ?", removed)
+
+    def stats(self) -> dict:
+        """命中率和大小"""
+        total = self.hits + self.misses
+        count = 0
+        if self.db is not None:
+            count = self.db.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory_items": len(self._memory),
+            "disk_items": count,
+            "disk_bytes": self.disk_bytes,
+        }
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._memory.clear()
+            if self.db is not None:
+                with self.db:
+                    self.db.execute("DELETE FROM detections")
+                self.db.execute("VACUUM")
+                self.disk_bytes = 0
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+_default_cache = None
+
+
+def default_cache():
+    """
+    进程内共享的默认缓存，所有工具默认都使用它
+
+    环境变量 JUMP_DETECTION_CACHE 可以指定数据库路径，设为 0 表示关闭缓存
+    """
+    global _default_cache
+    setting = os.environ.get("JUMP_DETECTION_CACHE", DEFAULT_PATH)
+    if setting in ("0", "", "off"):
+        return None
+    if _default_cache is None:
+        _default_cache = DetectionCache(setting)
+    return _default_cache
+
+
+class CachedDetector:
+    """带缓存的检测：模型在第一次未命中时才加载，全部命中时不需要加载模型"""
+
+    def __init__(self, model_path: str, cache: DetectionCache = None, **params):
+        """
+        Args:
+            model_path: 模型文件路径
+            cache: 检测缓存，默认使用 default_cache()
+            **params: 推理参数（conf、iou、imgsz等），不同参数的结果分别缓存
+        """
+        self.model_path = model_path
+        self.params = params
+        self.cache = cache if cache is not None else default_cache()
+        self.params_key = make_params_key(model_path, **params) if self.cache else None
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from ultralytics import YOLO
+
+            self._model = YOLO(self.model_path)
+        return self._model
+
+    @property
+    def names(self) -> dict:
+        """类别名称"""
+        return self.model.names
+
+    def detect_batch(self, frames: list) -> list:
+        """
+        检测一批画面，只对未命中的画面推理
+
+        Returns:
+            list: 每个画面的 [x1, y1, x2, y2, conf, cls] 数组
+        """
+        keys = [None] * len(frames)
+        outputs = [None] * len(frames)
+        if self.cache:
+            keys = [self.cache.key(self.params_key, frame) for frame in frames]
+            outputs = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, output in enumerate(outputs) if output is None]
+        if missing:
+            results = self.model.predict(
+                [frames[i] for i in missing], verbose=False, **self.params
+            )
+            for i, result in zip(missing, results):
+                boxes = result.boxes
+                detections = (
+                    boxes.data.cpu().numpy() if boxes is not None else np.zeros((0, 6))
+                )
+                outputs[i] = detections
+                if self.cache:
+                    self.cache.put(keys[i], detections)
+        return outputs
+
+    def detect(self, frame: np.ndarray) -> np.ndarray:
+        """检测一个画面"""
+        return self.detect_batch([frame])[0]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="检测结果缓存")
+    parser.add_argument("command", choices=["stats", "clear"], help="查看或清空缓存")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="缓存数据库路径")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        print(f"📭 缓存不存在: {args.path}")
+        return
+    cache = DetectionCache(args.path)
+    if args.command == "clear":
+        cache.clear()
+        print("🧹 缓存已清空")
+    else:
+        stats = cache.stats()
+        print(f"🗄️ 缓存: {stats['disk_items']} 条, {stats['disk_bytes'] / 1024 / 1024:.1f}MB")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,28 +6,68 @@
 """
 
 from abc import ABC, abstractmethod
+import json
+import os
+import re
+import shutil
+import struct
 import subprocess
 import time
 from PIL import Image
 
-# Windows相关导入（可选）
-try:
-    import win32gui
-    import win32ui
-    import win32con
-    import win32api
-    from ctypes import windll
-    import mss
-
-    WINDOWS_AVAILABLE = True
-except ImportError:
-    WINDOWS_AVAILABLE = False
-    print("⚠️ Windows相关模块未安装，WindowsDeviceController将不可用")
+from event_log import log
+
+# Windows相关模块（可选），创建WindowsDeviceController时才导入，
+# 使用ADB或只看 --help 时不必为它们付出导入时间
+win32gui = win32ui = win32con = win32api = windll = mss = None
+
+
+def _import_windows_modules() -> bool:
+    """
+    导入Windows相关模块
+
+    Returns:
+        bool: 模块是否可用
+    """
+    global win32gui, win32ui, win32con, win32api, windll, mss
+    if win32gui is not None:
+        return True
+    try:
+        import win32gui
+        import win32ui
+        import win32con
+        import win32api
+        from ctypes import windll
+        import mss
+    except ImportError:
+        return False
+    return True
+
+
+def precise_sleep(seconds: float, spin: float = 0.002):
+    """
+    比 time.sleep 更准的等待：先睡到截止时间前 spin 秒，剩下的忙等
+
+    Windows上 time.sleep 的粒度可达15.6ms，按压时长会随机变长
+
+    Args:
+        seconds: 等待时长，单位秒
+        spin: 最后忙等的时长，单位秒
+    """
+    deadline = time.perf_counter() + seconds
+    if seconds > spin:
+        time.sleep(seconds - spin)
+    while time.perf_counter() < deadline:
+        pass
 
 
 class DeviceController(ABC):
     """设备控制器抽象基类"""
 
+    # 最近一次按压实际的时间（毫秒）：requested_ms、start_delay_ms（调用到按下）、
+    # held_ms（按下到抬起）；控制器无法测量时为None，tap_latency 改用调用耗时估计
+    last_press = None
+
     @abstractmethod
     def screenshot(self, save_path: str = "./screenshot.png") -> bool:
         """
@@ -66,12 +106,29 @@ class DeviceController(ABC):
         """
         pass
 
+    def settle(self, seconds: float) -> None:
+        """
+        等待跳跃动画结束（真实设备上就是睡眠）
+
+        Args:
+            seconds: 等待时长，单位秒
+        """
+        time.sleep(seconds)
+
 
 class AdbDeviceController(DeviceController):
     """ADB设备控制器，用于控制Android手机"""
 
-    def __init__(self):
-        """初始化ADB控制器"""
+    def __init__(self, adb_path: str = "adb", serial: str = None):
+        """
+        初始化ADB控制器
+
+        Args:
+            adb_path: adb可执行文件路径
+            serial: 设备序列号，连接了多台设备时指定
+        """
+        self.serial = serial
+        self.adb = [adb_path] + (["-s", serial] if serial else [])
         self.temp_screenshot_path = "/sdcard/temp_screenshot.png"
 
     def screenshot(self, save_path: str = "./screenshot.png") -> bool:
@@ -87,14 +144,14 @@ class AdbDeviceController(DeviceController):
         try:
             # 截图并传输
             subprocess.run(
-                ["adb", "shell", "screencap", "-p", self.temp_screenshot_path],
+                self.adb + ["shell", "screencap", "-p", self.temp_screenshot_path],
                 check=True,
             )
             subprocess.run(
-                ["adb", "pull", self.temp_screenshot_path, save_path], check=True
+                self.adb + ["pull", self.temp_screenshot_path, save_path], check=True
             )
             subprocess.run(
-                ["adb", "shell", "rm", self.temp_screenshot_path], check=True
+                self.adb + ["shell", "rm", self.temp_screenshot_path], check=True
             )
             return True
         except subprocess.CalledProcessError as e:
@@ -115,8 +172,8 @@ class AdbDeviceController(DeviceController):
         """
         try:
             subprocess.run(
-                [
-                    "adb",
+                self.adb
+                + [
                     "shell",
                     "input",
                     "swipe",
@@ -128,10 +185,16 @@ class AdbDeviceController(DeviceController):
                 ],
                 check=True,
             )
-            print(f"ADB模拟按压位置: ({x}, {y}), 持续时间: {duration_ms}ms")
+            log.debug(
+                "adb_tap",
+                "ADB模拟按压位置: ({x}, {y}), 持续时间: {duration_ms}ms",
+                x=x,
+                y=y,
+                duration_ms=duration_ms,
+            )
             return True
         except subprocess.CalledProcessError as e:
-            print(f"ADB点击失败: {e}")
+            log.error("adb_tap_failed", "ADB点击失败: {error}", error=str(e))
             return False
 
     def get_screen_size(self) -> tuple:
@@ -143,7 +206,7 @@ class AdbDeviceController(DeviceController):
         """
         try:
             result = subprocess.run(
-                ["adb", "shell", "wm", "size"],
+                self.adb + ["shell", "wm", "size"],
                 capture_output=True,
                 text=True,
                 check=True,
@@ -160,6 +223,275 @@ class AdbDeviceController(DeviceController):
             return (1080, 1920)  # 默认尺寸
 
 
+# Linux输入事件常量（linux/input-event-codes.h）
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+SYN_REPORT = 0x00
+BTN_TOUCH = 0x14A
+ABS_CODES = {
+    "ABS_MT_SLOT": 0x2F,
+    "ABS_MT_TOUCH_MAJOR": 0x30,
+    "ABS_MT_POSITION_X": 0x35,
+    "ABS_MT_POSITION_Y": 0x36,
+    "ABS_MT_TRACKING_ID": 0x39,
+    "ABS_MT_PRESSURE": 0x3A,
+}
+# 按下时触摸面积和压力的取值（设备支持这两个轴时才发送）
+TOUCH_VALUES = {"ABS_MT_TOUCH_MAJOR": 5, "ABS_MT_PRESSURE": 50}
+ABS_PATTERN = re.compile(r"(ABS_\w+)\s*:\s*value -?\d+, min (-?\d+), max (-?\d+)")
+
+
+def parse_input_devices(getevent_output: str) -> list:
+    """
+    解析 `getevent -pl` 的输出
+
+    Args:
+        getevent_output: getevent -pl 的输出文本
+
+    Returns:
+        list: 每个设备的 path、name、abs（{轴名: (最小值, 最大值)}）、
+              keys（按键名集合）和 direct（是否触摸屏而不是触摸板）
+    """
+    devices = []
+    device = None
+    for line in getevent_output.splitlines():
+        match = re.match(r"add device \d+: (\S+)", line)
+        if match:
+            device = {
+                "path": match.group(1),
+                "name": "",
+                "abs": {},
+                "keys": set(),
+                "direct": False,
+            }
+            devices.append(device)
+            continue
+        if device is None:
+            continue
+        match = re.search(r'name:\s+"(.*)"', line)
+        if match:
+            device["name"] = match.group(1)
+        match = ABS_PATTERN.search(line)
+        if match:
+            device["abs"][match.group(1)] = (int(match.group(2)), int(match.group(3)))
+        if "BTN_TOUCH" in line:
+            device["keys"].add("BTN_TOUCH")
+        if "INPUT_PROP_DIRECT" in line:
+            device["direct"] = True
+    return devices
+
+
+def find_touchscreen(getevent_output: str) -> dict:
+    """
+    找出多点触摸屏设备（有 ABS_MT_POSITION_X/Y，优先 INPUT_PROP_DIRECT）
+
+    Returns:
+        dict: parse_input_devices 中的一个设备，没有找到时为None
+    """
+    candidates = [
+        device
+        for device in parse_input_devices(getevent_output)
+        if "ABS_MT_POSITION_X" in device["abs"] and "ABS_MT_POSITION_Y" in device["abs"]
+    ]
+    candidates.sort(key=lambda device: not device["direct"])
+    return candidates[0] if candidates else None
+
+
+class AdbTouchDeviceController(AdbDeviceController):
+    """
+    ADB触摸事件控制器：保持一个到触摸屏输入设备的通道，直接写入按下/抬起事件
+
+    `input swipe` 每次都要在手机上启动 app_process，按下时刻晚且不稳定；
+    这里用 `adb exec-in "cat > /dev/input/eventN"` 建立一次通道，
+    按下和抬起之间的时长由主机计时，截图仍使用 AdbDeviceController 的实现
+    """
+
+    def __init__(
+        self,
+        adb_path: str = "adb",
+        serial: str = None,
+        device: str = None,
+        screen_size: tuple = None,
+    ):
+        """
+        初始化并自动查找触摸屏
+
+        Args:
+            adb_path: adb可执行文件路径
+            serial: 设备序列号
+            device: 触摸屏输入设备路径（如/dev/input/event2），默认自动查找
+            screen_size: 屏幕尺寸，默认用 wm size 获取
+        """
+        super().__init__(adb_path, serial)
+        self._screen_size = screen_size
+        self.touchscreen = self._discover(device)
+        # struct input_event：64位用户态的timeval是两个8字节整数，32位是两个4字节整数
+        abi = self._shell("getprop", "ro.product.cpu.abi").strip()
+        self.event_format = "<qqHHi" if "64" in abi else "<llHHi"
+        self.tracking_id = 0
+        self._channel = None
+        # 提前取屏幕尺寸、建立通道，第一次按压不用等adb命令
+        self.get_screen_size()
+        self._open_channel()
+        log.info(
+            "touchscreen_found",
+            "👆 触摸屏: {path} ({name}), X {x_range}, Y {y_range}",
+            path=self.touchscreen["path"],
+            name=self.touchscreen["name"],
+            x_range=self.touchscreen["abs"]["ABS_MT_POSITION_X"],
+            y_range=self.touchscreen["abs"]["ABS_MT_POSITION_Y"],
+        )
+
+    def _shell(self, *args, check: bool = True) -> str:
+        result = subprocess.run(
+            self.adb + ["shell"] + list(args),
+            capture_output=True,
+            text=True,
+            check=check,
+        )
+        return result.stdout
+
+    def _discover(self, path: str = None) -> dict:
+        """用 getevent -pl 查找触摸屏和坐标范围"""
+        output = self._shell("getevent", "-pl")
+        if path:
+            devices = [d for d in parse_input_devices(output) if d["path"] == path]
+            touchscreen = devices[0] if devices else None
+        else:
+            touchscreen = find_touchscreen(output)
+        if touchscreen is None:
+            raise RuntimeError(f"没有找到触摸屏输入设备: {path or 'getevent -pl'}")
+        # shell用户通常在input组里；没有写权限时让调用方改用AdbDeviceController
+        # 旧版adb shell不返回退出码，用输出判断
+        command = f"test -w {touchscreen['path']} && echo writable"
+        if "writable" not in self._shell(command, check=False):
+            raise PermissionError(f"没有写入 {touchscreen['path']} 的权限")
+        return touchscreen
+
+    def _open_channel(self):
+        """启动持续的写入通道（exec-in不分配pty，二进制数据原样传到设备）"""
+        self._channel = subprocess.Popen(
+            self.adb + ["exec-in", f"cat > {self.touchscreen['path']}"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+
+    def _write(self, events: list):
+        """把一组事件一次写入通道，通道断开时重新打开一次"""
+        packet = b"".join(
+            struct.pack(self.event_format, 0, 0, type_, code, value)
+            for type_, code, value in events
+        )
+        for attempt in range(2):
+            if self._channel is None or self._channel.poll() is not None:
+                self._open_channel()
+            try:
+                self._channel.stdin.write(packet)
+                return
+            except (BrokenPipeError, OSError):
+                self._channel = None
+                if attempt:
+                    raise
+
+    def to_device(self, x: int, y: int) -> tuple:
+        """屏幕坐标换算为触摸屏坐标"""
+        width, height = self.get_screen_size()
+        (x_min, x_max) = self.touchscreen["abs"]["ABS_MT_POSITION_X"]
+        (y_min, y_max) = self.touchscreen["abs"]["ABS_MT_POSITION_Y"]
+        device_x = x_min + round(x * (x_max - x_min) / max(width - 1, 1))
+        device_y = y_min + round(y * (y_max - y_min) / max(height - 1, 1))
+        return min(max(device_x, x_min), x_max), min(max(device_y, y_min), y_max)
+
+    def touch_events(self, x: int, y: int, down: bool) -> list:
+        """
+        多点触摸B协议的按下/抬起事件
+
+        Returns:
+            list: [(type, code, value)]
+        """
+        axes = self.touchscreen["abs"]
+        events = []
+        if "ABS_MT_SLOT" in axes:
+            events.append((EV_ABS, ABS_CODES["ABS_MT_SLOT"], 0))
+        if down:
+            self.tracking_id = (self.tracking_id + 1) % 0xFFFF
+            device_x, device_y = self.to_device(x, y)
+            events += [
+                (EV_ABS, ABS_CODES["ABS_MT_TRACKING_ID"], self.tracking_id),
+                (EV_ABS, ABS_CODES["ABS_MT_POSITION_X"], device_x),
+                (EV_ABS, ABS_CODES["ABS_MT_POSITION_Y"], device_y),
+            ]
+            for axis, value in TOUCH_VALUES.items():
+                if axis in axes:
+                    low, high = axes[axis]
+                    events.append((EV_ABS, ABS_CODES[axis], min(max(value, low), high)))
+        else:
+            events.append((EV_ABS, ABS_CODES["ABS_MT_TRACKING_ID"], -1))
+        if "BTN_TOUCH" in self.touchscreen["keys"]:
+            events.append((EV_KEY, BTN_TOUCH, 1 if down else 0))
+        events.append((EV_SYN, SYN_REPORT, 0))
+        return events
+
+    def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
+        """
+        写入按下事件，主机计时 duration_ms 后写入抬起事件
+
+        Args:
+            x: 按压位置的x坐标
+            y: 按压位置的y坐标
+            duration_ms: 按压持续时间，单位毫秒
+
+        Returns:
+            bool: 操作是否成功
+        """
+        call_start = time.perf_counter()
+        try:
+            self._write(self.touch_events(x, y, down=True))
+        except (OSError, subprocess.SubprocessError) as e:
+            # 如没有写输入设备的权限，这一次退回 input swipe，不浪费这一跳
+            log.error(
+                "adb_touch_failed",
+                "ADB触摸事件写入失败，改用input swipe: {error}",
+                error=str(e),
+            )
+            self.last_press = None
+            return super().tap(x, y, duration_ms)
+
+        down = time.perf_counter()
+        precise_sleep(duration_ms / 1000.0)
+        try:
+            self._write(self.touch_events(x, y, down=False))
+        except (OSError, subprocess.SubprocessError) as e:
+            log.error("adb_touch_failed", "ADB抬起事件写入失败: {error}", error=str(e))
+            return False
+        self.last_press = {
+            "requested_ms": duration_ms,
+            "start_delay_ms": (down - call_start) * 1000,
+            "held_ms": (time.perf_counter() - down) * 1000,
+        }
+        log.debug(
+            "adb_touch",
+            "ADB触摸事件按压位置: ({x}, {y}), 持续时间: {duration_ms}ms",
+            x=x,
+            y=y,
+            duration_ms=duration_ms,
+        )
+        return True
+
+    def get_screen_size(self) -> tuple:
+        if self._screen_size is None:
+            self._screen_size = super().get_screen_size()
+        return self._screen_size
+
+    def close(self) -> None:
+        """关闭写入通道"""
+        if self._channel is not None:
+            self._channel.stdin.close()
+            self._channel.wait(timeout=5)
+            self._channel = None
+
+
 class WindowsDeviceController(DeviceController):
     """Windows窗口控制器，用于控制Windows应用窗口"""
 
@@ -170,7 +502,7 @@ class WindowsDeviceController(DeviceController):
         Args:
             window_title: 目标窗口标题
         """
-        if not WINDOWS_AVAILABLE:
+        if not _import_windows_modules():
             raise ImportError(
                 "Windows相关模块未安装，请安装pywin32: pip install pywin32"
             )
@@ -345,8 +677,13 @@ class WindowsDeviceController(DeviceController):
                 print("错误: 无效的客户区尺寸")
                 return False
 
-            print(
-                f"客户区坐标: left={client_left}, top={client_top}, width={client_width}, height={client_height}"
+            log.debug(
+                "windows_client_rect",
+                "客户区坐标: left={left}, top={top}, width={width}, height={height}",
+                left=client_left,
+                top=client_top,
+                width=client_width,
+                height=client_height,
             )
 
             # 使用mss截取客户区
@@ -357,11 +694,14 @@ class WindowsDeviceController(DeviceController):
                 "height": client_height,
             }
 
-            print(f"MSS monitor配置: {monitor}")
-
             # 截图
             screenshot = self.mss_instance.grab(monitor)
-            print(f"MSS截图尺寸: {screenshot.size}")
+            log.debug(
+                "windows_screenshot_grab",
+                "MSS monitor配置: {monitor}, 截图尺寸: {size}",
+                monitor=monitor,
+                size=tuple(screenshot.size),
+            )
 
             # 转换为PIL图像并保存
             img = Image.frombytes(
@@ -369,12 +709,16 @@ class WindowsDeviceController(DeviceController):
             )
             img.save(save_path)
 
-            print(f"Windows窗口截图已保存 (MSS): {save_path}")
+            log.debug(
+                "windows_screenshot_saved",
+                "Windows窗口截图已保存 (MSS): {path}",
+                path=save_path,
+            )
 
             return True
 
         except Exception as e:
-            print(f"Windows截图失败: {e}")
+            log.error("windows_screenshot_failed", "Windows截图失败: {error}", error=str(e))
             return False
 
     def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
@@ -398,6 +742,7 @@ class WindowsDeviceController(DeviceController):
             print("警告: 无法激活窗口，点击可能不准确")
 
         try:
+            call_start = time.perf_counter()
             # 将窗口坐标转换为屏幕坐标
             left, top, _, _ = win32gui.GetWindowRect(self.hwnd)
             screen_x = left + x
@@ -413,21 +758,33 @@ class WindowsDeviceController(DeviceController):
             win32api.mouse_event(
                 win32con.MOUSEEVENTF_LEFTDOWN, screen_x, screen_y, 0, 0
             )
+            down = time.perf_counter()
 
             # 等待指定时间
-            time.sleep(duration_ms / 1000.0)
+            precise_sleep(duration_ms / 1000.0)
 
             # 模拟鼠标释放
             win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, screen_x, screen_y, 0, 0)
+            self.last_press = {
+                "requested_ms": duration_ms,
+                "start_delay_ms": (down - call_start) * 1000,
+                "held_ms": (time.perf_counter() - down) * 1000,
+            }
 
             # 恢复鼠标位置
             win32api.SetCursorPos(original_pos)
 
-            print(f"Windows模拟点击位置: ({x}, {y}), 持续时间: {duration_ms}ms")
+            log.debug(
+                "windows_tap",
+                "Windows模拟点击位置: ({x}, {y}), 持续时间: {duration_ms}ms",
+                x=x,
+                y=y,
+                duration_ms=duration_ms,
+            )
             return True
 
         except Exception as e:
-            print(f"Windows点击失败: {e}")
+            log.error("windows_tap_failed", "Windows点击失败: {error}", error=str(e))
             return False
 
     def get_screen_size(self) -> tuple:
@@ -450,3 +807,183 @@ class WindowsDeviceController(DeviceController):
         except Exception as e:
             print(f"获取窗口尺寸失败: {e}")
             return (800, 600)  # 默认尺寸
+
+
+class ReplayDeviceController(DeviceController):
+    """回放控制器，从目录或录制的会话中读取帧，只记录点击不真正发送"""
+
+    SESSION_FILE = "session.jsonl"
+    IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+    def __init__(self, source: str, loop: bool = False, screen_size: tuple = None):
+        """
+        初始化回放控制器
+
+        Args:
+            source: 图片目录，或包含session.jsonl的录制会话目录
+            loop: 帧用完后是否从头循环
+            screen_size: 屏幕尺寸，默认取第一帧的尺寸
+        """
+        self.source = source
+        self.loop = loop
+        self.frames = self._load_frames(source)
+        if not self.frames:
+            raise ValueError(f"回放源中没有可用的帧: {source}")
+
+        self.index = 0
+        self.current_frame = None
+        self.taps = []
+        self.settled_seconds = 0.0
+        self._screen_size = screen_size
+
+    def _load_frames(self, source: str) -> list:
+        """读取帧列表，优先使用录制会话的清单"""
+        session_file = os.path.join(source, self.SESSION_FILE)
+        if os.path.exists(session_file):
+            frames = []
+            with open(session_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if event.get("type") == "frame":
+                        frames.append(os.path.join(source, event["file"]))
+            return frames
+
+        return sorted(
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.lower().endswith(self.IMAGE_EXTENSIONS)
+        )
+
+    @property
+    def exhausted(self) -> bool:
+        """是否所有帧都已回放完毕"""
+        return not self.loop and self.index >= len(self.frames)
+
+    def screenshot(self, save_path: str = "./screenshot.png") -> bool:
+        """
+        将下一帧复制到截图路径
+
+        Args:
+            save_path: 截图保存路径
+
+        Returns:
+            bool: 是否还有帧可用
+        """
+        if self.exhausted:
+            return False
+
+        self.current_frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        shutil.copyfile(self.current_frame, save_path)
+        return True
+
+    def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
+        """
+        记录点击操作
+
+        Args:
+            x: 点击位置的x坐标
+            y: 点击位置的y坐标
+            duration_ms: 按压持续时间，单位毫秒
+
+        Returns:
+            bool: 总是成功
+        """
+        self.taps.append(
+            {
+                "frame": self.current_frame,
+                "x": x,
+                "y": y,
+                "duration_ms": duration_ms,
+            }
+        )
+        return True
+
+    def get_screen_size(self) -> tuple:
+        """
+        获取回放帧的尺寸
+
+        Returns:
+            tuple: (width, height)
+        """
+        if self._screen_size is None:
+            with Image.open(self.frames[0]) as img:
+                self._screen_size = img.size
+        return self._screen_size
+
+    def settle(self, seconds: float) -> None:
+        """回放时不等待，只累计本应等待的时长"""
+        self.settled_seconds += seconds
+
+
+class RecordingDeviceController(DeviceController):
+    """录制控制器，包装真实控制器并把每一帧和点击写入会话目录"""
+
+    def __init__(self, controller: DeviceController, session_dir: str):
+        """
+        初始化录制控制器
+
+        Args:
+            controller: 被包装的真实设备控制器
+            session_dir: 会话保存目录
+        """
+        self.controller = controller
+        self.session_dir = session_dir
+        os.makedirs(session_dir, exist_ok=True)
+        session_path = os.path.join(session_dir, ReplayDeviceController.SESSION_FILE)
+        # 继续录制已有会话时接着原有帧编号，不覆盖之前的帧
+        self.frame_count = self._count_frames(session_path)
+        self._session_file = open(session_path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _count_frames(session_path: str) -> int:
+        """已有会话清单中的帧数"""
+        if not os.path.exists(session_path):
+            return 0
+        count = 0
+        with open(session_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip() and json.loads(line).get("type") == "frame":
+                    count += 1
+        return count
+
+    def _record(self, event: dict) -> None:
+        event["t"] = time.time()
+        self._session_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._session_file.flush()
+
+    def screenshot(self, save_path: str = "./screenshot.png") -> bool:
+        if not self.controller.screenshot(save_path):
+            return False
+
+        self.frame_count += 1
+        ext = os.path.splitext(save_path)[1] or ".png"
+        frame_name = f"frame_{self.frame_count:06d}{ext}"
+        shutil.copyfile(save_path, os.path.join(self.session_dir, frame_name))
+        self._record({"type": "frame", "file": frame_name})
+        return True
+
+    def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
+        success = self.controller.tap(x, y, duration_ms)
+        self._record(
+            {
+                "type": "tap",
+                "x": x,
+                "y": y,
+                "duration_ms": duration_ms,
+                "success": success,
+            }
+        )
+        return success
+
+    def get_screen_size(self) -> tuple:
+        return self.controller.get_screen_size()
+
+    def settle(self, seconds: float) -> None:
+        self.controller.settle(seconds)
+
+    def close(self) -> None:
+        """关闭会话文件"""
+        self._session_file.close()
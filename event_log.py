@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结构化异步事件日志
+热路径上只把 (时间, 级别, 事件名, 模板, 字段) 追加到内存环形缓冲区，
+格式化、打印到控制台和写JSONL文件都在后台线程完成；
+低于当前级别的事件在调用处直接返回，几乎没有开销
+
+控制台输出由后台线程写出，会比同一进程里直接 print() 的内容晚最多一个刷新间隔；
+需要和 print() 保持先后顺序时，先调用 log.flush()
+"""
+
+import atexit
+import collections
+import json
+import os
+import sys
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+
+def _to_json(value):
+    """JSON序列化numpy等类型"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class EventLog:
+    """结构化事件日志"""
+
+    def __init__(
+        self,
+        path: str = None,
+        level: int = INFO,
+        console_level: int = INFO,
+        capacity: int = 10000,
+        flush_interval: float = 0.2,
+    ):
+        """
+        初始化事件日志
+
+        Args:
+            path: JSONL输出文件，None表示不写文件
+            level: 记录的最低级别
+            console_level: 打印到控制台的最低级别
+            capacity: 环形缓冲区容量，写不过来时丢弃最旧的事件
+            flush_interval: 后台线程的刷新间隔（秒）
+        """
+        self.level = level
+        self.console_level = console_level
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._buffer = collections.deque(maxlen=capacity)
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enabled(self, level: int) -> bool:
+        """某级别是否会被记录，用于包住需要额外计算的日志"""
+        return level >= self.level
+
+    def log(self, level: int, event: str, template: str = "", **fields):
+        """
+        记录一个事件，template用 {字段名} 引用字段，在后台线程中才格式化
+
+        Args:
+            level: 级别
+            event: 事件名，便于在JSONL中筛选
+            template: 控制台显示的消息模板
+            **fields: 结构化字段
+        """
+        if level < self.level:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((time.time(), level, event, template, fields))
+
+    def debug(self, event: str, template: str = "", **fields):
+        if DEBUG >= self.level:
+            self.log(DEBUG, event, template, **fields)
+
+    def info(self, event: str, template: str = "", **fields):
+        if INFO >= self.level:
+            self.log(INFO, event, template, **fields)
+
+    def warning(self, event: str, template: str = "", **fields):
+        if WARNING >= self.level:
+            self.log(WARNING, event, template, **fields)
+
+    def error(self, event: str, template: str = "", **fields):
+        if ERROR >= self.level:
+            self.log(ERROR, event, template, **fields)
+
+    def _drain(self):
+        """取出缓冲区中的所有事件并输出"""
+        with self._io_lock:
+            self._drain_locked()
+
+    def _drain_locked(self, limit: int = None):
+        """输出缓冲区中的事件，最多limit条（None表示直到缓冲区为空）"""
+        lines = []
+        console = []
+        count = 0
+        while self._buffer and (limit is None or count < limit):
+            count += 1
+            try:
+                timestamp, level, event, template, fields = self._buffer.popleft()
+            except IndexError:
+                break
+            try:
+                message = template.format(**fields) if fields else template
+            except (KeyError, IndexError, ValueError):
+                message = template
+            if level >= self.console_level and message:
+                console.append(message)
+            if self._file:
+                record = {
+                    "t": round(timestamp, 6),
+                    "level": LEVEL_NAMES.get(level, str(level)),
+                    "event": event,
+                    "msg": message,
+                }
+                record.update(fields)
+                lines.append(json.dumps(record, ensure_ascii=False, default=_to_json))
+
+        if console:
+            sys.stdout.write("\n".join(console) + "\n")
+            sys.stdout.flush()
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+
+    def flush(self):
+        """
+        在调用线程中输出缓冲区里的全部事件，返回时调用之前记录的事件都已写出
+
+        后台线程正在输出时先等它写完（输出锁），输出期间新追加的事件也一并写出
+        """
+        with self._io_lock:
+            while self._buffer:
+                self._drain_locked()
+
+    def close(self):
+        """输出剩余事件并关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=2.0)
+        self._drain()
+        with self._io_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+# 进程内共享的默认日志，级别可以用环境变量 JUMP_LOG_LEVEL 设置，
+# 设置 JUMP_LOG_FILE 时所有工具都同时写出JSONL日志
+log = EventLog(
+    path=os.environ.get("JUMP_LOG_FILE") or None,
+    level=LEVELS.get(os.environ.get("JUMP_LOG_LEVEL", "INFO").upper(), INFO),
+)
+
+
+def configure(path: str = None, level: str = "INFO", console_level: str = "INFO") -> EventLog:
+    """
+    重新配置默认日志
+
+    Args:
+        path: JSONL输出文件
+        level: 记录的最低级别名
+        console_level: 打印到控制台的最低级别名
+
+    Returns:
+        EventLog: 默认日志
+    """
+    log.flush()
+    with log._io_lock:
+        if log._file:
+            log._file.close()
+        log._file = open(path, "a", encoding="utf-8") if path else None
+    log.level = LEVELS[level.upper()]
+    log.console_level = LEVELS[console_level.upper()]
+    return log
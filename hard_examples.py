@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+难例挖掘队列
+收集识别失败（未检测到玩家/平台、没有有效目标）和疑似跳失败的帧，
+按画面指纹去重，在磁盘上维护一个按优先级排序、有容量上限的待标注队列，
+并导出为labelimg和dataset_split.py使用的目录结构
+"""
+
+import argparse
+import json
+import math
+import os
+import queue
+import shutil
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# 各失败原因的基础优先级，越大越先标注
+REASON_PRIORITY = {
+    "jump_failed": 5.0,
+    "no_player": 4.0,
+    "no_valid_target": 3.0,
+    "no_platform": 3.0,
+    "too_close": 2.0,
+    "no_detections": 1.0,
+}
+
+CLASS_NAMES = ["cube", "humen"]
+
+
+def frame_hash(image: np.ndarray, hash_size: int = 16) -> int:
+    """
+    差值哈希（dHash），相似画面的哈希汉明距离小
+
+    游戏画面大部分是相近的纯色背景，用16×16=256位而不是常见的64位，
+    避免不同局面被误判为重复
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(sum(1 << i for i, bit in enumerate(bits) if bit))
+
+
+def hamming(a: int, b: int) -> int:
+    """汉明距离"""
+    return bin(a ^ b).count("1")
+
+
+class HardExampleMiner:
+    """磁盘上的难例队列，写盘在后台线程完成，不阻塞跳跃循环"""
+
+    def __init__(
+        self,
+        root: str = "./dataset/hard_examples",
+        max_items: int = 2000,
+        dedup_distance: int = 10,
+    ):
+        """
+        初始化难例队列
+
+        Args:
+            root: 队列目录
+            max_items: 最多保留的样本数，超出时淘汰优先级最低的
+            dedup_distance: 画面哈希汉明距离不超过该值视为重复
+        """
+        self.root = root
+        self.items_dir = os.path.join(root, "items")
+        self.index_path = os.path.join(root, "index.json")
+        self.max_items = max_items
+        self.dedup_distance = dedup_distance
+        os.makedirs(self.items_dir, exist_ok=True)
+
+        self.items = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.items = {item["id"]: item for item in json.load(f)}
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=64)
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def add(self, image_path: str, detections, reason: str) -> bool:
+        """
+        提交一帧图片文件（立即读入内存，截图文件随后可以被覆盖）
+
+        Returns:
+            bool: 是否成功入队，后台繁忙时丢弃
+        """
+        try:
+            with open(image_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+        return self.add_bytes(data, detections, reason)
+
+    def add_bytes(self, data: bytes, detections, reason: str) -> bool:
+        """提交已编码的图片数据"""
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+        try:
+            self._queue.put_nowait((data, detections, reason, time.time()))
+            return True
+        except queue.Full:
+            return False
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                self._store(*task)
+            except Exception as e:
+                print(f"⚠️ 难例保存失败: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """等待后台写盘完成"""
+        self._queue.join()
+
+    def _store(self, data: bytes, detections: np.ndarray, reason: str, timestamp: float):
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return
+        fingerprint = frame_hash(image)
+
+        with self._lock:
+            # 重复画面只累加命中次数，保留更高优先级的原因
+            for item in self.items.values():
+                if hamming(item["hash"], fingerprint) <= self.dedup_distance:
+                    item["hits"] += 1
+                    item["last_seen"] = timestamp
+                    if REASON_PRIORITY.get(reason, 0) > REASON_PRIORITY.get(item["reason"], 0):
+                        item["reason"] = reason
+                    item["priority"] = self._priority(item)
+                    self._save_index()
+                    return
+
+            item_id = f"{int(timestamp * 1000)}_{fingerprint & 0xFFFF:04x}"
+            cv2.imwrite(os.path.join(self.items_dir, f"{item_id}.png"), image)
+            item = {
+                "id": item_id,
+                "reason": reason,
+                "hash": fingerprint,
+                "hits": 1,
+                "first_seen": timestamp,
+                "last_seen": timestamp,
+                "size": [image.shape[1], image.shape[0]],
+                "detections": detections.round(2).tolist(),
+            }
+            item["priority"] = self._priority(item)
+            self.items[item_id] = item
+            self._evict()
+            self._save_index()
+
+    @staticmethod
+    def _priority(item: dict) -> float:
+        """优先级 = 原因基础分 + 命中次数的对数 + 检测置信度越低加分越多"""
+        detections = item["detections"]
+        max_conf = max((d[4] for d in detections), default=0.0)
+        return round(
+            REASON_PRIORITY.get(item["reason"], 1.0)
+            + math.log1p(item["hits"] - 1)
+            + (1.0 - max_conf),
+            4,
+        )
+
+    def _evict(self):
+        while len(self.items) > self.max_items:
+            worst = min(self.items.values(), key=lambda i: (i["priority"], i["last_seen"]))
+            self._remove(worst["id"])
+
+    def _remove(self, item_id: str):
+        self.items.pop(item_id, None)
+        path = os.path.join(self.items_dir, f"{item_id}.png")
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self.items.values()), f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def ranked(self) -> list:
+        """按优先级从高到低排列的样本"""
+        with self._lock:
+            return sorted(self.items.values(), key=lambda i: -i["priority"])
+
+    def export(
+        self,
+        images_folder: str = "./dataset/screenshot_dataset/",
+        labels_folder: str = "./dataset/yolo_label/",
+        limit: int = None,
+        remove: bool = True,
+    ) -> int:
+        """
+        导出优先级最高的样本用于标注
+
+        图片写入images_folder，模型检测结果作为YOLO格式的预标注写入labels_folder，
+        标注修正后可以直接用dataset_split.py划分
+
+        Args:
+            images_folder: 图片目录
+            labels_folder: 标注目录
+            limit: 最多导出的数量
+            remove: 导出后是否从队列中移除
+
+        Returns:
+            int: 导出数量
+        """
+        self.flush()
+        os.makedirs(images_folder, exist_ok=True)
+        os.makedirs(labels_folder, exist_ok=True)
+
+        classes_path = os.path.join(labels_folder, "classes.txt")
+        if not os.path.exists(classes_path):
+            with open(classes_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(CLASS_NAMES) + "\n")
+
+        items = self.ranked()[:limit] if limit else self.ranked()
+        for item in items:
+            name = f"hard_{item['reason']}_{item['id']}"
+            src = os.path.join(self.items_dir, f"{item['id']}.png")
+            dst = os.path.join(images_folder, f"{name}.png")
+            if remove:
+                os.replace(src, dst)
+            else:
+                shutil.copyfile(src, dst)
+
+            width, height = item["size"]
+            with open(os.path.join(labels_folder, f"{name}.txt"), "w") as f:
+                for x1, y1, x2, y2, _, cls in item["detections"]:
+                    f.write(
+                        f"{int(cls)} {(x1 + x2) / 2 / width:.6f} {(y1 + y2) / 2 / height:.6f} "
+                        f"{(x2 - x1) / width:.6f} {(y2 - y1) / height:.6f}\n"
+                    )
+
+        if remove:
+            with self._lock:
+                for item in items:
+                    self.items.pop(item["id"], None)
+                self._save_index()
+        return len(items)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="跳一跳难例队列")
+    parser.add_argument("command", choices=["list", "export"], help="查看队列或导出")
+    parser.add_argument("--root", default="./dataset/hard_examples", help="队列目录")
+    parser.add_argument("--limit", type=int, help="最多显示/导出的数量")
+    parser.add_argument("--images", default="./dataset/screenshot_dataset/", help="导出图片目录")
+    parser.add_argument("--labels", default="./dataset/yolo_label/", help="导出标注目录")
+    parser.add_argument("--keep", action="store_true", help="导出后保留在队列中")
+
+    args = parser.parse_args()
+    miner = HardExampleMiner(args.root)
+
+    if args.command == "list":
+        items = miner.ranked()
+        print(f"📥 队列中共 {len(items)} 个难例")
+        for item in items[: args.limit or 20]:
+            print(
+                f"   {item['id']}  优先级={item['priority']:.2f}  原因={item['reason']}  "
+                f"命中={item['hits']}  检测数={len(item['detections'])}"
+            )
+    else:
+        count = miner.export(args.images, args.labels, args.limit, remove=not args.keep)
+        print(f"📤 已导出 {count} 个难例到 {args.images}")
+        print("💡 用labelimg修正预标注后运行 python dataset_split.py 划分数据集")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统一命令行入口
+jump <子命令> [参数]，子命令对应的模块在选中时才导入，ultralytics/torch只在真正加载模型时导入；
+每个子命令有启动时间预算，jump startup 逐个测量 `jump <子命令> --help` 的耗时，
+超出预算时用 -X importtime 找出最慢的导入
+"""
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+# 子命令: (模块, 说明, 启动时间预算秒)
+COMMANDS = {
+    "run": ("main", "自动跳跃", 1.0),
+    "debug": ("debug_jump", "调试模式（显示检测框）", 1.0),
+    "analyze": ("analyze_screenshot", "分析截图（单张或整个目录）", 1.0),
+    "capture": ("simple_screenshot", "定时截图收集数据", 0.5),
+    "split": ("dataset_split", "划分训练/验证/测试集", 0.5),
+    "label": ("converttoyolo", "VOC标注转换为YOLO格式", 0.5),
+    "train": ("train_yolo", "训练模型", 1.0),
+    "bench": ("benchmark", "性能基准测试", 1.0),
+    "taps": ("tap_latency", "测量按压注入延迟并生成补偿", 0.5),
+    "regress": ("decision_regression", "决策回归测试（与基准对比）", 1.0),
+    "worker": ("warm_worker", "常驻推理进程（保持模型加载）", 0.5),
+}
+
+
+def run_command(name: str, argv: list):
+    """导入子命令对应的模块并以给定参数调用它的 main()"""
+    module_name = COMMANDS[name][0]
+    module = importlib.import_module(module_name)
+    sys.argv = [f"jump {name}"] + list(argv)
+    return module.main()
+
+
+def measure_startup(name: str, repeat: int = 3) -> float:
+    """
+    `jump <子命令> --help` 多次运行中最快的一次耗时（秒）
+
+    Raises:
+        subprocess.CalledProcessError: 子命令运行失败（stderr中有错误信息）
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), name, "--help"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=True,
+        )
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def slowest_imports(name: str, top: int = 5) -> list:
+    """
+    用 -X importtime 找出子命令启动时最慢的顶层导入
+
+    Returns:
+        list: [(模块名, 累计耗时秒)]，按耗时降序
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), name, "--help"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:") :].split("|")
+        if package.startswith("  "):
+            continue  # 只看顶层导入，嵌套导入已算在累计耗时里
+        imports.append((package.strip(), int(cumulative) / 1e6))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+
+
+def check_startup(names: list = None, repeat: int = 3) -> bool:
+    """
+    测量各子命令的启动时间并与预算比较，运行失败的子命令记为未通过，继续测量其余子命令
+
+    Returns:
+        bool: 是否全部在预算以内
+    """
+    ok = True
+    for name in names or COMMANDS:
+        budget = COMMANDS[name][2]
+        try:
+            elapsed = measure_startup(name, repeat)
+        except subprocess.CalledProcessError as e:
+            ok = False
+            lines = (e.stderr or "").strip().splitlines()
+            error = lines[-1] if lines else f"退出码 {e.returncode}"
+            print(f"❌ {name:<8} 运行失败: {error}")
+            continue
+        within = elapsed <= budget
+        ok = ok and within
+        print(
+            f"{'✅' if within else '❌'} {name:<8} {elapsed * 1000:7.0f}ms "
+            f"(预算 {budget * 1000:.0f}ms)"
+        )
+        if not within:
+            for package, seconds in slowest_imports(name):
+                print(f"     {package:<30} {seconds * 1000:7.0f}ms")
+    return ok
+
+
+def main(argv: list = None):
+    """主函数"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return run_command(argv[0], argv[1:])
+
+    parser = argparse.ArgumentParser(
+        prog="jump",
+        description="跳一跳工具集",
+        epilog="jump <子命令> --help 查看子命令的参数",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="<子命令>")
+    for name, (_, help, _) in COMMANDS.items():
+        subparsers.add_parser(name, help=help, add_help=False)
+    startup = subparsers.add_parser("startup", help="测量各子命令的启动时间")
+    startup.add_argument("names", nargs="*", help="要测量的子命令，默认全部")
+    startup.add_argument("--repeat", type=int, default=3, help="每个子命令运行次数")
+    args = parser.parse_args(argv)
+
+    if args.command == "startup":
+        unknown = [name for name in args.names if name not in COMMANDS]
+        if unknown:
+            parser.error(f"未知子命令: {', '.join(unknown)}")
+        if not check_startup(args.names, args.repeat):
+            sys.exit(1)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
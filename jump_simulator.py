@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跳一跳模拟器
+程序化渲染棋盘、平台和棋子，把按压时长换算成跳跃距离并判定落点，
+以DeviceController的形式接入Jump，用于无设备的端到端吞吐测试
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from device_controller import DeviceController
+
+# 平台延伸方向（等轴视角下的右上和左上）
+DIRECTIONS = ((math.cos(math.pi / 6), -0.5), (-math.cos(math.pi / 6), -0.5))
+
+PLATFORM_SHAPES = ("box", "cylinder")
+
+PLAYER_COLOR = (97, 56, 54)  # BGR，深紫色棋子
+
+
+def random_color(rng: random.Random, low: int = 90, high: int = 250) -> tuple:
+    """生成随机BGR颜色"""
+    return tuple(rng.randint(low, high) for _ in range(3))
+
+
+def shade(color: tuple, factor: float) -> tuple:
+    """按比例调暗颜色，用于平台侧面"""
+    return tuple(int(c * factor) for c in color)
+
+
+def make_platform(
+    rng: random.Random, cx: float, cy: float, width: int, scale: float = 1.0
+) -> dict:
+    """
+    生成一个随机平台
+
+    Args:
+        rng: 随机数生成器
+        cx: 顶面中心x坐标
+        cy: 顶面中心y坐标
+        width: 屏幕宽度，用于确定平台尺寸
+        scale: 额外的尺寸缩放
+
+    Returns:
+        dict: 平台描述（中心、半宽、半高、侧面高度、形状、颜色）
+    """
+    half_width = rng.uniform(0.09, 0.16) * width * scale
+    return {
+        "cx": cx,
+        "cy": cy,
+        "a": half_width,
+        "b": half_width * rng.uniform(0.52, 0.62),
+        "h": half_width * rng.uniform(0.45, 0.75),
+        "shape": rng.choice(PLATFORM_SHAPES),
+        "color": random_color(rng),
+    }
+
+
+def platform_bbox(platform: dict) -> tuple:
+    """平台的外接矩形 (x1, y1, x2, y2)，包含顶面和侧面"""
+    return (
+        platform["cx"] - platform["a"],
+        platform["cy"] - platform["b"],
+        platform["cx"] + platform["a"],
+        platform["cy"] + platform["b"] + platform["h"],
+    )
+
+
+def on_platform(platform: dict, x: float, y: float, margin: float = 1.0) -> bool:
+    """判断点是否落在平台顶面内"""
+    dx = abs(x - platform["cx"]) / platform["a"]
+    dy = abs(y - platform["cy"]) / platform["b"]
+    if platform["shape"] == "cylinder":
+        return dx * dx + dy * dy <= margin * margin
+    return dx + dy <= margin
+
+
+def player_size(width: int, scale: float = 1.0) -> tuple:
+    """棋子尺寸 (宽, 高)"""
+    return (0.075 * width * scale, 0.19 * width * scale)
+
+
+def player_bbox(x: float, y: float, width: int, scale: float = 1.0) -> tuple:
+    """棋子的外接矩形 (x1, y1, x2, y2)，(x, y) 为棋子脚底中心"""
+    w, h = player_size(width, scale)
+    return (x - w / 2, y - h, x + w / 2, y + w * 0.12)
+
+
+def draw_background(
+    image: np.ndarray, top_color: tuple, bottom_color: tuple
+) -> np.ndarray:
+    """绘制竖直渐变背景"""
+    height = image.shape[0]
+    ratio = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    top = np.asarray(top_color, dtype=np.float32)[None, :]
+    bottom = np.asarray(bottom_color, dtype=np.float32)[None, :]
+    image[:] = (top * (1 - ratio) + bottom * ratio).astype(np.uint8)[:, None, :]
+    return image
+
+
+def draw_platform(image: np.ndarray, platform: dict):
+    """绘制平台（顶面+侧面）"""
+    cx, cy = platform["cx"], platform["cy"]
+    a, b, h = platform["a"], platform["b"], platform["h"]
+    color = platform["color"]
+
+    if platform["shape"] == "cylinder":
+        center = (int(cx), int(cy + h))
+        axes = (int(a), int(b))
+        cv2.ellipse(image, center, axes, 0, 0, 180, shade(color, 0.7), -1)
+        cv2.rectangle(
+            image, (int(cx - a), int(cy)), (int(cx + a), int(cy + h)), shade(color, 0.7), -1
+        )
+        cv2.ellipse(image, (int(cx), int(cy)), axes, 0, 0, 360, color, -1)
+        return
+
+    top = np.array([[cx, cy - b], [cx + a, cy], [cx, cy + b], [cx - a, cy]])
+    left = np.array([[cx - a, cy], [cx, cy + b], [cx, cy + b + h], [cx - a, cy + h]])
+    right = np.array([[cx, cy + b], [cx + a, cy], [cx + a, cy + h], [cx, cy + b + h]])
+    cv2.fillPoly(image, [left.astype(np.int32)], shade(color, 0.75))
+    cv2.fillPoly(image, [right.astype(np.int32)], shade(color, 0.6))
+    cv2.fillPoly(image, [top.astype(np.int32)], color)
+
+
+def draw_player(image: np.ndarray, x: float, y: float, width: int, scale: float = 1.0):
+    """绘制棋子，(x, y) 为脚底中心"""
+    w, h = player_size(width, scale)
+    head_r = w * 0.36
+    cv2.ellipse(
+        image, (int(x), int(y)), (int(w / 2), int(w * 0.12)), 0, 0, 360, PLAYER_COLOR, -1
+    )
+    body = np.array(
+        [
+            [x - w / 2, y],
+            [x + w / 2, y],
+            [x + w * 0.22, y - h + head_r * 2.4],
+            [x - w * 0.22, y - h + head_r * 2.4],
+        ]
+    )
+    cv2.fillPoly(image, [body.astype(np.int32)], PLAYER_COLOR)
+    cv2.circle(image, (int(x), int(y - h + head_r)), int(head_r), PLAYER_COLOR, -1)
+
+
+class JumpSimulator(DeviceController):
+    """跳一跳模拟器，按DeviceController接口提供截图和按压"""
+
+    def __init__(
+        self,
+        width: int = 1080,
+        height: int = 1920,
+        seed: int = 0,
+        k_true: float = 1.61,
+        press_noise_ms: float = 0.0,
+        auto_restart: bool = True,
+    ):
+        """
+        初始化模拟器
+
+        Args:
+            width: 渲染宽度
+            height: 渲染高度
+            seed: 随机种子，相同种子生成相同的棋盘
+            k_true: 真实跳跃系数，按压时长(ms) = 距离(px) × k_true
+            press_noise_ms: 按压时长的高斯噪声标准差，模拟注入抖动
+            auto_restart: 游戏结束后下一次截图是否自动开始新游戏
+        """
+        self.width = width
+        self.height = height
+        self.k_true = k_true
+        self.press_noise_ms = press_noise_ms
+        self.auto_restart = auto_restart
+        self.rng = random.Random(seed)
+
+        self.clock = 0.0  # 模拟时间，单位秒
+        self.games = 0
+        self.total_jumps = 0
+        self.successes = 0
+        self.best_score = 0
+        self.history = []
+        self.last_result = None
+        self._new_game()
+
+    def _new_game(self):
+        """开始新游戏"""
+        self.games += 1
+        self.score = 0
+        self.game_over = False
+        self.background = (random_color(self.rng, 180, 245), random_color(self.rng, 150, 230))
+
+        first = make_platform(self.rng, self.width * 0.3, self.height * 0.65, self.width)
+        self.platforms = [first]
+        self.player = [first["cx"], first["cy"]]
+        self._spawn_next()
+
+    def _spawn_next(self):
+        """在当前平台前方生成下一个平台，并移动镜头"""
+        current = self.platforms[-1]
+        dx, dy = self.rng.choice(DIRECTIONS)
+        distance = self.rng.uniform(0.28, 0.5) * self.width
+        target = make_platform(
+            self.rng, current["cx"] + dx * distance, current["cy"] + dy * distance, self.width
+        )
+        self.platforms.append(target)
+        self.platforms = self.platforms[-3:]
+
+        # 镜头跟随：当前平台和目标平台的中点移到屏幕固定位置
+        shift_x = self.width * 0.5 - (current["cx"] + target["cx"]) / 2
+        shift_y = self.height * 0.55 - (current["cy"] + target["cy"]) / 2
+        for platform in self.platforms:
+            platform["cx"] += shift_x
+            platform["cy"] += shift_y
+        self.player[0] += shift_x
+        self.player[1] += shift_y
+
+    @property
+    def target(self) -> dict:
+        """下一个目标平台"""
+        return self.platforms[-1]
+
+    @property
+    def current(self) -> dict:
+        """棋子当前站立的平台"""
+        return self.platforms[-2]
+
+    def render(self) -> np.ndarray:
+        """渲染当前画面，返回BGR图像"""
+        image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        draw_background(image, *self.background)
+        for platform in sorted(self.platforms, key=lambda p: p["cy"]):
+            draw_platform(image, platform)
+        draw_player(image, self.player[0], self.player[1], self.width)
+        if self.game_over:
+            cv2.putText(
+                image,
+                "GAME OVER",
+                (int(self.width * 0.22), int(self.height * 0.3)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                self.width / 400,
+                (255, 255, 255),
+                4,
+            )
+        return image
+
+    def ground_truth(self) -> dict:
+        """
+        当前画面的真实标注
+
+        Returns:
+            dict: 棋子位置和外接框、各平台外接框、目标平台、到目标的真实距离和得分
+        """
+        target = self.target
+        return {
+            "player": tuple(self.player),
+            "player_bbox": player_bbox(self.player[0], self.player[1], self.width),
+            "platforms": [platform_bbox(p) for p in self.platforms],
+            "target_center": (target["cx"], target["cy"]),
+            "target_bbox": platform_bbox(target),
+            "distance": math.hypot(
+                target["cx"] - self.player[0], target["cy"] - self.player[1]
+            ),
+            "score": self.score,
+            "game_over": self.game_over,
+        }
+
+    def screenshot(self, save_path: str = "./screenshot.png") -> bool:
+        """
+        渲染当前画面并保存
+
+        Args:
+            save_path: 截图保存路径
+
+        Returns:
+            bool: 截图是否成功
+        """
+        if self.game_over and self.auto_restart:
+            self._new_game()
+        return bool(
+            cv2.imwrite(save_path, self.render(), [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        )
+
+    def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
+        """
+        按压：按时长换算跳跃距离，沿棋子到目标平台中心的方向跳跃并判定落点
+
+        Args:
+            x: 按压位置的x坐标（模拟器中不影响结果）
+            y: 按压位置的y坐标（模拟器中不影响结果）
+            duration_ms: 按压持续时间，单位毫秒
+
+        Returns:
+            bool: 操作是否成功（游戏结束后的按压返回False）
+        """
+        if self.game_over:
+            return False
+
+        held_ms = max(0.0, duration_ms + self.rng.gauss(0, self.press_noise_ms))
+        self.clock += held_ms / 1000
+        jump_distance = held_ms / self.k_true
+
+        target = self.target
+        px, py = self.player
+        gap = math.hypot(target["cx"] - px, target["cy"] - py)
+        ux, uy = ((target["cx"] - px) / gap, (target["cy"] - py) / gap) if gap else (0, 0)
+        land_x, land_y = px + ux * jump_distance, py + uy * jump_distance
+
+        self.total_jumps += 1
+        result = {
+            "duration_ms": duration_ms,
+            "held_ms": round(held_ms, 3),
+            "expected_distance": round(gap, 3),
+            "jump_distance": round(jump_distance, 3),
+            "landing": (round(land_x, 1), round(land_y, 1)),
+            "success": False,
+            "perfect": False,
+        }
+
+        if on_platform(target, land_x, land_y):
+            result["success"] = True
+            result["perfect"] = on_platform(target, land_x, land_y, margin=0.25)
+            self.successes += 1
+            self.score += 2 if result["perfect"] else 1
+            self.best_score = max(self.best_score, self.score)
+            self.player = [land_x, land_y]
+            self._spawn_next()
+        elif on_platform(self.current, land_x, land_y):
+            # 没跳出当前平台，游戏继续
+            self.player = [land_x, land_y]
+        else:
+            self.game_over = True
+
+        result["score"] = self.score
+        result["game_over"] = self.game_over
+        self.last_result = result
+        self.history.append(result)
+        return True
+
+    def get_screen_size(self) -> tuple:
+        """
+        获取渲染尺寸
+
+        Returns:
+            tuple: (width, height)
+        """
+        return (self.width, self.height)
+
+    def settle(self, seconds: float) -> None:
+        """模拟器不睡眠，只推进模拟时间"""
+        self.clock += seconds
+
+
+def run_simulation(
+    model_path: str,
+    jumps: int = 100,
+    seed: int = 0,
+    width: int = 1080,
+    height: int = 1920,
+    k: float = 1.61,
+    k_true: float = 1.61,
+    press_noise_ms: float = 0.0,
+) -> dict:
+    """
+    用模拟器跑一段完整的Jump循环
+
+    Args:
+        model_path: 模型文件路径
+        jumps: 跳跃次数
+        seed: 模拟器随机种子
+        width: 渲染宽度
+        height: 渲染高度
+        k: Jump使用的跳跃系数
+        k_true: 模拟器的真实跳跃系数
+        press_noise_ms: 按压时长噪声
+
+    Returns:
+        dict: 跳跃次数、成功次数、游戏局数、得分、耗时等
+    """
+    from main import Jump
+
+    simulator = JumpSimulator(width, height, seed, k_true, press_noise_ms)
+    # 同一种子的画面每次都一样，吞吐测试不走检测缓存，也不保存预测结果图片
+    jump = Jump(model_path, simulator, cache=False, save_folder=False)
+    screenshot_path = f"./sim_screenshot_{os.getpid()}_{seed}.png"
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(jumps):
+        jump_start = time.perf_counter()
+        jump.jump(k=k, screenshot_path=screenshot_path)
+        latencies.append((time.perf_counter() - jump_start) * 1000)
+    compute_seconds = time.perf_counter() - start
+
+    if os.path.exists(screenshot_path):
+        os.remove(screenshot_path)
+
+    return {
+        "seed": seed,
+        "jumps": simulator.total_jumps,
+        "successes": simulator.successes,
+        "games": simulator.games,
+        "best_score": simulator.best_score,
+        "compute_seconds": compute_seconds,
+        "simulated_seconds": simulator.clock,
+        "latencies_ms": latencies,
+    }
+
+
+def run_benchmark(
+    model_path: str, seeds: list, jumps: int = 100, workers: int = 1, **kwargs
+) -> dict:
+    """
+    多个种子并行运行模拟并汇总
+
+    Args:
+        model_path: 模型文件路径
+        seeds: 随机种子列表，每个种子一个独立的模拟器
+        jumps: 每个种子的跳跃次数
+        workers: 并行进程数
+        **kwargs: 透传给run_simulation的参数
+
+    Returns:
+        dict: 汇总报告
+    """
+    from replay_runner import summarize_latencies
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(run_simulation, model_path, jumps, seed, **kwargs)
+                for seed in seeds
+            ]
+            runs = [f.result() for f in futures]
+    else:
+        runs = [run_simulation(model_path, jumps, seed, **kwargs) for seed in seeds]
+
+    total_jumps = sum(r["jumps"] for r in runs)
+    successes = sum(r["successes"] for r in runs)
+    # 每个模拟器都是独立的一条循环，单条循环的真实耗时 = 计算耗时 + 模拟的按压和等待时间
+    loop_seconds = sum(r["compute_seconds"] + r["simulated_seconds"] for r in runs)
+    compute_seconds = sum(r["compute_seconds"] for r in runs)
+    latencies = [v for r in runs for v in r.pop("latencies_ms")]
+
+    return {
+        "model": model_path,
+        "seeds": list(seeds),
+        "jumps": total_jumps,
+        "successes": successes,
+        "success_rate": round(successes / total_jumps, 4) if total_jumps else 0.0,
+        "games": sum(r["games"] for r in runs),
+        "best_score": max(r["best_score"] for r in runs),
+        "jumps_per_hour": round(total_jumps / loop_seconds * 3600, 1)
+        if loop_seconds
+        else 0.0,
+        "compute_jumps_per_hour": round(total_jumps / compute_seconds * 3600, 1)
+        if compute_seconds
+        else 0.0,
+        "latency_ms": summarize_latencies(latencies),
+        "runs": runs,
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="跳一跳模拟器吞吐测试")
+    parser.add_argument("--model", default="./best.pt", help="模型文件路径")
+    parser.add_argument("--jumps", type=int, default=100, help="每个种子的跳跃次数")
+    parser.add_argument("--seeds", type=int, default=1, help="种子数量（独立模拟器数量）")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--width", type=int, default=1080, help="渲染宽度")
+    parser.add_argument("--height", type=int, default=1920, help="渲染高度")
+    parser.add_argument("--k", type=float, default=1.61, help="Jump使用的跳跃系数")
+    parser.add_argument("--k-true", type=float, default=1.61, help="模拟器真实跳跃系数")
+    parser.add_argument("--press-noise", type=float, default=0.0, help="按压噪声(ms)")
+    parser.add_argument("--render-only", help="只渲染一帧到指定路径并输出真实标注")
+    parser.add_argument("--output", help="JSON报告输出路径")
+
+    args = parser.parse_args()
+
+    if args.render_only:
+        simulator = JumpSimulator(args.width, args.height)
+        simulator.screenshot(args.render_only)
+        print(json.dumps(simulator.ground_truth(), indent=2))
+        return
+
+    print("🎮 跳一跳模拟器吞吐测试")
+    print("=" * 50)
+
+    report = run_benchmark(
+        args.model,
+        seeds=list(range(args.seeds)),
+        jumps=args.jumps,
+        workers=args.workers,
+        width=args.width,
+        height=args.height,
+        k=args.k,
+        k_true=args.k_true,
+        press_noise_ms=args.press_noise,
+    )
+
+    print(f"\n📊 模拟结果:")
+    print(f"   跳跃次数: {report['jumps']}, 成功率: {report['success_rate']:.2%}")
+    print(f"   游戏局数: {report['games']}, 最高分: {report['best_score']}")
+    print(f"   每小时跳跃: {report['jumps_per_hour']} (仅计算: {report['compute_jumps_per_hour']})")
+    latency = report["latency_ms"]
+    print(f"   单次循环耗时: p50={latency['p50']}ms, p99={latency['p99']}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 报告已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
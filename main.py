@@ -1,115 +1,407 @@
-from ultralytics import YOLO
+import gc
 import random
 import time
 import os
+import cv2
 import numpy as np
 
 from device_controller import (
     DeviceController,
     AdbDeviceController,
+    AdbTouchDeviceController,
     WindowsDeviceController,
 )
+from detection_cache import DetectionCache, default_cache, make_params_key
+from hard_examples import HardExampleMiner
+from metrics import MetricsRegistry, MetricsServer
+from session_stats import device_label
+from tap_latency import compensate, load_calibration
+from event_log import log
+
+# select_target的失败原因
+REASON_NO_DETECTIONS = "no_detections"
+REASON_NO_PLAYER = "no_player"
+REASON_NO_PLATFORM = "no_platform"
+REASON_NO_VALID_TARGET = "no_valid_target"
+REASON_TOO_CLOSE = "too_close"
+
+
+def select_target(detections: np.ndarray) -> dict:
+    """
+    根据检测结果选择目标平台并计算距离
+
+    Args:
+        detections: 检测结果数组，每行为 [x1, y1, x2, y2, conf, cls]
+
+    Returns:
+        dict: distance（失败时为0）、reason（成功时为None）、
+              player和target（xywh格式，未找到时为None）
+    """
+    decision = {"distance": 0, "reason": None, "player": None, "target": None}
+
+    # 检查是否有检测结果
+    if len(detections) == 0:
+        log.info("no_detections", "⚠️ 未检测到任何对象")
+        decision["reason"] = REASON_NO_DETECTIONS
+        return decision
+
+    # 转换为中心点格式的检测框、类别和置信度
+    xyxy = detections[:, :4]
+    boxes = np.column_stack(
+        (
+            (xyxy[:, 0] + xyxy[:, 2]) / 2,
+            (xyxy[:, 1] + xyxy[:, 3]) / 2,
+            xyxy[:, 2] - xyxy[:, 0],
+            xyxy[:, 3] - xyxy[:, 1],
+        )
+    )
+    confidences = detections[:, 4]
+    cls = detections[:, 5]
+
+    # 筛选出类别为1的检测框 (humen/玩家)
+    humen_mask = cls == 1
+    humen_boxes = boxes[humen_mask]
+    humen_confidences = confidences[humen_mask]
+
+    if len(humen_boxes) == 0:
+        log.info("no_player", "⚠️ 未检测到玩家")
+        decision["reason"] = REASON_NO_PLAYER
+        return decision
+
+    # 获取玩家位置（选择置信度最高的）
+    best_humen_idx = np.argmax(humen_confidences)
+    humen_box = humen_boxes[best_humen_idx]
+    humen_bottom_y = humen_box[1] + humen_box[3]  # 玩家底部Y坐标
+    decision["player"] = humen_box
+
+    # 筛选出类别为0的检测框 (cube/平台)
+    cube_mask = cls == 0
+    cube_boxes = boxes[cube_mask]
+    cube_confidences = confidences[cube_mask]
+
+    if len(cube_boxes) == 0:
+        log.info("no_platform", "⚠️ 未检测到平台")
+        decision["reason"] = REASON_NO_PLATFORM
+        return decision
+
+    # 过滤掉Y坐标大于等于玩家的平台（已经跳过的或当前站立的平台）
+    valid_cubes = []
+    valid_confidences = []
+
+    for i, cube_box in enumerate(cube_boxes):
+        cube_center_y = cube_box[1] + cube_box[3] / 2
+        valid = cube_center_y < humen_bottom_y
+        log.debug(
+            "cube_candidate",
+            "cube_center_y: {cube_center_y}, humen_center_y: {humen_bottom_y}, "
+            "cube_box:{cube_box}, cube_confidences[i]:{confidence}, 有效: {valid}",
+            cube_center_y=cube_center_y,
+            humen_bottom_y=humen_bottom_y,
+            cube_box=cube_box,
+            confidence=cube_confidences[i],
+            valid=valid,
+        )
+        # 只保留Y坐标小于玩家的平台（在玩家前方的平台）
+        if valid:
+            valid_cubes.append(cube_box)
+            valid_confidences.append(cube_confidences[i])
+
+    if len(valid_cubes) == 0:
+        log.info("no_valid_target", "⚠️ 未找到有效的目标平台（所有平台都在玩家后方）")
+        decision["reason"] = REASON_NO_VALID_TARGET
+        return decision
+
+    # 从有效平台中选择最近的一个（Y坐标最大的，即最接近玩家的前方平台）
+    valid_cubes = np.array(valid_cubes)
+
+    # 计算所有有效平台到玩家的距离
+    distances = np.sqrt(
+        (valid_cubes[:, 0] - humen_box[0]) ** 2
+        + (valid_cubes[:, 1] - (humen_box[1] + humen_box[3] * 0.5)) ** 2
+    )
+
+    # 创建距离大于50的掩码
+    valid_distance_mask = distances > 50
+
+    # 如果没有距离大于50的平台，返回0
+    if not np.any(valid_distance_mask):
+        log.info("too_close", "⚠️ 未找到合适距离的目标平台")
+        decision["reason"] = REASON_TOO_CLOSE
+        return decision
+
+    # 在距离有效的平台中选择宽度最大的
+    valid_distance_cubes = valid_cubes[valid_distance_mask]
+    valid_distances = distances[valid_distance_mask]
+    target_cube_idx = np.argmax(valid_distance_cubes[:, 2])  # 选择宽度最大的平台
+    target_cube = valid_distance_cubes[target_cube_idx]
+    distance = valid_distances[target_cube_idx]
+
+    log.info(
+        "target_selected",
+        "🎯 目标选择: 玩家Y={player_y:.1f}, 目标平台Y={target_y:.1f}, 距离={distance:.1f}",
+        player_y=humen_bottom_y,
+        target_y=target_cube[1],
+        distance=distance,
+    )
+
+    decision["target"] = target_cube
+    decision["distance"] = 0 if distance < 50 else round(distance, 3)  # 距离小于50返回0
+    return decision
+
+
+def box_center(xywh) -> list:
+    """select_target 结果中玩家或目标的中心 [x, y]（保留两位小数，便于写入JSON），未找到时为None"""
+    if xywh is None:
+        return None
+    return [round(float(xywh[0]), 2), round(float(xywh[1]), 2)]
+
+
+def press_time_for(distance: float, k: float, calibration: dict = None) -> int:
+    """
+    根据距离计算按压时间，设备分辨率不同按压时间不同（系数 k 不同）
+
+    Args:
+        distance: select_target 计算出的距离
+        k: 跳跃系数
+        calibration: 控制器的按压标定（tap_latency），补偿注入造成的时长偏差
+
+    Returns:
+        int: 请求给控制器的按压时间，单位毫秒
+    """
+    return compensate(int(distance * k), calibration)
+
+
+def _encode_frame(frame: np.ndarray) -> bytes:
+    """把内存中的画面编码为PNG（交给难例挖掘）"""
+    ok, data = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    return data.tobytes() if ok else None
 
 
 class Jump:
     def __init__(
-        self, model_path: str, device_controller: DeviceController = None
+        self,
+        model_path: str,
+        device_controller: DeviceController = None,
+        miner: HardExampleMiner = None,
+        metrics: MetricsRegistry = None,
+        cache: DetectionCache = None,
+        warmup: bool = True,
+        device_name: str = None,
+        save_folder: str = None,
     ) -> None:
+        """
+        Args:
+            model_path: 模型路径
+            device_controller: 设备控制器，默认为ADB控制器
+            miner: 难例挖掘队列（可选）
+            metrics: 各阶段耗时的指标注册表
+            cache: 检测缓存，None时使用默认缓存，False时不使用缓存（离线测量）
+            warmup: 是否在构造时预热模型
+            device_name: 设备名，用于查找按压标定，默认见 device_label
+            save_folder: 预测结果图片保存目录，None时为 ./dataset/predict_<时间>，
+                False时不保存（离线回放等）
+        """
+        from ultralytics import YOLO  # 导入torch要好几秒，只在真正需要模型时导入
+
+        self.model_path = model_path
         self.model = YOLO(model_path)
-        self.save_floder = f"./dataset/predict_{int(time.time())}"
+        self.predict_params = {"conf": 0.2, "iou": 0.9, "imgsz": 640}
+        # 检测缓存：同一模型、同样参数下画面没变时（如点击失败后的重试）不再推理
+        if cache is False:
+            self.cache = None
+        else:
+            self.cache = cache if cache is not None else default_cache()
+        self.cache_params = make_params_key(model_path, **self.predict_params)
+        # 预测结果图片保存目录，为None时不保存
+        if save_folder is None:
+            save_folder = f"./dataset/predict_{int(time.time())}"
+        self.save_floder = save_folder or None
         # 如果没有指定设备控制器，默认使用ADB控制器
         self.device_controller = (
             device_controller if device_controller else AdbDeviceController()
         )
+        # 难例挖掘（可选），识别失败和疑似跳失败的帧进入标注队列
+        self.miner = miner
+        self.last_prediction = None
+        # 各阶段耗时直方图
+        self.metrics = metrics if metrics else MetricsRegistry()
+        self.metrics.register_counter("jump_decisions_total", "reason")
+        # 按压注入的标定（python tap_latency.py 生成），按设备名保存，没有标定时不补偿
+        self.device_name = device_name or device_label(self.device_controller)
+        self.tap_calibration = load_calibration(self.device_name)
+        if self.tap_calibration:
+            log.info(
+                "tap_calibration_loaded",
+                "👆 按压补偿: 实际时长 = {slope:.3f} × 请求时长 {offset_ms:+.1f}ms",
+                **self.tap_calibration,
+            )
+        # 构造时预热模型，第一次真实跳跃不会在冷模型上运行
+        self.warmup_report = self.warm_up() if warmup else None
+
+    def warm_up(
+        self, model=None, runs: int = 10, window: int = 3, tolerance: float = 0.2
+    ) -> dict:
+        """
+        用与真实截图同尺寸的假画面空跑推理，直到延迟稳定
 
-    def predict(self, image: str):
-        results = self.model.predict(image, conf=0.2, iou=0.9, verbose=False)
-        # 保存预测结果
-        os.makedirs(self.save_floder, exist_ok=True)
-        save_name = f"{self.save_floder}/results_{time.time()}.png"
-        results[0].save(filename=save_name)
-
-        # 检查是否有检测结果
-        if results[0].boxes is None or len(results[0].boxes) == 0:
-            print("⚠️ 未检测到任何对象")
-            return 0
-
-        # 获取检测框、类别和置信度
-        boxes = results[0].boxes.xywh.cpu().numpy()  # 转换为numpy数组
-        cls = results[0].boxes.cls.cpu().numpy()  # 获取类别
-        confidences = results[0].boxes.conf.cpu().numpy()  # 获取置信度
-
-        # 筛选出类别为1的检测框 (humen/玩家)
-        humen_mask = cls == 1
-        humen_boxes = boxes[humen_mask]
-        humen_confidences = confidences[humen_mask]
-
-        if len(humen_boxes) == 0:
-            print("⚠️ 未检测到玩家")
-            return 0
-
-        # 获取玩家位置（选择置信度最高的）
-        best_humen_idx = np.argmax(humen_confidences)
-        humen_box = humen_boxes[best_humen_idx]
-        humen_bottom_y = humen_box[1] + humen_box[3]  # 玩家底部Y坐标
-
-        # 筛选出类别为0的检测框 (cube/平台)
-        cube_mask = cls == 0
-        cube_boxes = boxes[cube_mask]
-        cube_confidences = confidences[cube_mask]
-
-        if len(cube_boxes) == 0:
-            print("⚠️ 未检测到平台")
-            return 0
-
-        # 过滤掉Y坐标大于等于玩家的平台（已经跳过的或当前站立的平台）
-        valid_cubes = []
-        valid_confidences = []
-
-        for i, cube_box in enumerate(cube_boxes):
-            cube_center_y = cube_box[1] + cube_box[3] / 2
-            print(
-                f"cube_center_y: {cube_center_y}, humen_center_y: {humen_bottom_y}, cube_box:{cube_box}, cube_confidences[i]:{cube_confidences[i]}"
+        第一次推理要创建predictor、把权重搬到设备上、预热内存分配器，
+        这些都放在这里完成，不计入缓存也不保存结果图片
+
+        Args:
+            model: 要预热的模型，默认为当前模型（热更新时预热候选模型）
+            runs: 最多空跑次数
+            window: 用最近几次的延迟判断是否稳定
+            tolerance: 最近window次延迟相对其中位数的最大偏差
+
+        Returns:
+            dict: cold_ms（第一次）、warm_ms（稳定后的中位数）、runs、steady
+        """
+        try:
+            width, height = self.device_controller.get_screen_size()
+        except Exception:
+            width, height = 1080, 1920
+        # 浅色背景加几个色块，和游戏画面一样会产生检测框和NMS计算
+        rng = random.Random(0)
+        frame = np.full((height, width, 3), 230, dtype=np.uint8)
+        for _ in range(6):
+            x, y = rng.randrange(width), rng.randrange(height // 4, height * 3 // 4)
+            size = rng.randrange(width // 10, width // 4)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            cv2.rectangle(frame, (x, y), (x + size, y + size // 2), color, -1)
+
+        latencies = []
+        steady = False
+        for _ in range(runs):
+            start = time.perf_counter()
+            (model or self.model).predict(frame, verbose=False, **self.predict_params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recent = latencies[1:][-window:]  # 第一次是冷启动，不参与判断
+            if len(recent) == window:
+                median = sorted(recent)[window // 2]
+                if all(abs(v - median) <= tolerance * median for v in recent):
+                    steady = True
+                    break
+
+        report = {
+            "cold_ms": round(latencies[0], 1),
+            "warm_ms": round(sorted(recent)[len(recent) // 2], 1) if recent else None,
+            "runs": len(latencies),
+            "steady": steady,
+        }
+        if steady:
+            log.info(
+                "model_warmup",
+                "🔥 模型预热完成: 冷启动 {cold_ms:.0f}ms → 稳定 {warm_ms:.0f}ms ({runs}次)",
+                **report,
             )
-            # 只保留Y坐标小于玩家的平台（在玩家前方的平台）
-            if cube_center_y < humen_bottom_y:
-                print(f"有效平台: {cube_box}, 置信度: {cube_confidences[i]}")
-                valid_cubes.append(cube_box)
-                valid_confidences.append(cube_confidences[i])
-
-        if len(valid_cubes) == 0:
-            print("⚠️ 未找到有效的目标平台（所有平台都在玩家后方）")
-            return 0
-
-        # 从有效平台中选择最近的一个（Y坐标最大的，即最接近玩家的前方平台）
-        valid_cubes = np.array(valid_cubes)
-
-        # 计算所有有效平台到玩家的距离
-        distances = np.sqrt(
-            (valid_cubes[:, 0] - humen_box[0]) ** 2
-            + (valid_cubes[:, 1] - (humen_box[1] + humen_box[3] * 0.5)) ** 2
-        )
+        else:
+            log.warning(
+                "model_warmup_unsteady",
+                "⚠️ 模型预热 {runs} 次后延迟仍未稳定: 冷启动 {cold_ms:.0f}ms, 最近 {recent}",
+                recent=[round(v) for v in latencies[-window:]],
+                **report,
+            )
+        return report
 
-        # 创建距离大于50的掩码
-        valid_distance_mask = distances > 50
+    def predict(self, image: str, frame: np.ndarray = None):
+        """
+        检测并选择目标
 
-        # 如果没有距离大于50的平台，返回0
-        if not np.any(valid_distance_mask):
-            print("⚠️ 未找到合适距离的目标平台")
-            return 0
+        Args:
+            image: 截图路径
+            frame: 已在内存中的画面（如视频流的最新一帧），给出时不再读取image
 
-        # 在距离有效的平台中选择宽度最大的
-        valid_distance_cubes = valid_cubes[valid_distance_mask]
-        valid_distances = distances[valid_distance_mask]
-        target_cube_idx = np.argmax(valid_distance_cubes[:, 2])  # 选择宽度最大的平台
-        target_cube = valid_distance_cubes[target_cube_idx]
-        distance = valid_distances[target_cube_idx]
+        Returns:
+            float: 距离，失败时为0
+        """
+        if frame is None:
+            with self.metrics.timer("decode"):
+                frame = cv2.imread(image)
+
+        detections = cache_key = None
+        if self.cache is not None and frame is not None:
+            with self.metrics.timer("cache"):
+                cache_key = self.cache.key(self.cache_params, frame)
+                detections = self.cache.get(cache_key)
+            self.metrics.inc(
+                "detection_cache_hits_total"
+                if detections is not None
+                else "detection_cache_misses_total"
+            )
 
-        print(
-            f"🎯 目标选择: 玩家Y={humen_bottom_y:.1f}, 目标平台Y={target_cube[1]:.1f}, 距离={distance:.1f}"
-        )
+        # 命中缓存时这一帧的预测结果图片之前已经保存过
+        inference_ms = None
+        if detections is None:
+            start = time.perf_counter()
+            with self.metrics.timer("inference"):
+                results = self.model.predict(
+                    frame if frame is not None else image,
+                    verbose=False,
+                    **self.predict_params,
+                )
+            inference_ms = (time.perf_counter() - start) * 1000
+            # 保存预测结果
+            if self.save_floder:
+                with self.metrics.timer("save"):
+                    os.makedirs(self.save_floder, exist_ok=True)
+                    save_name = f"{self.save_floder}/results_{time.time()}.png"
+                    results[0].save(filename=save_name)
+            boxes = results[0].boxes
+            detections = (
+                boxes.data.cpu().numpy() if boxes is not None else np.zeros((0, 6))
+            )
+            if cache_key is not None:
+                self.cache.put(cache_key, detections)
 
-        return 0 if distance < 50 else round(distance, 3)  # 距离小于50返回0
+        with self.metrics.timer("select"):
+            decision = select_target(detections)
+        self.metrics.inc("jump_decisions_total", decision["reason"] or "ok")
+        self._record_prediction(image, detections, decision, frame)  # 调试画面也直接用其中的帧
+        self.last_prediction["inference_ms"] = inference_ms  # 命中缓存时为None
+        return decision["distance"]
+
+    def _record_prediction(self, image: str, detections, decision: dict, frame=None):
+        """
+        记录本次预测，失败帧交给难例挖掘
+
+        成功的帧只把解码好的画面留在内存里，下一帧识别失败、需要把它作为疑似跳失败的样本时才编码，
+        跳跃循环中不额外读写截图文件
+        """
+        previous = self.last_prediction
+        self.last_prediction = dict(decision, image=image, detections=detections, frame=frame)
+
+        if self.miner is None or not decision["reason"]:
+            return
+
+        if image is not None:
+            self.miner.add(image, detections, decision["reason"])
+        else:
+            self.miner.add_bytes(_encode_frame(frame), detections, decision["reason"])
+        # 上一帧做出了跳跃决策而这一帧识别失败，上一次跳跃很可能失败了
+        if previous and not previous["reason"] and previous.get("frame") is not None:
+            data = _encode_frame(previous["frame"])
+            if data:
+                self.miner.add_bytes(data, previous["detections"], "jump_failed")
+
+    def release_memory(self):
+        """丢弃可以重建的缓存：上一帧的画面和torch的显存缓存"""
+        if self.last_prediction:
+            self.last_prediction.pop("frame", None)
+        import torch
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def reload_model(self):
+        """重新加载模型，释放推理过程中积累的内存"""
+        from ultralytics import YOLO
+
+        self.model = None
+        gc.collect()
+        self.model = YOLO(self.model_path)
+        self.cache_params = make_params_key(self.model_path, **self.predict_params)
+        self.warmup_report = self.warm_up()
+        log.info("model_reloaded", "🔄 模型已重新加载: {path}", path=self.model_path)
 
     def screenshot(self, save_path: str = "./iphone.png"):
         """
@@ -120,6 +412,24 @@ class Jump:
         """
         return self.device_controller.screenshot(save_path)
 
+    def capture(self, save_path: str = "./iphone.png"):
+        """
+        获取当前画面：控制器能直接提供内存中的画面时（视频流）不经过文件
+
+        Args:
+            save_path: 需要截图文件时的保存路径
+
+        Returns:
+            np.ndarray: 内存中的画面，截图写入了save_path时为None
+        """
+        latest_frame = getattr(self.device_controller, "latest_frame", None)
+        if latest_frame is not None:
+            frame = latest_frame()
+            if frame is not None:
+                return frame
+        self.screenshot(save_path)
+        return None
+
     def tap(self, x: int, y: int, duration_ms: int = 100):
         """
         在设备上进行点击操作
@@ -132,13 +442,27 @@ class Jump:
         return self.device_controller.tap(x, y, duration_ms)
 
     def jump(self, k: float = 7.0, screenshot_path: str = "./iphone.png"):
+        """
+        完成一次截图、预测、按压和等待
+
+        Args:
+            k: 跳跃系数
+            screenshot_path: 截图保存路径
+
+        Returns:
+            dict: 本次跳跃的决策（距离、失败原因、按压时间、点击位置和点击是否成功）
+        """
+        jump_start = time.perf_counter()
         # 截图
-        self.screenshot(screenshot_path)
-        distance = self.predict(screenshot_path)
-        print(f"距离: {distance}")
+        with self.metrics.timer("capture"):
+            frame = self.capture(screenshot_path)
+        if frame is None:
+            distance = self.predict(screenshot_path)
+        else:
+            distance = self.predict(None, frame)
+        log.info("distance", "距离: {distance}", distance=distance)
 
-        # 计算按压时间 根据设备分辨率不同按压时间不同（系数 k 不同）
-        press_time = int(distance * k)
+        press_time = press_time_for(distance, k, self.tap_calibration)
 
         # 获取屏幕尺寸用于随机点击位置
         screen_width, screen_height = self.device_controller.get_screen_size()
@@ -146,20 +470,150 @@ class Jump:
         # 模拟按压 位置随机按压（根据屏幕尺寸调整）
         x = random.randint(int(screen_width * 0.3), int(screen_width * 0.7))
         y = random.randint(int(screen_height * 0.6), int(screen_height * 0.8))
-        self.tap(x, y, duration_ms=press_time)
-        # 等待2秒
-        time.sleep(press_time / 1000 + 1)
-
+        with self.metrics.timer("tap"):
+            tapped = self.tap(x, y, duration_ms=press_time)
+        if not tapped:
+            self.metrics.inc("jump_tap_failures_total")
+        # 等待跳跃动画结束
+        with self.metrics.timer("settle"):
+            self.device_controller.settle(press_time / 1000 + 1)
+
+        self.metrics.observe("jump", time.perf_counter() - jump_start)
+        self.metrics.maybe_print_summary()
+
+        return {
+            "distance": float(distance),
+            "reason": self.last_prediction["reason"] if self.last_prediction else None,
+            "press_time": press_time,
+            "x": x,
+            "y": y,
+            "tapped": bool(tapped),
+        }
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    from debug_dashboard import DashboardServer
+    from debug_overlay import OverlayRenderer
+    from memory_watchdog import MemoryWatchdog, restart_process
+    from model_reload import ModelReloader
+    from shadow_eval import ShadowEvaluator, print_report
+    from profiler import add_profile_arguments, profiler_from_args
+    from session_stats import SessionStats
+
+    parser = argparse.ArgumentParser(description="跳一跳自动跳跃")
+    parser.add_argument("--k", type=float, default=1.61, help="跳跃系数")
+    parser.add_argument(
+        "--controller",
+        choices=["windows", "adb", "adb-touch"],
+        default="windows",
+        help="控制器类型（adb-touch: ADB直接写触摸屏事件，按压更准、每跳更快）",
+    )
+    parser.add_argument("--window-title", default="跳一跳", help="Windows窗口标题")
+    parser.add_argument("--serial", help="ADB设备序列号，连接了多台设备时指定")
+    parser.add_argument(
+        "--stream", action="store_true", help="ADB截图改用screenrecord视频流（需要PyAV或ffmpeg）"
+    )
+    parser.add_argument(
+        "--stats-db", default="./dataset/session_stats.db", help="会话统计数据库"
+    )
+    parser.add_argument(
+        "--device-name", help="统计和按压标定使用的设备名，默认 主机名/控制器[/序列号]"
+    )
+    parser.add_argument("--memory-budget", type=float, help="内存预算（MB），超出时释放内存")
+    parser.add_argument(
+        "--memory-trace", action="store_true", help="开启tracemalloc，报告内存增长位置"
+    )
+    parser.add_argument("--dashboard-port", type=int, help="开启网页调试面板（MJPEG）")
+    parser.add_argument("--dashboard-host", default="127.0.0.1", help="调试面板监听地址")
+    parser.add_argument("--metrics-port", type=int, help="开启Prometheus指标接口（如9108）")
+    parser.add_argument(
+        "--watch-model", action="store_true", help="模型文件更新后自动热更新（也可以 kill -HUP）"
+    )
+    parser.add_argument(
+        "--canary", default="./dataset/canary", help="热更新时用于验证新模型的截图目录"
+    )
+    parser.add_argument(
+        "--shadow-model", help="候选模型：在低优先级进程中处理相同画面并与当前模型对比"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
 
-if __name__ == "__main__":
     # 可以选择使用ADB控制器或Windows控制器
-    # device = AdbDeviceController()  # 使用ADB控制Android手机
-    device = WindowsDeviceController("跳一跳")  # 使用Windows窗口控制
-
-    # jump = Jump("./best.pt")  # 默认使用ADB控制器
-    jump = Jump("./best.pt", WindowsDeviceController("跳一跳"))  # 使用Windows控制器
+    if args.controller == "adb":
+        device = AdbDeviceController(serial=args.serial)  # 使用ADB控制Android手机
+    elif args.controller == "adb-touch":
+        device = AdbTouchDeviceController(serial=args.serial)
+    else:
+        device = WindowsDeviceController(args.window_title)  # 使用Windows窗口控制
+    if args.stream:
+        if args.controller == "windows":
+            parser.error("--stream 只能和ADB控制器一起使用")
+        from screen_stream import ScreenrecordDeviceController
+
+        device = ScreenrecordDeviceController(device)  # 截图来自视频流
+
+    # 识别失败的帧进入难例队列
+    jump = Jump(
+        "./best.pt", device, miner=HardExampleMiner(), device_name=args.device_name
+    )
+    if args.metrics_port:
+        MetricsServer(jump.metrics, args.metrics_port)  # http://127.0.0.1:端口/metrics
 
     # jump.screenshot()
     # print(jump.predict("./iphone.png"))
-    while True:
-        jump.jump(k=1.61)
+    profiler = profiler_from_args(args)  # 剖析完N次跳跃后写出报告，之后照常运行
+    stats = SessionStats(
+        args.stats_db, jump.device_name, model="./best.pt"
+    )  # python session_stats.py summary 查看
+    # 内存看门狗：超出预算时依次 gc → 丢弃缓存 → 重新加载模型 → 重启进程
+    watchdog = MemoryWatchdog(args.memory_budget, trace=args.memory_trace)
+    watchdog.add_action("drop_caches", jump.release_memory)
+    watchdog.add_action("recycle_model", jump.reload_model)
+    watchdog.add_action("restart_session", lambda: (stats.close(), restart_process()))
+    # 模型热更新：新权重在后台加载、预热、验证，通过后在两次跳跃之间切换
+    reloader = ModelReloader(jump, watch=args.watch_model, canary_dir=args.canary)
+    reloader.install_signal_handler()
+    # 影子评估：候选模型跟着处理实时画面，退出时打印能否切换的评估报告
+    shadow = None
+    if args.shadow_model:
+        shadow = ShadowEvaluator(args.shadow_model, jump.predict_params)
+    # 网页调试面板：检测框画面在后台线程渲染，有人观看时才编码JPEG
+    dashboard = renderer = None
+    if args.dashboard_port:
+        server = DashboardServer(args.dashboard_port, args.dashboard_host)
+        dashboard = server.add_session(jump.device_name, jump.metrics)
+        renderer = OverlayRenderer(sinks=[dashboard.publish_frame])
+    try:
+        while True:
+            start = time.perf_counter()
+            if profiler and not profiler.done:
+                with profiler.jump():
+                    result = jump.jump(k=args.k)
+            else:
+                result = jump.jump(k=args.k)
+            stats.record(result, duration=time.perf_counter() - start)
+            if dashboard:
+                dashboard.record_jump(result)
+                prediction = jump.last_prediction
+                renderer.submit(
+                    prediction.get("frame"), prediction["detections"], prediction
+                )
+            if shadow and jump.last_prediction:
+                shadow.submit(jump.last_prediction.get("frame"), jump.last_prediction)
+            watchdog.check()
+            reloader.observe(result)  # 新模型切换后识别失败明显增多时回滚
+            reloader.maybe_swap()
+    finally:
+        if shadow:
+            print_report(shadow.close())
+        reloader.close()
+        stats.close()
+        if profiler:
+            profiler.finish()
+
+
+if __name__ == "__main__":
+    main()
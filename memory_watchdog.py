@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+长时间运行的跳跃循环的内存看门狗
+定期采样RSS，按需用tracemalloc快照把增长归因到分配位置；
+超出内存预算时依次执行释放动作（gc和归还堆内存、丢弃缓存、重新加载模型、重启会话），
+并把趋势数据写入CSV
+"""
+
+import csv
+import ctypes
+import ctypes.util
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import psutil
+
+from event_log import log
+
+
+def rss_mb() -> float:
+    """当前进程的常驻内存（MB）"""
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+def _load_malloc_trim():
+    """glibc的malloc_trim，其他平台返回None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return libc.malloc_trim
+    except (OSError, AttributeError):
+        return None
+
+
+_malloc_trim = _load_malloc_trim()
+
+
+def collect_garbage():
+    """gc全量回收，并让glibc把空闲堆内存还给系统（逐帧解码图片造成的碎片）"""
+    gc.collect()
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+def restart_process():
+    """用相同的命令行参数重新启动当前进程（最后手段，重置所有内存）"""
+    log.warning("memory_restart", "♻️ 内存仍超出预算，重启进程")
+    log.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+class MemoryWatchdog:
+    """在跳跃之间调用 check()，到时间才采样，不额外开线程"""
+
+    def __init__(
+        self,
+        budget_mb: float = None,
+        interval: float = 60.0,
+        snapshot_every: int = 10,
+        trace: bool = False,
+        trace_frames: int = 5,
+        top: int = 10,
+        cooldown: float = 300.0,
+        trend_path: str = "./dataset/memory_trend.csv",
+    ):
+        """
+        初始化看门狗
+
+        Args:
+            budget_mb: 内存预算（MB），None表示只记录不处理
+            interval: RSS采样间隔（秒）
+            snapshot_every: 每隔多少次采样做一次tracemalloc快照
+            trace: 是否开启tracemalloc（有额外开销，排查泄漏时再开）
+            trace_frames: tracemalloc记录的调用栈深度
+            top: 报告的增长位置数
+            cooldown: 两次执行释放动作的最短间隔（秒）
+            trend_path: 趋势CSV路径，None表示不写
+        """
+        self.budget_mb = budget_mb
+        self.interval = interval
+        self.snapshot_every = snapshot_every
+        self.top = top
+        self.cooldown = cooldown
+        self.trend_path = trend_path
+        self.actions = [("gc", collect_garbage)]
+        self.samples = 0
+        self.growth = []
+        self.baseline_rss = None
+        self._baseline_snapshot = None
+        self._last_sample = 0.0
+        self._last_enforce = -cooldown
+
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start(trace_frames)
+        if trend_path:
+            os.makedirs(os.path.dirname(os.path.abspath(trend_path)), exist_ok=True)
+
+    def add_action(self, name: str, action):
+        """
+        追加一个释放动作，超出预算时按添加顺序执行，直到回到预算以内
+
+        Args:
+            name: 动作名（记录在趋势数据中）
+            action: 无参数的可调用对象
+        """
+        self.actions.append((name, action))
+
+    def check(self, force: bool = False) -> float:
+        """
+        到采样时间时采样一次，必要时执行释放动作
+
+        Returns:
+            float: 本次采样的RSS（MB），未到采样时间时返回None
+        """
+        now = time.monotonic()
+        if not force and now - self._last_sample < self.interval:
+            return None
+        self._last_sample = now
+        self.samples += 1
+
+        rss = rss_mb()
+        if self.baseline_rss is None:
+            self.baseline_rss = rss
+        traced = None
+        if tracemalloc.is_tracing():
+            traced = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+            if self.samples % self.snapshot_every == 1 or self.snapshot_every == 1:
+                self._attribute_growth()
+
+        action = ""
+        over_budget = self.budget_mb and rss > self.budget_mb
+        if over_budget and now - self._last_enforce >= self.cooldown:
+            self._last_enforce = now
+            action, rss = self._enforce(rss)
+
+        self._write_trend(rss, traced, action)
+        log.debug(
+            "memory_sample",
+            "🧠 RSS {rss:.0f}MB (启动后 {growth:+.0f}MB)",
+            rss=rss,
+            growth=rss - self.baseline_rss,
+            traced_mb=traced,
+        )
+        return rss
+
+    def _enforce(self, rss: float) -> tuple:
+        """依次执行释放动作，回到预算以内就停止，返回 (执行过的动作, 最终RSS)"""
+        done = []
+        for name, action in self.actions:
+            try:
+                action()
+                if action is not collect_garbage:
+                    collect_garbage()  # 动作释放的对象要回收并归还堆内存，RSS才会下降
+            except Exception as e:
+                log.error(
+                    "memory_action_failed",
+                    "❌ 内存释放动作 {name} 失败: {error}",
+                    name=name,
+                    error=str(e),
+                )
+                continue
+            done.append(name)
+            after = rss_mb()
+            log.warning(
+                "memory_action",
+                "🧹 RSS {before:.0f}MB 超出预算 {budget:.0f}MB，执行 {name} 后 {after:.0f}MB",
+                before=rss,
+                budget=self.budget_mb,
+                name=name,
+                after=after,
+            )
+            rss = after
+            if rss <= self.budget_mb:
+                break
+        return "+".join(done), rss
+
+    def _attribute_growth(self):
+        """和第一次快照对比，找出增长最多的分配位置"""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+        if self._baseline_snapshot is None:
+            self._baseline_snapshot = snapshot
+            return
+        diffs = [
+            diff
+            for diff in snapshot.compare_to(self._baseline_snapshot, "traceback")
+            if diff.size_diff > 0
+        ]
+        self.growth = [
+            {
+                "size_kb": round(diff.size_diff / 1024, 1),
+                "count": diff.count_diff,
+                "site": " <- ".join(
+                    f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                    for frame in reversed(diff.traceback)  # 分配位置在前
+                ),
+            }
+            for diff in diffs[: self.top]
+        ]
+        for item in self.growth[:3]:
+            log.info(
+                "memory_growth",
+                "📈 内存增长 {size_kb:+.0f}KB ({count:+d}个对象): {site}",
+                **item,
+            )
+
+    def _write_trend(self, rss: float, traced: float, action: str):
+        if not self.trend_path:
+            return
+        new_file = not os.path.exists(self.trend_path)
+        with open(self.trend_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["time", "pid", "rss_mb", "traced_mb", "gc_objects", "action"])
+            writer.writerow(
+                [
+                    round(time.time(), 1),
+                    os.getpid(),
+                    round(rss, 1),
+                    round(traced, 1) if traced is not None else "",
+                    len(gc.get_objects()),
+                    action,
+                ]
+            )
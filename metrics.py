@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跳跃循环的性能指标
+各阶段耗时记录在固定对数分桶的直方图中（类似HDR直方图，记录一次只是一次二分查找），
+通过本地HTTP接口以Prometheus文本格式导出，并定期打印一行汇总
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from event_log import log
+
+# 跳跃循环的各个阶段
+STAGES = (
+    "capture",
+    "decode",
+    "cache",
+    "inference",
+    "save",
+    "select",
+    "tap",
+    "settle",
+    "jump",
+)
+
+
+def make_buckets(low: float = 0.0001, high: float = 120.0, growth: float = 1.25) -> list:
+    """生成对数分桶上界（秒），相邻桶相差growth倍，相对误差约 (growth-1)/2"""
+    bounds = []
+    value = low
+    while value < high:
+        bounds.append(round(value, 7))
+        value *= growth
+    bounds.append(high)
+    return bounds
+
+
+DEFAULT_BUCKETS = make_buckets()
+
+
+class Histogram:
+    """固定分桶的耗时直方图，单位秒"""
+
+    def __init__(self, buckets: list = None):
+        self.bounds = buckets or DEFAULT_BUCKETS
+        self.counts = [0] * (len(self.bounds) + 1)  # 最后一个桶是 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """记录一个值"""
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """估算分位数，返回所在桶的上界（超出最大桶时返回最大值）"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    if index < len(self.bounds):
+                        return min(self.bounds[index], self.max)
+                    return self.max
+            return self.max
+
+    def snapshot(self) -> dict:
+        """当前统计（毫秒）"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class MetricsRegistry:
+    """各阶段直方图和计数器的集合"""
+
+    def __init__(self, summary_interval: float = 60.0):
+        """
+        Args:
+            summary_interval: 汇总行的打印间隔（秒），0表示不打印
+        """
+        self.histograms = {}
+        self.counters = {}
+        self.counter_labels = {}  # 计数器名 → 标签名
+        self.summary_interval = summary_interval
+        self._last_summary = time.monotonic()
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        """获取（必要时创建）某阶段的直方图"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def observe(self, stage: str, seconds: float):
+        """记录某阶段的一次耗时"""
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """计时上下文：with metrics.timer("inference"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(stage).observe(time.perf_counter() - start)
+
+    def register_counter(self, name: str, label_name: str):
+        """
+        声明带标签的计数器的标签名，导出时使用（如 jump_decisions_total 的 reason）
+
+        Args:
+            name: 计数器名
+            label_name: Prometheus标签名，未声明的计数器用 label
+        """
+        self.counter_labels[name] = label_name
+
+    def inc(self, name: str, label: str = "", value: int = 1):
+        """计数器加一，label用于区分同一计数器的不同取值（如失败原因），标签名见 register_counter"""
+        key = (name, label)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def summary_line(self) -> str:
+        """一行汇总：各阶段的p50/p99"""
+        parts = []
+        for stage in sorted(self.histograms, key=_stage_order):
+            snap = self.histograms[stage].snapshot()
+            parts.append(f"{stage} p50={snap['p50_ms']:.1f} p99={snap['p99_ms']:.1f}")
+        return "⏱️ " + " | ".join(parts) + " (ms)"
+
+    def maybe_print_summary(self):
+        """距离上次打印超过间隔时输出汇总行（经事件日志在后台线程打印）"""
+        if not self.summary_interval:
+            return
+        now = time.monotonic()
+        if now - self._last_summary >= self.summary_interval:
+            self._last_summary = now
+            log.info(
+                "metrics_summary",
+                self.summary_line(),
+                stages={
+                    stage: histogram.snapshot()
+                    for stage, histogram in self.histograms.items()
+                },
+            )
+
+    def render_prometheus(self) -> str:
+        """Prometheus文本格式"""
+        lines = [
+            "# HELP jump_stage_duration_seconds Duration of each stage of the jump loop.",
+            "# TYPE jump_stage_duration_seconds histogram",
+        ]
+        for stage in sorted(self.histograms, key=_stage_order):
+            histogram = self.histograms[stage]
+            with histogram._lock:
+                counts = list(histogram.counts)
+                total, count = histogram.sum, histogram.count
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'jump_stage_duration_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}'
+                )
+            lines.append(
+                f'jump_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}'
+            )
+            lines.append(f'jump_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'jump_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            lines.append(f"# TYPE {name} counter")
+            label_name = self.counter_labels.get(name, "label")
+            for (counter, label), value in sorted(self.counters.items()):
+                if counter != name:
+                    continue
+                label_text = f'{{{label_name}="{label}"}}' if label else ""
+                lines.append(f"{name}{label_text} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _stage_order(stage: str):
+    return (STAGES.index(stage) if stage in STAGES else len(STAGES), stage)
+
+
+class MetricsServer:
+    """在后台线程中提供 /metrics 接口"""
+
+    def __init__(self, registry: MetricsRegistry, port: int = 9108, host: str = "127.0.0.1"):
+        """
+        Args:
+            registry: 指标集合
+            port: 监听端口，0表示随机端口
+            host: 监听地址，默认只监听本机
+        """
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?")[0] != "/metrics":
+                    handler.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass  # 不在控制台打印访问日志
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"📈 指标接口: http://{host}:{self.port}/metrics")
+
+    def close(self):
+        """停止服务"""
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型热更新
+监视模型文件（或收到SIGHUP/reload请求），在后台线程中加载并预热新权重，
+在一小组金丝雀截图上与当前模型对比验证，通过后在两次跳跃之间原子地替换；
+验证失败时保留当前模型；替换后的前几次跳跃识别失败明显增多时自动回滚到上一个模型。
+更新模型不需要重启进程，跳跃循环不中断
+"""
+
+import collections
+import os
+import queue
+import shutil
+import signal
+import tempfile
+import threading
+import time
+
+from detection_cache import CachedDetector, make_params_key, weights_hash
+from event_log import log
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def _signature(path: str):
+    """文件的 (大小, 修改时间)，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _pid_alive(pid: int) -> bool:
+    """进程是否还在运行"""
+    if os.name == "nt":
+        # Windows上 os.kill(pid, 0) 会结束目标进程
+        import psutil
+
+        return psutil.pid_exists(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # 其他用户的进程
+    return True
+
+
+def _owner_pid(name: str):
+    """快照 <哈希>.<pid>.pt 或临时文件 incoming_<pid>_*.tmp 所属的进程号，其他文件返回None"""
+    if name.startswith("incoming_") and name.endswith(".tmp"):
+        field = name[len("incoming_"):].split("_", 1)[0]
+    elif name.endswith(".pt") and name.count(".") == 2:
+        field = name.split(".")[1]
+    else:
+        return None
+    return int(field) if field.isdigit() else None
+
+
+class ModelReloader:
+    """在后台准备新模型，由跳跃循环在两次跳跃之间调用 maybe_swap() 完成替换"""
+
+    def __init__(
+        self,
+        jump,
+        watch: bool = True,
+        canary_dir: str = "./dataset/canary",
+        snapshot_dir: str = "./dataset/model_snapshots",
+        poll_interval: float = 5.0,
+        max_ok_drop: float = 0.05,
+        distance_tolerance: float = 0.1,
+        max_disagreement: float = 0.2,
+        probation_jumps: int = 10,
+        max_failure_increase: float = 0.3,
+    ):
+        """
+        启动后台线程
+
+        Args:
+            jump: Jump实例
+            watch: 是否监视模型文件的变化（否则只响应 request_reload/SIGHUP）
+            canary_dir: 金丝雀截图目录，为空时只检查新模型能否加载和推理
+            snapshot_dir: 通过验证的权重快照目录（模型文件之后被覆盖也不影响正在用的模型），
+                可以由同一台机器上的多个进程共用：每个进程使用自己的快照文件
+                （内容相同时硬链接到已有的快照，不重复占用磁盘），只清理自己的快照，
+                启动时清理已退出进程留下的快照
+            poll_interval: 检查模型文件的间隔（秒）
+            max_ok_drop: 新模型在金丝雀集上成功选出目标的比例最多比当前模型低多少
+            distance_tolerance: 距离相差超过这个比例算作不一致
+            max_disagreement: 两个模型都选出目标的截图中，距离不一致的最大比例
+            probation_jumps: 切换后观察多少次跳跃，也是切换前用来对比的跳跃数
+            max_failure_increase: 观察期内识别失败率比切换前高出多少时回滚
+        """
+        self.jump = jump
+        self.watch_path = jump.model_path
+        self.canary_dir = canary_dir
+        self.snapshot_dir = snapshot_dir
+        self.poll_interval = poll_interval
+        self.max_ok_drop = max_ok_drop
+        self.distance_tolerance = distance_tolerance
+        self.max_disagreement = max_disagreement
+        self.probation_jumps = probation_jumps
+        self.max_failure_increase = max_failure_increase
+        self.previous = None
+        self.last_report = None
+        self._pid = os.getpid()  # 快照文件名中的进程号
+        self._created = set()  # 本进程的快照，清理时只删除这些
+        self._recent = collections.deque(maxlen=probation_jumps)  # 最近的跳跃是否识别失败
+        self._baseline = None  # 切换前的识别失败率，不在观察期时为None
+        self._requests = queue.Queue()
+        self._ready = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._loaded_signature = _signature(self.watch_path)
+
+        jump.metrics.register_counter("model_reloads_total", "result")
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self._remove_stale_snapshots()
+        if os.path.isfile(jump.model_path):
+            # 正在使用的权重也固定为快照：模型文件被覆盖后，验证时的对照和
+            # 内存看门狗的重新加载仍然用的是这份权重
+            _, jump.model_path = self._snapshot(jump.model_path)
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        if watch:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def request_reload(self, path: str = None):
+        """请求加载新模型（默认重新加载监视的模型文件），可以在任意线程或信号处理函数中调用"""
+        self._requests.put(path or self.watch_path)
+
+    def install_signal_handler(self):
+        """收到SIGHUP时重新加载模型（kill -HUP <pid>），Windows上没有SIGHUP时不做处理"""
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.request_reload())
+
+    def maybe_swap(self) -> bool:
+        """
+        在两次跳跃之间调用：有验证通过的新模型时替换当前模型
+
+        Returns:
+            bool: 是否替换了模型
+        """
+        with self._lock:
+            ready, self._ready = self._ready, None
+        if ready is None:
+            return False
+
+        jump = self.jump
+        self.previous = self._swap(ready)
+        # 进入观察期：和切换前最近几次跳跃的识别失败率对比
+        self._baseline = sum(self._recent) / len(self._recent) if self._recent else 0.0
+        self._recent.clear()
+        jump.metrics.inc("model_reloads_total", "swapped")
+        if jump.warmup_report:
+            log.info(
+                "model_swapped",
+                "🔁 已切换到新模型 {path} (预热后 {warm_ms}ms)",
+                path=jump.model_path,
+                warm_ms=jump.warmup_report["warm_ms"],
+            )
+        else:
+            log.info("model_swapped", "🔁 已切换到新模型 {path}", path=jump.model_path)
+        self._prune_snapshots()
+        return True
+
+    def rollback(self) -> bool:
+        """
+        回滚到上一个模型（在两次跳跃之间调用）
+
+        Returns:
+            bool: 是否回滚了（没有上一个模型时返回False）
+        """
+        if self.previous is None:
+            return False
+        self.previous = self._swap(self.previous)
+        self._baseline = None
+        self._recent.clear()
+        self.jump.metrics.inc("model_reloads_total", "rolled_back")
+        log.warning("model_rolled_back", "↩️ 已回滚到模型 {path}", path=self.jump.model_path)
+        return True
+
+    def observe(self, result: dict) -> bool:
+        """
+        每次跳跃后调用：切换后的观察期内识别失败率明显高于切换前时回滚
+
+        Args:
+            result: Jump.jump 的返回值
+
+        Returns:
+            bool: 是否回滚了
+        """
+        self._recent.append(bool(result.get("reason")))
+        if self._baseline is None or len(self._recent) < self.probation_jumps:
+            return False
+
+        baseline, self._baseline = self._baseline, None
+        failure_rate = sum(self._recent) / len(self._recent)
+        if failure_rate <= baseline + self.max_failure_increase:
+            log.info(
+                "model_probation_passed",
+                "✅ 新模型观察期通过: 识别失败率 {failure_rate:.0%} (切换前 {baseline:.0%})",
+                failure_rate=failure_rate,
+                baseline=baseline,
+            )
+            return False
+        log.warning(
+            "model_probation_failed",
+            "⚠️ 新模型切换后识别失败率 {failure_rate:.0%} (切换前 {baseline:.0%})，回滚",
+            failure_rate=failure_rate,
+            baseline=baseline,
+        )
+        return self.rollback()
+
+    def _swap(self, state: dict) -> dict:
+        """一次性替换模型和与之对应的缓存键，返回替换前的状态"""
+        jump = self.jump
+        current = {
+            "model": jump.model,
+            "path": jump.model_path,
+            "params_key": jump.cache_params,
+            "warmup": jump.warmup_report,
+        }
+        jump.model, jump.model_path, jump.cache_params, jump.warmup_report = (
+            state["model"],
+            state["path"],
+            state["params_key"],
+            state["warmup"],
+        )
+        return current
+
+    def close(self):
+        """停止后台线程"""
+        self._closed.set()
+        self._requests.put(None)
+
+    def _watch(self):
+        """模型文件变化且大小和修改时间连续两次相同（写完了）时请求重新加载"""
+        pending = None
+        while not self._closed.wait(self.poll_interval):
+            signature = _signature(self.watch_path)
+            if signature is None or signature == self._loaded_signature:
+                pending = None
+                continue
+            if signature == pending:
+                self._loaded_signature = signature
+                log.info("model_changed", "📦 模型文件已更新: {path}", path=self.watch_path)
+                self.request_reload()
+                pending = None
+            else:
+                pending = signature
+
+    def _run(self):
+        while True:
+            path = self._requests.get()
+            if path is None or self._closed.is_set():
+                return
+            try:
+                self._prepare(path)
+            except Exception as e:
+                self.jump.metrics.inc("model_reloads_total", "failed")
+                log.error(
+                    "model_reload_failed",
+                    "❌ 新模型 {path} 加载失败，继续使用当前模型: {error}",
+                    path=path,
+                    error=str(e),
+                )
+
+    def _prepare(self, path: str):
+        """复制快照、加载、预热、验证，通过后交给 maybe_swap()"""
+        from ultralytics import YOLO
+
+        digest, snapshot = self._snapshot(path)
+        # 与正在使用的权重比较（缓存键的第一段），模型文件本身可能已经被覆盖
+        if digest == self.jump.cache_params.split("|", 1)[0]:
+            log.info("model_unchanged", "📦 模型内容没有变化，不需要切换")
+            return
+
+        start = time.perf_counter()
+        model = YOLO(snapshot)
+        warmup = self.jump.warm_up(model)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        ok, report = self._validate(model, snapshot)
+        report.update(path=path, snapshot=snapshot, load_ms=round(load_ms, 1))
+        self.last_report = report
+        if not ok:
+            self.jump.metrics.inc("model_reloads_total", "rejected")
+            log.error(
+                "model_rejected",
+                "❌ 新模型未通过金丝雀验证，保留当前模型: 成功率 {candidate_ok:.0%} "
+                "(当前 {current_ok:.0%}), 距离不一致 {disagreement:.0%}",
+                **report,
+            )
+            self._prune_snapshots()
+            return
+
+        log.info(
+            "model_validated",
+            "✅ 新模型通过金丝雀验证 ({canaries}张), 加载+预热 {load_ms:.0f}ms，下一次跳跃前切换",
+            **report,
+        )
+        with self._lock:
+            self._ready = {
+                "model": model,
+                "path": snapshot,
+                "params_key": make_params_key(snapshot, **self.jump.predict_params),
+                "warmup": warmup,
+            }
+
+    def _snapshot(self, path: str) -> tuple:
+        """
+        把权重复制为以内容哈希和进程号命名的快照，之后只从快照加载
+
+        Returns:
+            tuple: (权重哈希, 快照路径)
+        """
+        pid = self._pid
+        # 每次复制用独立的临时文件，多个进程共用快照目录时不会互相覆盖
+        fd, incoming = tempfile.mkstemp(
+            prefix=f"incoming_{pid}_", suffix=".tmp", dir=self.snapshot_dir
+        )
+        os.close(fd)
+        try:
+            shutil.copyfile(path, incoming)
+            digest = weights_hash(incoming)
+        except BaseException:
+            os.remove(incoming)
+            raise
+        snapshot = os.path.abspath(os.path.join(self.snapshot_dir, f"{digest}.{pid}.pt"))
+        if os.path.exists(snapshot):
+            os.remove(incoming)
+        elif self._link_existing(digest, snapshot):
+            os.remove(incoming)
+        else:
+            os.replace(incoming, snapshot)
+        self._created.add(snapshot)
+        return digest, snapshot
+
+    def _link_existing(self, digest: str, snapshot: str) -> bool:
+        """
+        其他进程已有内容相同的快照时硬链接过来：文件归本进程所有，
+        对方删除自己的快照也不影响，两者共用同一份磁盘数据
+
+        Returns:
+            bool: 是否链接成功（没有相同的快照或文件系统不支持硬链接时返回False）
+        """
+        prefix = f"{digest}."
+        for name in os.listdir(self.snapshot_dir):
+            if not name.startswith(prefix) or _owner_pid(name) is None:
+                continue
+            try:
+                os.link(os.path.join(self.snapshot_dir, name), snapshot)
+                return True
+            except OSError:
+                continue  # 对方刚好删除了快照，或者不支持硬链接
+        return False
+
+    def _remove_stale_snapshots(self):
+        """删除已退出的进程留下的快照和临时文件"""
+        for name in os.listdir(self.snapshot_dir):
+            pid = _owner_pid(name)
+            if pid is None or pid == self._pid or _pid_alive(pid):
+                continue
+            try:
+                os.remove(os.path.join(self.snapshot_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def canary_images(self) -> list:
+        """金丝雀截图列表"""
+        if not self.canary_dir or not os.path.isdir(self.canary_dir):
+            return []
+        return sorted(
+            os.path.join(self.canary_dir, name)
+            for name in os.listdir(self.canary_dir)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    def _validate(self, model, snapshot: str) -> tuple:
+        """
+        在金丝雀截图上对比新旧模型的目标选择结果
+
+        当前模型的结果走检测缓存（只在未命中时另外加载一份当前权重），
+        不和跳跃循环争用正在使用的模型对象
+
+        Returns:
+            tuple: (是否通过, 报告)
+        """
+        import cv2
+
+        from main import select_target
+
+        paths = self.canary_images()
+        report = {
+            "canaries": len(paths),
+            "current_ok": 0.0,
+            "candidate_ok": 0.0,
+            "disagreement": 0.0,
+        }
+        if not paths:
+            log.warning(
+                "no_canaries",
+                "⚠️ 没有金丝雀截图 ({dir})，只检查了新模型能否加载和推理",
+                dir=self.canary_dir,
+            )
+            return True, report
+
+        params = self.jump.predict_params
+        cache = self.jump.cache
+        current = CachedDetector(self.jump.model_path, cache=cache, **params)
+        candidate = CachedDetector(snapshot, cache=cache, **params)
+        candidate._model = model
+
+        frames = [frame for frame in (cv2.imread(path) for path in paths) if frame is not None]
+        current_decisions = [select_target(d) for d in current.detect_batch(frames)]
+        candidate_decisions = [select_target(d) for d in candidate.detect_batch(frames)]
+
+        current_ok = [not d["reason"] for d in current_decisions]
+        candidate_ok = [not d["reason"] for d in candidate_decisions]
+        both = [
+            (a["distance"], b["distance"])
+            for a, b, ok_a, ok_b in zip(
+                current_decisions, candidate_decisions, current_ok, candidate_ok
+            )
+            if ok_a and ok_b
+        ]
+        disagree = sum(
+            1 for a, b in both if abs(b - a) > self.distance_tolerance * max(a, 1.0)
+        )
+        report.update(
+            canaries=len(frames),
+            current_ok=sum(current_ok) / len(frames) if frames else 0.0,
+            candidate_ok=sum(candidate_ok) / len(frames) if frames else 0.0,
+            disagreement=disagree / len(both) if both else 0.0,
+        )
+        ok = (
+            report["candidate_ok"] >= report["current_ok"] - self.max_ok_drop
+            and report["disagreement"] <= self.max_disagreement
+        )
+        return ok, report
+
+    def _prune_snapshots(self):
+        """删除本进程的、不再是当前或上一个模型的快照"""
+        keep = {os.path.abspath(self.jump.model_path)}
+        if self.previous:
+            keep.add(os.path.abspath(self.previous["path"]))
+        for path in list(self._created - keep):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._created.discard(path)
@@ -1,18 +1,30 @@
-from ultralytics import YOLO
+import cv2
 import numpy as np
 import os
 import glob
 
-model = YOLO("./runs/detect/humen/weights/best.pt")
+from debug_overlay import draw_overlay
+from warm_worker import get_detector
+
+# 检测结果有缓存，重新生成预标注时已经处理过的图片不再推理；常驻推理进程在运行时交给它检测
+detector = get_detector(
+    "./runs/detect/humen/weights/best.pt", imgsz=640, conf=0.7, iou=0.1
+)
 
 def get_boxes(filename: str):
-    results = model.predict(filename, imgsz=640, conf=0.7, iou=0.1, verbose=False)
-    results[0].show()
-    boxes = results[0].boxes
-    boxes_xywhn = boxes.xywhn.cpu().numpy()
+    frame = cv2.imread(filename)
+    detections = detector.detect(frame)
+    cv2.imshow("predict", draw_overlay(frame, detections, {}))
+    cv2.waitKey(1)
+    height, width = frame.shape[:2]
+    x1, y1, x2, y2 = detections[:, 0], detections[:, 1], detections[:, 2], detections[:, 3]
+    boxes_xywhn = np.stack(
+        [(x1 + x2) / 2 / width, (y1 + y2) / 2 / height, (x2 - x1) / width, (y2 - y1) / height],
+        axis=1,
+    )
     # 转为字符串
     boxes_xywhn_str = boxes_xywhn.astype(str)
-    boxes_label = boxes.cls.cpu().numpy().astype(int).astype(str)
+    boxes_label = detections[:, 5].astype(int).astype(str)
 
     res = ""
 
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跳跃循环的内置性能剖析
+对N次跳跃做确定性剖析（cProfile）和/或栈采样，预热跳跃和稳定阶段分开统计，
+输出火焰图可用的折叠栈（flamegraph.pl / speedscope）和pstats文件，
+并按我们的代码、ultralytics、torch和其他分类列出自身耗时最多的函数
+"""
+
+import argparse
+import collections
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+CATEGORIES = ("ours", "ultralytics", "torch", "other")
+
+
+def categorize(filename: str) -> str:
+    """按源文件路径把函数归到我们的代码、ultralytics、torch或其他"""
+    path = filename.replace("\\", "/")
+    if filename.startswith(("~", "<")):  # 内置函数和动态生成的代码
+        return "other"
+    if "/ultralytics/" in path:
+        return "ultralytics"
+    if "/torch/" in path or "/torchvision/" in path:
+        return "torch"
+    if os.path.abspath(filename).startswith(PROJECT_DIR) and "site-packages" not in path:
+        return "ours"
+    return "other"
+
+
+def frame_label(code) -> str:
+    """折叠栈中的一帧：文件名:函数名:行号（不含分号）"""
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+class StackSampler:
+    """后台线程定时采样目标线程的调用栈"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """
+        Args:
+            thread_id: 被采样的线程
+            interval: 采样间隔（秒）
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.phase = None  # None表示暂停采样
+        self.stacks = collections.defaultdict(collections.Counter)
+        self.leaves = collections.defaultdict(collections.Counter)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            phase = self.phase
+            if phase is None:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            leaf = frame.f_code
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[phase][";".join(stack)] += 1
+            self.leaves[phase][(leaf.co_filename, leaf.co_firstlineno, leaf.co_name)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join(timeout=1.0)
+
+
+class JumpProfiler:
+    """按跳跃分段剖析：前warmup次记为预热，之后jumps次记为稳定阶段"""
+
+    def __init__(
+        self,
+        jumps: int = 20,
+        warmup: int = 3,
+        mode: str = "cprofile",
+        output: str = "./profiles",
+        interval: float = 0.005,
+        top: int = 15,
+    ):
+        """
+        初始化剖析器
+
+        Args:
+            jumps: 稳定阶段剖析的跳跃次数
+            warmup: 预热跳跃次数（包含模型首次推理等一次性开销）
+            mode: cprofile（确定性剖析+采样，输出pstats）或 sample（只采样，开销更低）
+            output: 输出目录
+            interval: 采样间隔（秒）
+            top: 报告中列出的函数数
+        """
+        if mode not in ("cprofile", "sample"):
+            raise ValueError(f"未知的剖析模式: {mode}")
+        self.jumps = jumps
+        self.warmup = warmup
+        self.mode = mode
+        self.output = os.path.join(output, time.strftime("profile_%Y%m%d_%H%M%S"))
+        self.top = top
+        self.count = 0
+        self.seconds = collections.Counter()
+        self.finished = False
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.profiles = {}
+        if mode == "cprofile":
+            self.profiles = {"warmup": cProfile.Profile(), "steady": cProfile.Profile()}
+
+    @property
+    def phase(self) -> str:
+        return "warmup" if self.count < self.warmup else "steady"
+
+    @property
+    def done(self) -> bool:
+        return self.count >= self.warmup + self.jumps
+
+    @contextmanager
+    def jump(self):
+        """包住一次跳跃：with profiler.jump(): jump.jump(k)"""
+        if self.done:
+            yield
+            return
+        phase = self.phase
+        profile = self.profiles.get(phase)
+        start = time.perf_counter()
+        self.sampler.phase = phase
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            self.sampler.phase = None
+            self.seconds[phase] += time.perf_counter() - start
+            self.count += 1
+            if self.done:
+                self.finish()
+
+    def _self_times(self, phase: str) -> list:
+        """[(自身耗时秒, 分类, 函数描述)]，从大到小"""
+        rows = []
+        profile = self.profiles.get(phase)
+        if profile:
+            stats = pstats.Stats(profile).stats
+            for (filename, line, name), (_, _, tottime, _, callers) in stats.items():
+                if filename == "~" and callers:
+                    # 内置/C函数（torch.conv2d、cv2.imwrite等）按耗时最多的调用方归类
+                    caller = max(callers, key=lambda key: callers[key][2])
+                    category = categorize(caller[0])
+                else:
+                    category = categorize(filename)
+                function = f"{name} ({os.path.basename(filename)}:{line})"
+                rows.append((tottime, category, function))
+        else:
+            interval = self.sampler.interval
+            for (filename, line, name), samples in self.sampler.leaves[phase].items():
+                function = f"{name} ({os.path.basename(filename)}:{line})"
+                rows.append((samples * interval, categorize(filename), function))
+        return sorted(rows, reverse=True)
+
+    def finish(self) -> dict:
+        """停止剖析，写出文件并打印报告（可以重复调用）"""
+        if self.finished:
+            return self.summary
+        self.finished = True
+        self.sampler.stop()
+        os.makedirs(self.output, exist_ok=True)
+
+        self.summary = {}
+        for phase in ("warmup", "steady"):
+            if phase == "warmup":
+                jumps = min(self.count, self.warmup)
+            else:
+                jumps = max(0, self.count - self.warmup)
+            if not jumps:
+                continue
+
+            collapsed = os.path.join(self.output, f"{phase}.collapsed")
+            with open(collapsed, "w", encoding="utf-8") as f:
+                for stack, samples in self.sampler.stacks[phase].most_common():
+                    f.write(f"{stack} {samples}\n")
+            if phase in self.profiles:
+                self.profiles[phase].dump_stats(os.path.join(self.output, f"{phase}.pstats"))
+
+            rows = self._self_times(phase)
+            by_category = collections.Counter()
+            for seconds, category, _ in rows:
+                by_category[category] += seconds
+            self.summary[phase] = {
+                "jumps": jumps,
+                "seconds_per_jump": self.seconds[phase] / jumps,
+                "categories": dict(by_category),
+                "top": rows[: self.top],
+            }
+            self._print_phase(phase, self.summary[phase])
+
+        print(f"💾 剖析结果已保存: {self.output}")
+        print(f"💡 火焰图: flamegraph.pl {self.output}/steady.collapsed > steady.svg")
+        return self.summary
+
+    @staticmethod
+    def _print_phase(phase: str, summary: dict):
+        name = "预热" if phase == "warmup" else "稳定阶段"
+        total = sum(summary["categories"].values()) or 1.0
+        print(
+            f"\n🔬 {name}: {summary['jumps']} 次跳跃, "
+            f"平均 {summary['seconds_per_jump'] * 1000:.1f}ms/次"
+        )
+        shares = ", ".join(
+            f"{category} {summary['categories'].get(category, 0.0) / total:.0%}"
+            for category in CATEGORIES
+        )
+        print(f"   自身耗时分布: {shares}")
+        for seconds, category, function in summary["top"]:
+            per_jump = seconds / summary["jumps"] * 1000
+            print(f"   {per_jump:>8.2f}ms/次  [{category:<11}] {function}")
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """给命令行加上剖析相关参数"""
+    parser.add_argument("--profile", type=int, metavar="N", help="剖析N次稳定阶段的跳跃")
+    parser.add_argument("--profile-warmup", type=int, default=3, help="单独统计的预热跳跃次数")
+    parser.add_argument(
+        "--profile-mode", choices=["cprofile", "sample"], default="cprofile", help="剖析方式"
+    )
+    parser.add_argument("--profile-output", default="./profiles", help="剖析结果目录")
+
+
+def profiler_from_args(args) -> JumpProfiler:
+    """根据命令行参数创建剖析器，未指定 --profile 时返回None"""
+    if not args.profile:
+        return None
+    return JumpProfiler(
+        jumps=args.profile,
+        warmup=args.profile_warmup,
+        mode=args.profile_mode,
+        output=args.profile_output,
+    )
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线回放工具
+用ReplayDeviceController把录制的帧全速送入Jump.predict/Jump.jump，
+统计各阶段耗时分布和决策结果，无需手机或Windows窗口
+"""
+
+import argparse
+import json
+import os
+import time
+from functools import wraps
+
+import numpy as np
+
+from device_controller import ReplayDeviceController
+from main import Jump
+
+
+def summarize_latencies(samples: list) -> dict:
+    """
+    计算耗时分布
+
+    Args:
+        samples: 耗时列表，单位毫秒
+
+    Returns:
+        dict: count/mean/p50/p90/p99/max
+    """
+    if not samples:
+        return {"count": 0}
+
+    values = np.asarray(samples, dtype=np.float64)
+    return {
+        "count": int(values.size),
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p90": round(float(np.percentile(values, 90)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def _timed(samples: list, func):
+    """包装函数，把每次调用的耗时（毫秒）追加到samples"""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            samples.append((time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+def run_replay(
+    model_path: str,
+    source: str,
+    k: float = 1.61,
+    max_jumps: int = None,
+    screenshot_path: str = "./replay_screenshot.png",
+) -> dict:
+    """
+    回放帧并统计各阶段耗时
+
+    Args:
+        model_path: 模型文件路径
+        source: 帧目录或录制会话目录
+        k: 跳跃系数
+        max_jumps: 最多回放的跳跃次数，默认回放全部帧
+        screenshot_path: 回放时的临时截图路径
+
+    Returns:
+        dict: 包含stages（各阶段耗时分布）和decisions（每次跳跃的决策）
+    """
+    controller = ReplayDeviceController(source)
+    # 回放是为了测量各阶段耗时：重复回放不能命中检测缓存，预测结果图片也不写入dataset
+    jump = Jump(model_path, controller, cache=False, save_folder=False)
+
+    stages = {"capture": [], "predict": [], "tap": [], "jump": []}
+    jump.screenshot = _timed(stages["capture"], jump.screenshot)
+    jump.predict = _timed(stages["predict"], jump.predict)
+    jump.tap = _timed(stages["tap"], jump.tap)
+
+    decisions = []
+    wall_start = time.perf_counter()
+    while not controller.exhausted:
+        if max_jumps is not None and len(decisions) >= max_jumps:
+            break
+
+        start = time.perf_counter()
+        decision = jump.jump(k=k, screenshot_path=screenshot_path)
+        stages["jump"].append((time.perf_counter() - start) * 1000)
+
+        decision["frame"] = controller.current_frame
+        decisions.append(decision)
+    wall_seconds = time.perf_counter() - wall_start
+
+    return {
+        "model": model_path,
+        "source": source,
+        "k": k,
+        "jumps": len(decisions),
+        "wall_seconds": round(wall_seconds, 3),
+        "jumps_per_second": round(len(decisions) / wall_seconds, 3)
+        if wall_seconds > 0
+        else 0.0,
+        "skipped_settle_seconds": round(controller.settled_seconds, 3),
+        "stages": {name: summarize_latencies(v) for name, v in stages.items()},
+        "decisions": decisions,
+    }
+
+
+def print_report(report: dict):
+    """打印回放报告"""
+    print(f"\n📊 回放结果: {report['jumps']} 次跳跃, 用时 {report['wall_seconds']}s")
+    print(f"   吞吐: {report['jumps_per_second']} 次/秒")
+    print(f"   跳过的等待时间: {report['skipped_settle_seconds']}s")
+    print(f"\n⏱️ 各阶段耗时 (ms):")
+    for name, stats in report["stages"].items():
+        if stats["count"] == 0:
+            continue
+        print(
+            f"   {name:<8} p50={stats['p50']:>8.2f}  p90={stats['p90']:>8.2f}  "
+            f"p99={stats['p99']:>8.2f}  max={stats['max']:>8.2f}"
+        )
+
+    skipped = sum(1 for d in report["decisions"] if d["distance"] == 0)
+    print(f"\n🎯 决策: {report['jumps'] - skipped} 次有效, {skipped} 次距离为0")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="跳一跳离线回放工具")
+    parser.add_argument("--model", default="./best.pt", help="模型文件路径")
+    parser.add_argument("--source", required=True, help="帧目录或录制会话目录")
+    parser.add_argument("--k", type=float, default=1.61, help="跳跃系数")
+    parser.add_argument("--max-jumps", type=int, help="最多回放的跳跃次数")
+    parser.add_argument("--output", help="JSON报告输出路径")
+
+    args = parser.parse_args()
+
+    print("🔁 跳一跳离线回放")
+    print("=" * 50)
+
+    report = run_replay(args.model, args.source, k=args.k, max_jumps=args.max_jumps)
+    print_report(report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 报告已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
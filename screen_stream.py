@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+screenrecord视频流截图
+只启动一次 `adb exec-out screenrecord --output-format=h264 -`，在主机上持续解码H.264，
+随时提供最新一帧，不再每次 screencap + pull；screenrecord最长只能录3分钟，
+快到时限前先启动下一段录制，新的一段出帧后再停掉旧的，画面不中断
+
+解码优先用PyAV（pip install av），没有时用ffmpeg管道
+"""
+
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from device_controller import DeviceController
+from event_log import log
+
+# H.264访问单元分隔符（NAL类型9），解析器见到它就认为上一帧已经结束
+ACCESS_UNIT_DELIMITER = b"\x00\x00\x00\x01\x09\xf0"
+
+
+def screenrecord_command(
+    adb: list = None, time_limit: int = 180, bit_rate: int = 8000000, size: tuple = None
+) -> list:
+    """
+    screenrecord输出H.264裸流到标准输出的命令
+
+    Args:
+        adb: adb命令前缀（如 ["adb", "-s", "序列号"]）
+        time_limit: 单段录制时长上限（秒），screenrecord最多180
+        bit_rate: 码率
+        size: 录制尺寸 (width, height)，默认为屏幕尺寸；缩小后距离的像素单位也随之变化
+
+    Returns:
+        list: 命令参数
+    """
+    command = list(adb or ["adb"]) + [
+        "exec-out",
+        "screenrecord",
+        "--output-format=h264",
+        f"--time-limit={time_limit}",
+        f"--bit-rate={bit_rate}",
+    ]
+    if size:
+        command.append(f"--size={size[0]}x{size[1]}")
+    return command + ["-"]
+
+
+def available_decoder() -> str:
+    """可用的解码方式：pyav、ffmpeg，都没有时为None"""
+    try:
+        import av  # noqa: F401
+
+        return "pyav"
+    except ImportError:
+        pass
+    return "ffmpeg" if shutil.which("ffmpeg") else None
+
+
+class _Segment:
+    """一段录制：screenrecord进程和把它的输出解码为帧的线程"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.frames = 0
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            stream.command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0
+        )
+        self.ffmpeg = None
+        if stream.decoder == "pyav":
+            target = self._decode_pyav
+        else:
+            target = self._decode_ffmpeg
+        self.thread = threading.Thread(target=target, daemon=True)
+        self.thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.thread.is_alive()
+
+    @property
+    def age(self) -> float:
+        return time.perf_counter() - self.started
+
+    def _publish(self, frame):
+        self.frames += 1
+        self.stream._publish(frame)
+
+    def _chunks(self):
+        """
+        逐块读取screenrecord的输出，结束时返回
+
+        解析器要等到下一帧开始才输出当前帧；画面静止时screenrecord不再出帧，
+        收到数据后一段时间没有新数据就产出一次空块，由解码方式冲刷解析器，最后一帧不会被扣住
+        """
+        chunks = queue.Queue()
+
+        def read():
+            while True:
+                chunk = self.process.stdout.read(1 << 16)
+                chunks.put(chunk)
+                if not chunk:
+                    return
+
+        threading.Thread(target=read, daemon=True).start()
+        pending = False
+        while True:
+            try:
+                chunk = chunks.get(timeout=self.stream.idle_flush if pending else None)
+            except queue.Empty:
+                pending = False
+                yield b""
+                continue
+            if not chunk:
+                return
+            pending = True
+            yield chunk
+
+    def _decode_pyav(self):
+        import av
+
+        codec = av.CodecContext.create("h264", "r")
+        for chunk in self._chunks():
+            try:
+                # 空块冲刷解析器
+                for packet in codec.parse(chunk):
+                    for frame in codec.decode(packet):
+                        self._publish(frame.to_ndarray(format="bgr24"))
+            except av.error.FFmpegError as e:
+                # 录制刚开始或传输出错时可能有不完整的帧，跳过等下一个关键帧
+                log.debug("stream_decode_error", "解码错误: {error}", error=str(e))
+
+    def _decode_ffmpeg(self):
+        width, height = self.stream.frame_size
+        # 不用 -fflags nobuffer：ffmpeg 7 下读取管道时会一帧都不输出
+        self.ffmpeg = subprocess.Popen(
+            [
+                "ffmpeg",
+                "-loglevel",
+                "error",
+                "-flags",
+                "low_delay",
+                "-probesize",
+                "32",
+                "-f",
+                "h264",
+                "-i",
+                "pipe:0",
+                "-s",
+                f"{width}x{height}",
+                "-pix_fmt",
+                "bgr24",
+                "-flush_packets",
+                "1",
+                "-f",
+                "rawvideo",
+                "pipe:1",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        threading.Thread(target=self._feed_ffmpeg, daemon=True).start()
+        frame_bytes = width * height * 3
+        while True:
+            data = self.ffmpeg.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                return
+            self._publish(np.frombuffer(data, np.uint8).reshape(height, width, 3))
+
+    def _feed_ffmpeg(self):
+        """把录制输出转给ffmpeg；空闲时写入访问单元分隔符，ffmpeg的解析器随即输出扣住的最后一帧"""
+        stdin = self.ffmpeg.stdin
+        try:
+            for chunk in self._chunks():
+                stdin.write(chunk or ACCESS_UNIT_DELIMITER)
+                stdin.flush()
+        except (BrokenPipeError, ValueError):
+            return  # ffmpeg已退出或已停止
+        finally:
+            try:
+                stdin.close()  # 录制结束后ffmpeg读到结尾，解码完剩余数据后退出
+            except OSError:
+                pass
+
+    def stop(self, timeout: float = 5.0):
+        """停止录制进程并等待解码线程结束"""
+        for process in (self.process, self.ffmpeg):
+            if process is not None and process.poll() is None:
+                process.terminate()
+        for process in (self.process, self.ffmpeg):
+            if process is not None:
+                try:
+                    process.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        self.thread.join(timeout)
+
+
+class ScreenrecordStream:
+    """持续解码screenrecord的H.264输出，latest() 随时返回最新一帧"""
+
+    def __init__(
+        self,
+        command: list,
+        decoder: str = "auto",
+        frame_size: tuple = None,
+        restart_after: float = 170.0,
+        handover_timeout: float = 5.0,
+        idle_flush: float = 0.05,
+    ):
+        """
+        启动第一段录制
+
+        Args:
+            command: 输出H.264裸流到标准输出的命令（screenrecord_command）
+            decoder: auto、pyav 或 ffmpeg
+            frame_size: 帧尺寸 (width, height)，ffmpeg解码时必需
+            restart_after: 一段录制运行多久后切换到下一段（秒），应小于 --time-limit
+            handover_timeout: 等待下一段出第一帧的最长时间（秒）
+            idle_flush: 没有新数据多久后输出解析器中扣住的最后一帧（秒）
+        """
+        if decoder == "auto":
+            decoder = available_decoder()
+        if decoder is None:
+            raise RuntimeError("没有可用的H.264解码器，请安装PyAV（pip install av）或ffmpeg")
+        if decoder == "ffmpeg" and not frame_size:
+            raise ValueError("ffmpeg解码需要指定帧尺寸")
+
+        self.command = command
+        self.decoder = decoder
+        self.frame_size = frame_size
+        self.restart_after = restart_after
+        self.handover_timeout = handover_timeout
+        self.idle_flush = idle_flush
+        self.frames = 0
+        self.restarts = 0
+        self._frame = None
+        self._frame_time = None
+        self._condition = threading.Condition()
+        self._closed = threading.Event()
+        self._segment = _Segment(self)
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+        log.info(
+            "stream_started",
+            "📹 视频流截图已启动 (解码: {decoder})",
+            decoder=decoder,
+        )
+
+    def _publish(self, frame):
+        with self._condition:
+            self._frame = frame
+            self._frame_time = time.perf_counter()
+            self.frames += 1
+            self._condition.notify_all()
+
+    def latest(self, timeout: float = 5.0, after: float = None):
+        """
+        最新解码的一帧
+
+        Args:
+            timeout: 还没有符合要求的帧时最多等待多久（秒）
+            after: 只要这个时刻（time.perf_counter）之后解码的帧，None表示任意帧
+
+        Returns:
+            np.ndarray: BGR图像，超时时为None
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._frame is not None
+                and (after is None or self._frame_time > after),
+                timeout,
+            )
+            if self._frame is None or (after is not None and self._frame_time <= after):
+                return None
+            return self._frame
+
+    @property
+    def frame_age(self) -> float:
+        """最新一帧解码后经过的时间（秒），画面静止时会一直增长"""
+        if self._frame_time is None:
+            return None
+        return time.perf_counter() - self._frame_time
+
+    def _supervise(self):
+        """录制快到时限时无缝切换到下一段，录制意外结束时重新启动"""
+        retry_at = 0.0
+        while not self._closed.wait(0.1):
+            current = self._segment
+            now = time.perf_counter()
+            if not current.alive:
+                if now < retry_at:
+                    continue
+                log.warning("stream_ended", "⚠️ 屏幕录制意外结束，重新启动")
+                current.stop()
+                self._segment = _Segment(self)
+                self.restarts += 1
+                retry_at = now + 1.0  # 立刻又结束时（如设备断开）不要频繁重启
+            elif current.age >= self.restart_after and now >= retry_at:
+                self._handover(current)
+                retry_at = time.perf_counter() + 1.0
+        self._segment.stop()
+
+    def _handover(self, current: _Segment):
+        """启动下一段，出帧后停掉当前段；下一段没有出帧时保留当前段"""
+        following = _Segment(self)
+        deadline = time.perf_counter() + self.handover_timeout
+        while following.frames == 0 and following.alive:
+            if time.perf_counter() > deadline or self._closed.wait(0.01):
+                break
+        if following.frames == 0:
+            following.stop()
+            log.warning("stream_handover_failed", "⚠️ 下一段录制没有出帧，继续使用当前录制")
+            return
+        self._segment = following
+        self.restarts += 1
+        current.stop()
+        log.info(
+            "stream_restarted",
+            "📹 已切换到新一段屏幕录制 (第{restarts}次)",
+            restarts=self.restarts,
+        )
+
+    def close(self):
+        """停止录制"""
+        self._closed.set()
+        self._supervisor.join()
+
+
+class ScreenrecordDeviceController(DeviceController):
+    """截图来自screenrecord视频流的控制器，按压等操作交给被包装的ADB控制器"""
+
+    def __init__(
+        self,
+        controller: DeviceController,
+        decoder: str = "auto",
+        bit_rate: int = 8000000,
+        size: tuple = None,
+        restart_after: float = 170.0,
+        frame_timeout: float = 5.0,
+        command: list = None,
+    ):
+        """
+        启动视频流
+
+        Args:
+            controller: ADB控制器（AdbDeviceController 或 AdbTouchDeviceController）
+            decoder: auto、pyav 或 ffmpeg
+            bit_rate: 码率
+            size: 录制尺寸 (width, height)，默认为屏幕尺寸
+            restart_after: 每段录制运行多久后切换到下一段（秒）
+            frame_timeout: 截图时等待按压之后的新帧（或第一帧）的最长时间（秒）
+            command: 自定义输出H.264裸流的命令（测试时用本地文件代替手机）
+        """
+        self.controller = controller
+        self.frame_timeout = frame_timeout
+        self.last_tap = None  # 上一次按压结束的时刻，截图只用这之后的帧
+        if command is None:
+            command = screenrecord_command(
+                getattr(controller, "adb", None), bit_rate=bit_rate, size=size
+            )
+        if decoder == "auto":
+            decoder = available_decoder()
+        frame_size = size
+        if decoder == "ffmpeg" and frame_size is None:
+            frame_size = controller.get_screen_size()
+        self.stream = ScreenrecordStream(
+            command, decoder, frame_size, restart_after=restart_after
+        )
+
+    def latest_frame(self):
+        """
+        按压之后的最新一帧（BGR），Jump 直接使用，不经过截图文件
+
+        按压后画面没有变化时screenrecord不出新帧，等待frame_timeout后退回最新一帧
+
+        Returns:
+            np.ndarray: BGR图像，还没有任何帧时为None
+        """
+        if self.last_tap is not None:
+            frame = self.stream.latest(self.frame_timeout, after=self.last_tap)
+            if frame is not None:
+                return frame
+            log.warning(
+                "stream_stale_frame",
+                "⚠️ 按压后 {timeout}s 内没有新画面，使用 {age:.1f}s 前的一帧",
+                timeout=self.frame_timeout,
+                age=self.stream.frame_age or 0.0,
+            )
+            return self.stream.latest(0)
+        return self.stream.latest(self.frame_timeout)
+
+    def screenshot(self, save_path: str = "./screenshot.png") -> bool:
+        """
+        把按压之后的最新一帧写入截图路径（需要文件时，如录制会话）
+
+        Args:
+            save_path: 截图保存路径
+
+        Returns:
+            bool: 截图是否成功
+        """
+        frame = self.latest_frame()
+        if frame is None:
+            log.error("stream_no_frame", "❌ 视频流中还没有画面")
+            return False
+        return bool(cv2.imwrite(save_path, frame, [cv2.IMWRITE_PNG_COMPRESSION, 1]))
+
+    def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
+        success = self.controller.tap(x, y, duration_ms)
+        self.last_tap = time.perf_counter()
+        self.last_press = getattr(self.controller, "last_press", None)
+        return success
+
+    def get_screen_size(self) -> tuple:
+        return self.controller.get_screen_size()
+
+    def settle(self, seconds: float) -> None:
+        self.controller.settle(seconds)
+
+    def close(self) -> None:
+        """停止视频流和被包装的控制器"""
+        self.stream.close()
+        if hasattr(self.controller, "close"):
+            self.controller.close()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跳跃会话统计
+把每次跳跃的结果（成功或失败原因）批量写入本地SQLite数据库，
+提供会话汇总以及按小时、按设备的汇总查询，用来跟踪多台设备的跳跃效率
+"""
+
+import argparse
+import os
+import platform
+import sqlite3
+import time
+
+# 跳跃结果：ok 或 select_target 的失败原因，外加点击失败和游戏结束
+OUTCOME_OK = "ok"
+OUTCOME_TAP_FAILED = "tap_failed"
+OUTCOME_GAME_OVER = "game_over"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    device TEXT NOT NULL,
+    model TEXT,
+    started REAL NOT NULL,
+    ended REAL
+);
+CREATE TABLE IF NOT EXISTS jumps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    t REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    distance REAL,
+    press_time INTEGER,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS jumps_session_t ON jumps(session_id, t);
+CREATE INDEX IF NOT EXISTS jumps_t ON jumps(t);
+"""
+
+
+def device_label(controller) -> str:
+    """
+    默认设备名：主机名/控制器类型，ADB控制再加上序列号，Windows窗口控制再加上窗口标题
+
+    录制、视频流等包装控制器按被包装的真实控制器命名，包装前后得到同一个设备名
+    """
+    while getattr(controller, "controller", None) is not None:
+        controller = controller.controller
+    parts = [platform.node(), type(controller).__name__]
+    for attribute in ("serial", "window_title"):
+        detail = getattr(controller, attribute, None)
+        if detail:
+            parts.append(detail)
+    return "/".join(parts)
+
+
+def jump_outcome(result: dict, previous_outcome: str = None) -> str:
+    """
+    根据 Jump.jump 的返回值判断本次跳跃的结果
+
+    上一跳正常起跳而这一帧找不到玩家，通常是上一跳没站稳、画面停在了结束页，记为游戏结束
+    """
+    reason = result.get("reason")
+    if reason:
+        if previous_outcome == OUTCOME_OK and reason in ("no_player", "no_detections"):
+            return OUTCOME_GAME_OVER
+        return reason
+    if not result.get("tapped", True):
+        return OUTCOME_TAP_FAILED
+    return OUTCOME_OK
+
+
+class SessionStats:
+    """会话统计，记录先放在内存里，攒够一批或超过间隔再写库"""
+
+    def __init__(
+        self,
+        db_path: str = "./dataset/session_stats.db",
+        device: str = "unknown",
+        model: str = None,
+        batch_size: int = 50,
+        flush_interval: float = 30.0,
+    ):
+        """
+        打开数据库并开始一个新会话
+
+        Args:
+            db_path: SQLite数据库路径
+            device: 设备名，见 device_label
+            model: 模型路径
+            batch_size: 攒够多少条记录写一次库
+            flush_interval: 最长写库间隔（秒）
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.last_outcome = None
+        self._last_flush = time.monotonic()
+
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO sessions (device, model, started) VALUES (?, ?, ?)",
+                (device, model, time.time()),
+            )
+        self.session_id = cursor.lastrowid
+
+    def record(self, result: dict, duration: float = None, outcome: str = None) -> str:
+        """
+        记录一次跳跃
+
+        Args:
+            result: Jump.jump 的返回值
+            duration: 本次跳跃耗时（秒）
+            outcome: 明确的结果（如模拟器给出的游戏结束），默认根据result判断
+
+        Returns:
+            str: 记录的结果
+        """
+        outcome = outcome or jump_outcome(result, self.last_outcome)
+        self.last_outcome = outcome
+        self.pending.append(
+            (
+                self.session_id,
+                time.time(),
+                outcome,
+                result.get("distance"),
+                result.get("press_time"),
+                duration,
+            )
+        )
+        if (
+            len(self.pending) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+        return outcome
+
+    def flush(self):
+        """把内存中的记录写入数据库"""
+        self._last_flush = time.monotonic()
+        if not self.pending:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO jumps (session_id, t, outcome, distance, press_time, duration) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self.pending,
+            )
+            self.db.execute(
+                "UPDATE sessions SET ended = ? WHERE id = ?", (time.time(), self.session_id)
+            )
+        self.pending = []
+
+    def close(self):
+        """写入剩余记录并关闭数据库"""
+        self.flush()
+        self.db.close()
+
+    def summary(self) -> dict:
+        """当前会话的汇总"""
+        self.flush()
+        return summarize(self.db, self.session_id)
+
+
+def summarize(db: sqlite3.Connection, session_id: int = None) -> dict:
+    """
+    会话汇总：跳跃数、成功率、每分钟跳跃数和失败原因分布
+
+    Args:
+        db: 数据库连接
+        session_id: 会话ID，None表示最近一次会话
+
+    Returns:
+        dict: 汇总结果，没有会话时返回空字典
+    """
+    if session_id is None:
+        row = db.execute("SELECT MAX(id) FROM sessions").fetchone()
+        session_id = row[0]
+        if session_id is None:
+            return {}
+
+    device, started, ended = db.execute(
+        "SELECT device, started, ended FROM sessions WHERE id = ?", (session_id,)
+    ).fetchone()
+    total, ok, first, last = db.execute(
+        "SELECT COUNT(*), SUM(outcome = 'ok'), MIN(t), MAX(t) FROM jumps WHERE session_id = ?",
+        (session_id,),
+    ).fetchone()
+    causes = dict(
+        db.execute(
+            "SELECT outcome, COUNT(*) FROM jumps WHERE session_id = ? AND outcome != 'ok' "
+            "GROUP BY outcome ORDER BY COUNT(*) DESC",
+            (session_id,),
+        ).fetchall()
+    )
+    minutes = ((last or 0) - (first or 0)) / 60
+    return {
+        "session_id": session_id,
+        "device": device,
+        "started": started,
+        "ended": ended,
+        "jumps": total,
+        "ok": ok or 0,
+        "success_rate": round((ok or 0) / total, 4) if total else 0.0,
+        "jumps_per_minute": round(total / minutes, 2) if minutes > 0 else None,
+        "failures": causes,
+    }
+
+
+def per_minute(db: sqlite3.Connection, session_id: int) -> list:
+    """会话内每分钟的跳跃数和成功数：[(分钟, 跳跃数, 成功数)]"""
+    return db.execute(
+        "SELECT strftime('%Y-%m-%d %H:%M', t, 'unixepoch', 'localtime') AS minute, "
+        "COUNT(*), SUM(outcome = 'ok') FROM jumps WHERE session_id = ? "
+        "GROUP BY minute ORDER BY minute",
+        (session_id,),
+    ).fetchall()
+
+
+def rollup(db: sqlite3.Connection, by: str = "hour", since: float = None) -> list:
+    """
+    按小时或按设备汇总所有会话
+
+    Args:
+        db: 数据库连接
+        by: hour（按本地时间的小时和设备）或 device
+        since: 只统计该时间戳之后的跳跃
+
+    Returns:
+        list: [{分组字段..., jumps, ok, success_rate, jumps_per_minute, game_over}]
+    """
+    if by == "hour":
+        group = "strftime('%Y-%m-%d %H:00', j.t, 'unixepoch', 'localtime') AS hour, s.device"
+        keys = ("hour", "device")
+    elif by == "device":
+        group = "s.device"
+        keys = ("device",)
+    else:
+        raise ValueError(f"未知的汇总方式: {by}")
+
+    # 先按会话分别计算跳跃时长（按小时汇总时是会话在该小时内的时长），再相加：
+    # 不把会话之间的空闲时间算进每分钟跳跃数
+    columns = ", ".join(keys)
+    rows = db.execute(
+        f"SELECT {columns}, SUM(jumps), SUM(ok), SUM(game_over), SUM(span), COUNT(*) FROM ("
+        f"SELECT {group}, COUNT(*) AS jumps, SUM(j.outcome = 'ok') AS ok, "
+        "SUM(j.outcome = 'game_over') AS game_over, MAX(j.t) - MIN(j.t) AS span "
+        "FROM jumps j JOIN sessions s ON s.id = j.session_id "
+        f"WHERE j.t >= ? GROUP BY {columns}, j.session_id"
+        f") GROUP BY {columns} ORDER BY {columns}",
+        (since or 0,),
+    ).fetchall()
+
+    report = []
+    for row in rows:
+        item = dict(zip(keys, row))
+        total, ok, game_over, span, sessions = row[len(keys) :]
+        minutes = span / 60
+        item.update(
+            jumps=total,
+            ok=ok,
+            success_rate=round(ok / total, 4) if total else 0.0,
+            game_over=game_over,
+            sessions=sessions,
+            jumps_per_minute=round(total / minutes, 2) if minutes > 0 else None,
+        )
+        report.append(item)
+    return report
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="跳一跳会话统计")
+    parser.add_argument(
+        "command", choices=["summary", "minutes", "hourly", "devices"], help="查询类型"
+    )
+    parser.add_argument("--db", default="./dataset/session_stats.db", help="数据库路径")
+    parser.add_argument("--session", type=int, help="会话ID（summary/minutes），默认最近一次")
+    parser.add_argument("--hours", type=float, help="只统计最近若干小时（hourly/devices）")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"❌ 数据库不存在: {args.db}")
+        return
+    db = sqlite3.connect(args.db)
+
+    if args.command in ("summary", "minutes"):
+        report = summarize(db, args.session)
+        if not report:
+            print("📭 还没有会话记录")
+            return
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(report["started"]))
+        print(f"📊 会话 {report['session_id']} ({report['device']}), 开始于 {started}")
+        if args.command == "minutes":
+            for minute, total, ok in per_minute(db, report["session_id"]):
+                print(f"   {minute}  跳跃={total:<4} 成功={ok}")
+            return
+        print(
+            f"   跳跃次数: {report['jumps']}  成功: {report['ok']}  "
+            f"成功率: {report['success_rate']:.1%}"
+        )
+        print(f"   每分钟跳跃: {report['jumps_per_minute']}")
+        for outcome, count in report["failures"].items():
+            print(f"   ❌ {outcome}: {count}")
+        return
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    rows = rollup(db, "hour" if args.command == "hourly" else "device", since)
+    for row in rows:
+        prefix = f"{row['hour']}  " if "hour" in row else ""
+        print(
+            f"   {prefix}{row['device']:<32} 跳跃={row['jumps']:<6} "
+            f"成功率={row['success_rate']:.1%}  每分钟={row['jumps_per_minute']}  "
+            f"游戏结束={row['game_over']}  会话={row['sessions']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+候选模型的影子评估
+候选模型在独立的低优先级进程中（nice、限制torch线程数）处理与生产模型相同的实时画面，
+画面通过有界队列传递，队列满时直接丢弃，不会拖慢跳跃循环；
+逐帧记录两个模型在是否找到玩家、选中的目标、距离差和各自延迟上的差异（JSONL），
+最后生成是否可以切换到候选模型的评估报告
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+import numpy as np
+
+from event_log import log
+
+
+def compare_decisions(primary: dict, shadow: dict, target_tolerance: float = 0.25) -> dict:
+    """
+    比较两个模型的目标选择结果
+
+    Args:
+        primary: 生产模型的 select_target 结果
+        shadow: 候选模型的 select_target 结果
+        target_tolerance: 两个目标中心的距离小于生产模型目标宽高较小值的这个比例时算同一个目标
+
+    Returns:
+        dict: player_agree、target_agree、distance_delta（两者都选出目标时）
+    """
+    player_agree = (primary["player"] is None) == (shadow["player"] is None)
+    target_agree = (primary["target"] is None) == (shadow["target"] is None)
+    distance_delta = None
+    if primary["target"] is not None and shadow["target"] is not None:
+        a, b = primary["target"], shadow["target"]
+        radius = max(target_tolerance * min(a[2], a[3]), 10.0)
+        target_agree = bool(np.hypot(a[0] - b[0], a[1] - b[1]) <= radius)
+        distance_delta = round(float(shadow["distance"]) - float(primary["distance"]), 2)
+    return {
+        "player_agree": player_agree,
+        "target_agree": target_agree,
+        "distance_delta": distance_delta,
+    }
+
+
+def _shadow_worker(
+    model_path, predict_params, frames, log_path, nice, threads, tolerance
+):
+    """影子进程：加载候选模型，逐帧推理并与生产模型的结果比较，写入JSONL"""
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)  # 与跳跃循环争CPU时让出
+    import torch
+    from ultralytics import YOLO
+
+    from event_log import WARNING
+    from main import box_center, select_target
+
+    if threads:
+        torch.set_num_threads(threads)
+    log.console_level = WARNING  # select_target的逐帧日志由生产模型打印
+    model = YOLO(model_path)
+    warmed = False
+
+    with open(log_path, "a", encoding="utf-8") as f:
+        while True:
+            item = frames.get()
+            if item is None:
+                return
+            frame, primary, primary_ms = item
+            try:
+                if not warmed:
+                    # 第一帧先空跑一次，冷启动不计入延迟对比
+                    model.predict(frame, verbose=False, **predict_params)
+                    warmed = True
+                start = time.perf_counter()
+                results = model.predict(frame, verbose=False, **predict_params)
+                shadow_ms = (time.perf_counter() - start) * 1000
+                boxes = results[0].boxes
+                detections = (
+                    boxes.data.cpu().numpy() if boxes is not None else np.zeros((0, 6))
+                )
+                shadow = select_target(detections)
+            except Exception as e:
+                log.error("shadow_failed", "❌ 影子模型推理失败: {error}", error=str(e))
+                continue
+
+            row = {
+                "t": round(time.time(), 3),
+                "primary_reason": primary["reason"] or "ok",
+                "shadow_reason": shadow["reason"] or "ok",
+                "primary_distance": round(float(primary["distance"]), 2),
+                "shadow_distance": round(float(shadow["distance"]), 2),
+                "primary_target": box_center(primary["target"]),
+                "shadow_target": box_center(shadow["target"]),
+                "primary_ms": round(primary_ms, 2) if primary_ms is not None else None,
+                "shadow_ms": round(shadow_ms, 2),
+            }
+            row.update(compare_decisions(primary, shadow, tolerance))
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.flush()
+            if not (row["player_agree"] and row["target_agree"]):
+                log.warning(
+                    "shadow_disagreement",
+                    "👥 影子模型结果不同: 生产 {primary_reason} 距离 {primary_distance:.1f}, "
+                    "影子 {shadow_reason} 距离 {shadow_distance:.1f}",
+                    **row,
+                )
+
+
+class ShadowEvaluator:
+    """把生产模型处理过的画面转交给影子进程，submit() 从不阻塞"""
+
+    def __init__(
+        self,
+        model_path: str,
+        predict_params: dict = None,
+        queue_size: int = 4,
+        log_path: str = None,
+        nice: int = 10,
+        threads: int = 1,
+        target_tolerance: float = 0.25,
+    ):
+        """
+        启动影子进程
+
+        Args:
+            model_path: 候选模型路径
+            predict_params: 推理参数，应与生产模型相同（Jump.predict_params）
+            queue_size: 等待处理的最大帧数，满了之后新帧直接丢弃
+            log_path: 逐帧比较结果的JSONL路径，默认 ./dataset/shadow_<时间>.jsonl
+            nice: 影子进程的nice值（越大优先级越低）
+            threads: 影子进程的torch线程数，避免占满跳跃循环要用的CPU核
+            target_tolerance: 判断为同一目标的中心距离比例
+        """
+        self.model_path = model_path
+        self.log_path = log_path or f"./dataset/shadow_{int(time.time())}.jsonl"
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+        self.submitted = 0
+        self.dropped = 0
+        # spawn而不是fork：父进程里的torch线程池在fork后可能死锁
+        context = multiprocessing.get_context("spawn")
+        self._frames = context.Queue(maxsize=queue_size)
+        self._process = context.Process(
+            target=_shadow_worker,
+            args=(
+                model_path,
+                predict_params or {"conf": 0.2, "iou": 0.9, "imgsz": 640},
+                self._frames,
+                self.log_path,
+                nice,
+                threads,
+                target_tolerance,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+        log.info(
+            "shadow_started",
+            "👥 影子评估: {model} → {path}",
+            model=model_path,
+            path=self.log_path,
+        )
+
+    def submit(self, frame, prediction: dict):
+        """
+        提交一帧和生产模型的结果（Jump.last_prediction），队列满时丢弃
+
+        Returns:
+            bool: 是否进入了队列
+        """
+        if frame is None or not self._process.is_alive():
+            return False
+        primary = {key: prediction[key] for key in ("distance", "reason", "player", "target")}
+        try:
+            # 序列化和写管道在Queue的后台线程里完成，这里只是入队
+            self._frames.put_nowait((frame, primary, prediction.get("inference_ms")))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def report(self) -> dict:
+        """根据目前为止的比较结果生成评估报告"""
+        report = promotion_report(self.log_path)
+        report.update(submitted=self.submitted, dropped=self.dropped)
+        return report
+
+    def close(self, timeout: float = 30.0) -> dict:
+        """处理完队列中剩余的帧后停止影子进程，返回评估报告"""
+        try:
+            self._frames.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        return self.report()
+
+
+def promotion_report(
+    log_path: str,
+    max_ok_drop: float = 0.01,
+    min_target_agreement: float = 0.95,
+    max_distance_error: float = 0.05,
+) -> dict:
+    """
+    根据逐帧比较结果判断候选模型能否替换生产模型
+
+    只比较决策：影子进程在低优先级、限制线程数下运行，逐帧记录的延迟不能和生产模型直接比较，
+    速度请用 benchmark.py 在相同条件下测量
+
+    Args:
+        log_path: 影子评估的JSONL
+        max_ok_drop: 候选模型成功选出目标的比例最多比生产模型低多少
+        min_target_agreement: 最低的目标一致率
+        max_distance_error: 距离相对误差p95的上限
+
+    Returns:
+        dict: 各项统计、未通过的条件（failures）和结论（promote）
+    """
+    rows = []
+    if os.path.exists(log_path):
+        with open(log_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    if not rows:
+        return {"frames": 0, "promote": False, "failures": ["没有比较数据"]}
+
+    frames = len(rows)
+    primary_ok = sum(row["primary_reason"] == "ok" for row in rows) / frames
+    shadow_ok = sum(row["shadow_reason"] == "ok" for row in rows) / frames
+    relative_errors = [
+        abs(row["distance_delta"]) / max(row["primary_distance"], 1.0)
+        for row in rows
+        if row["distance_delta"] is not None
+    ]
+
+    report = {
+        "frames": frames,
+        "primary_ok": round(primary_ok, 4),
+        "shadow_ok": round(shadow_ok, 4),
+        "player_agreement": round(sum(row["player_agree"] for row in rows) / frames, 4),
+        "target_agreement": round(sum(row["target_agree"] for row in rows) / frames, 4),
+        "distance_error_p50": (
+            round(float(np.percentile(relative_errors, 50)), 4) if relative_errors else None
+        ),
+        "distance_error_p95": (
+            round(float(np.percentile(relative_errors, 95)), 4) if relative_errors else None
+        ),
+    }
+
+    failures = []
+    if shadow_ok < primary_ok - max_ok_drop:
+        failures.append(f"成功率 {shadow_ok:.1%} 低于生产模型 {primary_ok:.1%}")
+    if report["target_agreement"] < min_target_agreement:
+        failures.append(
+            f"目标一致率 {report['target_agreement']:.1%} < {min_target_agreement:.0%}"
+        )
+    error_p95 = report["distance_error_p95"]
+    if error_p95 is not None and error_p95 > max_distance_error:
+        failures.append(
+            f"距离误差p95 {report['distance_error_p95']:.1%} > {max_distance_error:.0%}"
+        )
+    report["failures"] = failures
+    report["promote"] = not failures
+    return report
+
+
+def print_report(report: dict):
+    """打印评估报告"""
+    print("\n👥 影子评估报告")
+    print("=" * 50)
+    if not report["frames"]:
+        print("❌ 没有比较数据")
+        return
+    print(f"   比较帧数: {report['frames']}", end="")
+    if "dropped" in report:
+        print(f" (提交 {report['submitted']}, 队列满丢弃 {report['dropped']})", end="")
+    print()
+    print(f"   成功率: 生产 {report['primary_ok']:.1%}, 影子 {report['shadow_ok']:.1%}")
+    print(
+        f"   玩家一致: {report['player_agreement']:.1%}, "
+        f"目标一致: {report['target_agreement']:.1%}"
+    )
+    if report["distance_error_p50"] is not None:
+        print(
+            f"   距离相对误差: p50 {report['distance_error_p50']:.2%}, "
+            f"p95 {report['distance_error_p95']:.2%}"
+        )
+    if report["promote"]:
+        print("✅ 可以切换到候选模型")
+    else:
+        for failure in report["failures"]:
+            print(f"❌ {failure}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="影子评估报告")
+    parser.add_argument("log", help="影子评估的JSONL文件")
+    parser.add_argument("--max-ok-drop", type=float, default=0.01, help="成功率最多下降多少")
+    parser.add_argument(
+        "--min-target-agreement", type=float, default=0.95, help="最低目标一致率"
+    )
+    parser.add_argument(
+        "--max-distance-error", type=float, default=0.05, help="距离误差p95上限"
+    )
+    parser.add_argument("--json", help="把报告写入JSON文件")
+
+    args = parser.parse_args()
+    report = promotion_report(
+        args.log, args.max_ok_drop, args.min_target_agreement, args.max_distance_error
+    )
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
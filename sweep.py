@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+超参数和模型尺寸搜索工具
+按搜索空间（模型、图片尺寸、数据增强）在进程池中并行训练，每个试验限定CPU核数，
+明显落后的试验提前停止，最后按mAP和CPU推理延迟排序
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import yaml
+
+# 默认搜索空间：模型尺寸、输入尺寸和几个关键的数据增强
+DEFAULT_SPACE = {
+    "model": ["yolov8n.pt", "yolov10n.pt", "yolov8s.pt"],
+    "imgsz": [320, 416, 640],
+    "mosaic": [0.0, 1.0],
+    "fliplr": [0.0, 0.5],
+    "scale": [0.2, 0.5],
+}
+
+
+def load_space(path: str = None) -> dict:
+    """读取JSON/YAML格式的搜索空间，未指定时使用默认搜索空间"""
+    if not path:
+        return dict(DEFAULT_SPACE)
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)  # JSON也是合法的YAML
+
+
+def make_trials(space: dict, max_trials: int = None, seed: int = 0) -> list:
+    """
+    展开搜索空间
+
+    Args:
+        space: {参数名: 候选值列表}
+        max_trials: 最多试验数，超过时随机抽样
+        seed: 抽样种子
+
+    Returns:
+        list: 每个试验的参数字典
+    """
+    keys = list(space)
+    trials = [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+    if max_trials and len(trials) > max_trials:
+        trials = random.Random(seed).sample(trials, max_trials)
+    return trials
+
+
+def _pin_worker(cpu_queue):
+    """进程池初始化：给每个工作进程分配固定的CPU核，并限制torch线程数"""
+    cpus = cpu_queue.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(len(cpus))
+
+
+def make_early_stopper(trial_id: str, best_curve, lock, margin: float, min_epochs: int):
+    """
+    生成提前停止回调
+
+    所有试验共享每个epoch的最佳fitness，当前试验在min_epochs之后
+    比同一epoch的最佳值低margin以上就停止
+    """
+
+    def on_fit_epoch_end(trainer):
+        if trainer.fitness is None:
+            return
+        epoch = trainer.epoch + 1
+        fitness = float(trainer.fitness)
+        with lock:
+            best = best_curve.get(epoch)
+            if best is None or fitness > best:
+                best_curve[epoch] = fitness
+                return
+        if epoch >= min_epochs and fitness < best * (1 - margin):
+            print(f"✂️ 试验 {trial_id} 在第 {epoch} 轮提前停止: {fitness:.4f} < {best:.4f}")
+            trainer.stop = True
+
+    return on_fit_epoch_end
+
+
+def measure_cpu_latency(weights: str, images: list, imgsz: int, runs: int = 20):
+    """
+    测量模型在CPU上的单张推理延迟中位数
+
+    Args:
+        weights: 模型权重路径
+        images: 测试图片路径列表
+        imgsz: 推理尺寸
+        runs: 计时次数
+
+    Returns:
+        float: 延迟中位数，单位毫秒；没有可读取的图片时为None
+    """
+    import cv2
+    import numpy as np
+    from ultralytics import YOLO
+
+    model = YOLO(weights)
+    frames = [cv2.imread(str(p)) for p in images]
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        return None
+
+    for frame in frames[:2]:
+        model.predict(frame, imgsz=imgsz, device="cpu", verbose=False)
+
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        model.predict(frames[i % len(frames)], imgsz=imgsz, device="cpu", verbose=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def run_trial(task: dict) -> dict:
+    """在工作进程中训练一个试验并测量延迟"""
+    from train_yolo import train_model
+
+    try:
+        import torch
+    except ImportError:
+        pass  # 没有torch时训练本身会报错，这里只是限制线程数
+    else:
+        torch.set_num_threads(int(os.environ.get("OMP_NUM_THREADS", "1")))
+
+    params = dict(task["params"])
+    model_name = params.pop("model")
+    imgsz = params.pop("imgsz")
+    callbacks = {
+        "on_fit_epoch_end": make_early_stopper(
+            task["trial_id"],
+            task["best_curve"],
+            task["lock"],
+            task["margin"],
+            task["min_epochs"],
+        )
+    }
+
+    start = time.time()
+    results = train_model(
+        task["epochs"],
+        task["batch"],
+        imgsz,
+        model_name,
+        data=task["data"],
+        project=task["project"],
+        name=task["trial_id"],
+        callbacks=callbacks,
+        device="cpu",
+        workers=0,
+        amp=False,
+        plots=False,
+        verbose=False,
+        **params,
+    )
+    train_seconds = time.time() - start
+
+    report = {
+        "trial_id": task["trial_id"],
+        "params": task["params"],
+        "train_seconds": round(train_seconds, 1),
+        "map50": None,
+        "map50_95": None,
+        "latency_ms": None,
+    }
+    if results is None:
+        report["error"] = "训练失败"
+        return report
+
+    report["map50"] = round(float(results.box.map50), 4)
+    report["map50_95"] = round(float(results.box.map), 4)
+
+    # train_model 以 exist_ok=True 训练，输出目录就是 project/name
+    weights = Path(task["project"]) / task["trial_id"] / "weights" / "best.pt"
+    report["weights"] = str(weights)
+    latency = measure_cpu_latency(weights, task["latency_images"], imgsz)
+    if latency is None:
+        report["error"] = "没有可读取的延迟测试图片，无法测量延迟"
+    else:
+        report["latency_ms"] = round(latency, 2)
+    return report
+
+
+def _rankable(report: dict) -> bool:
+    return report.get("map50_95") is not None and report.get("latency_ms") is not None
+
+
+def rank_trials(reports: list, tolerance: float = 0.02) -> list:
+    """
+    排序：mAP50-95不低于最佳值(1-tolerance)的试验视为精度达标，
+    达标试验按延迟从低到高排在前面，其余按mAP排在后面，并标出帕累托前沿；
+    训练失败或没有测出延迟的试验不参与排名，排在最后
+    """
+    done = [r for r in reports if _rankable(r)]
+    if not done:
+        return reports
+
+    best_map = max(r["map50_95"] for r in done)
+    for r in done:
+        r["accurate"] = r["map50_95"] >= best_map * (1 - tolerance)
+        r["pareto"] = not any(
+            o is not r
+            and o["map50_95"] >= r["map50_95"]
+            and o["latency_ms"] <= r["latency_ms"]
+            and (o["map50_95"] > r["map50_95"] or o["latency_ms"] < r["latency_ms"])
+            for o in done
+        )
+
+    accurate = sorted((r for r in done if r["accurate"]), key=lambda r: r["latency_ms"])
+    others = sorted((r for r in done if not r["accurate"]), key=lambda r: -r["map50_95"])
+    unranked = [r for r in reports if not _rankable(r)]
+    return accurate + others + unranked
+
+
+def run_sweep(
+    space: dict,
+    data: str = "./dataset/yolo_dataset/data.yaml",
+    epochs: int = 30,
+    batch: int = 16,
+    parallel: int = 2,
+    cpus_per_trial: int = None,
+    max_trials: int = None,
+    margin: float = 0.3,
+    min_epochs: int = 5,
+    tolerance: float = 0.02,
+    project: str = "runs/sweep",
+    seed: int = 0,
+) -> list:
+    """
+    运行搜索
+
+    Args:
+        space: 搜索空间
+        data: data.yaml路径
+        epochs: 每个试验的最大训练轮数
+        batch: 批次大小
+        parallel: 同时运行的试验数
+        cpus_per_trial: 每个试验的CPU核数，默认平分所有核
+        max_trials: 最多试验数
+        margin: 提前停止阈值（比同轮最佳低多少比例）
+        min_epochs: 至少训练多少轮才允许提前停止
+        tolerance: 排序时视为精度达标的mAP容差
+        project: 试验输出目录
+        seed: 抽样种子
+
+    Returns:
+        list: 排好序的试验报告
+    """
+    trials = make_trials(space, max_trials, seed)
+    # ultralytics会把相对的project放到自己的runs目录下，这里固定成绝对路径
+    project = os.path.abspath(project)
+    total_cpus = os.cpu_count() or 1
+    cpus_per_trial = cpus_per_trial or max(1, total_cpus // parallel)
+
+    with open(data, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    val_dir = Path(config.get("path", Path(data).parent)) / config["val"]
+    latency_images = sorted(
+        p for p in val_dir.glob("*") if p.suffix.lower() in (".png", ".jpg", ".bmp")
+    )[:5]
+
+    ctx = multiprocessing.get_context("spawn")
+    manager = ctx.Manager()
+    cpu_queue = manager.Queue()
+    for i in range(parallel):
+        cpu_queue.put(
+            {(i * cpus_per_trial + j) % total_cpus for j in range(cpus_per_trial)}
+        )
+    best_curve = manager.dict()
+    lock = manager.Lock()
+
+    print(f"🔬 共 {len(trials)} 个试验, 并行 {parallel}, 每个试验 {cpus_per_trial} 核")
+
+    reports = []
+    with ProcessPoolExecutor(
+        max_workers=parallel,
+        mp_context=ctx,
+        initializer=_pin_worker,
+        initargs=(cpu_queue,),
+    ) as pool:
+        futures = {}
+        for i, params in enumerate(trials):
+            task = {
+                "trial_id": f"trial_{i:03d}",
+                "params": params,
+                "data": data,
+                "epochs": epochs,
+                "batch": batch,
+                "project": project,
+                "best_curve": best_curve,
+                "lock": lock,
+                "margin": margin,
+                "min_epochs": min_epochs,
+                "latency_images": [str(p) for p in latency_images],
+            }
+            futures[pool.submit(run_trial, task)] = task["trial_id"]
+
+        for future in as_completed(futures):
+            try:
+                report = future.result()
+            except Exception as e:
+                report = {"trial_id": futures[future], "error": str(e)}
+            reports.append(report)
+            print(
+                f"✅ {report['trial_id']}: mAP50-95={report.get('map50_95')}, "
+                f"延迟={report.get('latency_ms')}ms"
+            )
+
+    return rank_trials(reports, tolerance)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="YOLO超参数和模型尺寸搜索")
+    parser.add_argument("--space", help="搜索空间文件（JSON/YAML），默认使用内置空间")
+    parser.add_argument("--data", default="./dataset/yolo_dataset/data.yaml", help="data.yaml路径")
+    parser.add_argument("--epochs", type=int, default=30, help="每个试验的最大训练轮数")
+    parser.add_argument("--batch", type=int, default=16, help="批次大小")
+    parser.add_argument("--parallel", type=int, default=2, help="同时运行的试验数")
+    parser.add_argument("--cpus-per-trial", type=int, help="每个试验的CPU核数")
+    parser.add_argument("--max-trials", type=int, help="最多试验数（随机抽样）")
+    parser.add_argument("--margin", type=float, default=0.3, help="提前停止阈值")
+    parser.add_argument("--min-epochs", type=int, default=5, help="允许提前停止的最少轮数")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="精度达标的mAP容差")
+    parser.add_argument("--project", default="runs/sweep", help="试验输出目录")
+    parser.add_argument("--output", default="runs/sweep/sweep_results.json", help="结果输出路径")
+
+    args = parser.parse_args()
+
+    print("🎮 跳一跳YOLO搜索")
+    print("=" * 50)
+
+    ranked = run_sweep(
+        load_space(args.space),
+        data=args.data,
+        epochs=args.epochs,
+        batch=args.batch,
+        parallel=args.parallel,
+        cpus_per_trial=args.cpus_per_trial,
+        max_trials=args.max_trials,
+        margin=args.margin,
+        min_epochs=args.min_epochs,
+        tolerance=args.tolerance,
+        project=args.project,
+    )
+
+    print(f"\n🏆 排名 (精度达标的按延迟排序):")
+    for rank, r in enumerate(ranked, 1):
+        if r.get("map50_95") is None:
+            print(f"   {rank}. {r['trial_id']} 失败: {r.get('error')}")
+            continue
+        if r.get("latency_ms") is None:
+            print(
+                f"   {rank}. {r['trial_id']} mAP50-95={r['map50_95']:.4f} "
+                f"未排名: {r.get('error')}"
+            )
+            continue
+        flags = ("✓" if r["accurate"] else " ") + ("★" if r["pareto"] else " ")
+        print(
+            f"   {rank}. {flags} {r['trial_id']} mAP50-95={r['map50_95']:.4f} "
+            f"延迟={r['latency_ms']:.1f}ms {r['params']}"
+        )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(ranked, f, ensure_ascii=False, indent=2)
+    print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
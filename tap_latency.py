@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按压注入延迟测量和补偿
+用不同时长反复按压，测量每种控制器从调用到按下的开销和实际按住时长的偏差与抖动，
+拟合 实际时长 = slope × 请求时长 + offset，结果按设备保存到 dataset/tap_calibration.json；
+Jump 创建时自动读取，计算按压时间时反向补偿，注入误差不再让跳跃落空
+
+控制器能测量按下和抬起时刻时（Windows）直接用实际按住时长；
+ADB的 input swipe 在手机上注入事件，主机只能测到整个命令的耗时，
+此时截距是启动 app_process 等固定开销，斜率反映按住时长的比例偏差
+
+测量时会真的按压屏幕，请切到不会响应按压的页面（或游戏结束页）再运行
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from event_log import log
+
+CALIBRATION_PATH = "./dataset/tap_calibration.json"
+DEFAULT_DURATIONS = (100, 300, 500, 800, 1200)
+
+
+def measure_taps(
+    controller,
+    durations=DEFAULT_DURATIONS,
+    repeats: int = 5,
+    x: int = None,
+    y: int = None,
+    pause: float = 0.5,
+) -> list:
+    """
+    按不同时长依次按压并记录时间
+
+    Args:
+        controller: 设备控制器
+        durations: 请求的按压时长列表（毫秒）
+        repeats: 每种时长重复次数
+        x: 按压位置x，默认屏幕中央
+        y: 按压位置y，默认屏幕中央
+        pause: 两次按压之间的间隔（秒）
+
+    Returns:
+        list: 每次按压的 requested_ms、wall_ms（tap调用耗时）、
+              start_delay_ms 和 held_ms（控制器能测量时）、success
+    """
+    if x is None or y is None:
+        width, height = controller.get_screen_size()
+        x, y = width // 2, height // 2
+
+    samples = []
+    # 交错不同时长，设备状态的慢变化不会集中在某一种时长上
+    for _ in range(repeats):
+        for duration in durations:
+            controller.last_press = None
+            start = time.perf_counter()
+            success = controller.tap(x, y, duration_ms=int(duration))
+            wall_ms = (time.perf_counter() - start) * 1000
+            press = controller.last_press or {}
+            samples.append(
+                {
+                    "requested_ms": int(duration),
+                    "wall_ms": round(wall_ms, 3),
+                    "start_delay_ms": press.get("start_delay_ms"),
+                    "held_ms": press.get("held_ms"),
+                    "success": bool(success),
+                }
+            )
+            time.sleep(pause)
+    return samples
+
+
+def fit_press_model(samples: list) -> dict:
+    """
+    拟合请求时长和实际时长的关系
+
+    Args:
+        samples: measure_taps 的结果
+
+    Returns:
+        dict: method（held或wall）、slope、offset_ms（按住时长的固定偏差）、
+              overhead_ms（调用到按下的开销中位数）、jitter_ms（拟合残差标准差）、
+              max_error_ms（补偿前最大误差）、samples
+    """
+    samples = [s for s in samples if s["success"]]
+    if len({s["requested_ms"] for s in samples}) < 2:
+        raise ValueError("至少需要两种按压时长的成功样本")
+
+    requested = np.array([s["requested_ms"] for s in samples], dtype=np.float64)
+    measured_held = all(s["held_ms"] is not None for s in samples)
+    if measured_held:
+        measured = np.array([s["held_ms"] for s in samples], dtype=np.float64)
+    else:
+        measured = np.array([s["wall_ms"] for s in samples], dtype=np.float64)
+
+    slope, intercept = np.polyfit(requested, measured, 1)
+    residuals = measured - (slope * requested + intercept)
+
+    if measured_held:
+        offset_ms = float(intercept)
+        overhead_ms = float(np.median([s["start_delay_ms"] for s in samples]))
+        errors = measured - requested
+    else:
+        # 只有调用耗时：截距是启动和收尾的固定开销，不算在按住时长里
+        offset_ms = 0.0
+        overhead_ms = float(intercept)
+        errors = (slope - 1.0) * requested + residuals
+
+    return {
+        "method": "held" if measured_held else "wall",
+        "slope": round(float(slope), 5),
+        "offset_ms": round(offset_ms, 2),
+        "overhead_ms": round(overhead_ms, 2),
+        "jitter_ms": round(float(residuals.std()), 2),
+        "max_error_ms": round(float(np.abs(errors).max()), 2),
+        "samples": len(samples),
+    }
+
+
+def compensate(press_ms: int, calibration: dict = None) -> int:
+    """
+    按标定结果换算要请求的按压时长，使实际按住时长等于 press_ms
+
+    Args:
+        press_ms: 期望的实际按压时长（毫秒）
+        calibration: fit_press_model 的结果，None时不补偿
+
+    Returns:
+        int: 请求给控制器的按压时长（毫秒）
+    """
+    if not calibration or press_ms <= 0:
+        return press_ms
+    requested = (press_ms - calibration["offset_ms"]) / calibration["slope"]
+    return max(int(round(requested)), 1)
+
+
+def load_calibration(label: str, path: str = CALIBRATION_PATH) -> dict:
+    """
+    读取某个设备的标定结果
+
+    Args:
+        label: 设备名（Jump.device_name，默认为 session_stats.device_label）
+        path: 标定文件路径
+
+    Returns:
+        dict: 标定结果，没有标定过时为None
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get(label)
+
+
+def save_calibration(label: str, calibration: dict, path: str = CALIBRATION_PATH):
+    """保存某个设备的标定结果（同一文件中保留其他设备的结果）"""
+    calibrations = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            calibrations = json.load(f)
+    calibrations[label] = dict(
+        calibration, measured_at=time.strftime("%Y-%m-%d %H:%M:%S")
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(calibrations, f, ensure_ascii=False, indent=2)
+    log.info("tap_calibration_saved", "💾 按压标定已保存: {label}", label=label)
+
+
+def print_report(label: str, calibration: dict):
+    """打印标定结果"""
+    print(f"\n👆 按压注入标定: {label}")
+    print("=" * 50)
+    method = "实际按住时长" if calibration["method"] == "held" else "调用耗时（估计）"
+    print(f"   测量方式: {method}, 样本 {calibration['samples']}")
+    print(
+        f"   实际时长 = {calibration['slope']:.4f} × 请求时长 "
+        f"{calibration['offset_ms']:+.1f}ms"
+    )
+    print(f"   调用到按下的开销: {calibration['overhead_ms']:.1f}ms")
+    print(f"   补偿前最大误差: {calibration['max_error_ms']:.1f}ms")
+    print(f"   补偿后剩余抖动(标准差): {calibration['jitter_ms']:.1f}ms")
+
+
+def main():
+    """主函数"""
+    from device_controller import (
+        AdbDeviceController,
+        AdbTouchDeviceController,
+        WindowsDeviceController,
+    )
+    from session_stats import device_label
+
+    parser = argparse.ArgumentParser(description="按压注入延迟测量和补偿")
+    parser.add_argument(
+        "--controller",
+        choices=["adb", "adb-touch", "windows"],
+        default="adb",
+        help="控制器类型（adb-touch: 直接写触摸屏输入事件）",
+    )
+    parser.add_argument("--window-title", default="跳一跳", help="Windows窗口标题")
+    parser.add_argument("--serial", help="ADB设备序列号，连接了多台设备时指定")
+    parser.add_argument(
+        "--device-name", help="标定保存的设备名，需与 main.py --device-name 一致"
+    )
+    parser.add_argument(
+        "--durations",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_DURATIONS),
+        help="请求的按压时长（毫秒）",
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="每种时长重复次数")
+    parser.add_argument("--x", type=int, help="按压位置x，默认屏幕中央")
+    parser.add_argument("--y", type=int, help="按压位置y，默认屏幕中央")
+    parser.add_argument("--pause", type=float, default=0.5, help="两次按压的间隔（秒）")
+    parser.add_argument("--output", default=CALIBRATION_PATH, help="标定文件路径")
+    parser.add_argument("--no-save", action="store_true", help="只测量，不保存标定")
+
+    args = parser.parse_args()
+    if args.controller == "adb":
+        controller = AdbDeviceController(serial=args.serial)
+    elif args.controller == "adb-touch":
+        controller = AdbTouchDeviceController(serial=args.serial)
+    else:
+        controller = WindowsDeviceController(args.window_title)
+    label = args.device_name or device_label(controller)
+
+    print(f"👆 按压 {len(args.durations) * args.repeats} 次，请确认当前画面不会响应按压")
+    samples = measure_taps(
+        controller, args.durations, args.repeats, args.x, args.y, args.pause
+    )
+    calibration = fit_press_model(samples)
+    print_report(label, calibration)
+    if not args.no_save:
+        save_calibration(label, calibration, args.output)
+        print(f"💾 已保存到 {args.output}，Jump 启动时自动使用")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADB触摸事件控制器测试
+用一个本地的假adb脚本代替手机：getevent -pl 返回固定的设备列表，
+exec-in 把写入的 input_event 连同收到的时间记录到文件
+"""
+
+import os
+import struct
+import sys
+import time
+
+import pytest
+
+import device_controller
+from device_controller import (
+    ABS_CODES,
+    BTN_TOUCH,
+    EV_ABS,
+    EV_KEY,
+    EV_SYN,
+    AdbTouchDeviceController,
+    find_touchscreen,
+)
+
+GETEVENT_OUTPUT = """\
+add device 1: /dev/input/event0
+  name:     "gpio-keys"
+  events:
+    KEY (0001): KEY_VOLUMEDOWN        KEY_VOLUMEUP          KEY_POWER
+  input props:
+    <none>
+add device 2: /dev/input/event1
+  name:     "touchpad"
+  events:
+    ABS (0003): ABS_MT_POSITION_X     : value 0, min 0, max 1000, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_Y     : value 0, min 0, max 1000, fuzz 0, flat 0, resolution 0
+  input props:
+    INPUT_PROP_POINTER
+add device 3: /dev/input/event2
+  name:     "fts_ts"
+  events:
+    KEY (0001): KEY_WAKEUP            BTN_TOUCH
+    ABS (0003): ABS_MT_SLOT           : value 0, min 0, max 9, fuzz 0, flat 0, resolution 0
+                ABS_MT_TOUCH_MAJOR    : value 0, min 0, max 255, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_X     : value 0, min 0, max 4319, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_Y     : value 0, min 0, max 9359, fuzz 0, flat 0, resolution 0
+                ABS_MT_TRACKING_ID    : value 0, min 0, max 65535, fuzz 0, flat 0, resolution 0
+                ABS_MT_PRESSURE       : value 0, min 0, max 255, fuzz 0, flat 0, resolution 0
+  input props:
+    INPUT_PROP_DIRECT
+"""
+
+FAKE_ADB = """\
+#!{python}
+import os, struct, sys, time
+args = sys.argv[1:]
+if args[:1] == ["-s"]:
+    args = args[2:]
+command = " ".join(args)
+log = os.environ["FAKE_ADB_LOG"]
+if command == "shell getevent -pl":
+    sys.stdout.write(open(os.environ["FAKE_ADB_GETEVENT"]).read())
+elif command == "shell getprop ro.product.cpu.abi":
+    print("arm64-v8a")
+elif command == "shell wm size":
+    print("Physical size: 1080x2340")
+elif command.startswith("shell test -w /dev/input/event2"):
+    print("writable")
+elif command == "exec-in cat > /dev/input/event2":
+    with open(log, "a") as f:
+        f.write("open\\n")
+        f.flush()
+        buffer = b""
+        while True:
+            chunk = os.read(0, 4096)
+            if not chunk:
+                break
+            received = time.monotonic()
+            buffer += chunk
+            while len(buffer) >= 24:
+                _, _, type_, code, value = struct.unpack("<qqHHi", buffer[:24])
+                buffer = buffer[24:]
+                f.write(f"{{received}} {{type_}} {{code}} {{value}}\\n")
+                f.flush()
+else:
+    sys.exit(1)
+"""
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="假adb是shell脚本")
+
+
+@pytest.fixture
+def fake_adb(tmp_path, monkeypatch):
+    script = tmp_path / "adb"
+    script.write_text(FAKE_ADB.format(python=sys.executable))
+    script.chmod(0o755)
+    (tmp_path / "getevent.txt").write_text(GETEVENT_OUTPUT)
+    monkeypatch.setenv("FAKE_ADB_GETEVENT", str(tmp_path / "getevent.txt"))
+    monkeypatch.setenv("FAKE_ADB_LOG", str(tmp_path / "events.log"))
+    return str(script), tmp_path / "events.log"
+
+
+def read_events(path, count: int, timeout: float = 5.0) -> list:
+    """等假设备收到 count 个事件，返回 [(收到时间, type, code, value)]"""
+    deadline = time.monotonic() + timeout
+    while True:
+        lines = path.read_text().splitlines() if path.exists() else []
+        events = [
+            tuple(float(v) for v in line.split()) for line in lines if line != "open"
+        ]
+        if len(events) >= count or time.monotonic() > deadline:
+            return events
+        time.sleep(0.01)
+
+
+def wait_for_channel(path, timeout: float = 5.0):
+    """等假设备的exec-in进程启动（真实设备上是adb连接建立的时间）"""
+    deadline = time.monotonic() + timeout
+    while not (path.exists() and "open" in path.read_text()):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_find_touchscreen():
+    """选出有多点触摸坐标且是直接触摸的设备"""
+    touchscreen = find_touchscreen(GETEVENT_OUTPUT)
+    assert touchscreen["path"] == "/dev/input/event2"
+    assert touchscreen["abs"]["ABS_MT_POSITION_X"] == (0, 4319)
+    assert touchscreen["abs"]["ABS_MT_POSITION_Y"] == (0, 9359)
+    assert "BTN_TOUCH" in touchscreen["keys"]
+    assert find_touchscreen(GETEVENT_OUTPUT.split("add device 3")[0])["path"] == (
+        "/dev/input/event1"
+    )
+    assert find_touchscreen("") is None
+
+
+def test_tap_writes_touch_events(fake_adb, monkeypatch):
+    """按下/抬起事件写入触摸屏，坐标按触摸屏范围换算，按住时长由主机计时"""
+    adb, events_log = fake_adb
+    sleeps = []
+    real_sleep = device_controller.precise_sleep
+
+    def recording_sleep(seconds):
+        sleeps.append(seconds)
+        real_sleep(seconds)
+
+    monkeypatch.setattr(device_controller, "precise_sleep", recording_sleep)
+    controller = AdbTouchDeviceController(adb_path=adb)
+    assert controller.event_format == "<qqHHi"
+    assert struct.calcsize(controller.event_format) == 24
+    wait_for_channel(events_log)
+
+    assert controller.tap(540, 1170, duration_ms=200)
+    controller.close()
+
+    events = read_events(events_log, 12)
+    down = [(t, c, v) for _, t, c, v in events[:8]]
+    up = [(t, c, v) for _, t, c, v in events[8:]]
+    assert down == [
+        (EV_ABS, ABS_CODES["ABS_MT_SLOT"], 0),
+        (EV_ABS, ABS_CODES["ABS_MT_TRACKING_ID"], 1),
+        (EV_ABS, ABS_CODES["ABS_MT_POSITION_X"], round(540 * 4319 / 1079)),
+        (EV_ABS, ABS_CODES["ABS_MT_POSITION_Y"], round(1170 * 9359 / 2339)),
+        (EV_ABS, ABS_CODES["ABS_MT_TOUCH_MAJOR"], 5),
+        (EV_ABS, ABS_CODES["ABS_MT_PRESSURE"], 50),
+        (EV_KEY, BTN_TOUCH, 1),
+        (EV_SYN, 0, 0),
+    ]
+    assert up == [
+        (EV_ABS, ABS_CODES["ABS_MT_SLOT"], 0),
+        (EV_ABS, ABS_CODES["ABS_MT_TRACKING_ID"], -1),
+        (EV_KEY, BTN_TOUCH, 0),
+        (EV_SYN, 0, 0),
+    ]
+    # 主机在按下和抬起之间精确等待请求的时长，
+    # 假设备收到按下和抬起的时间差就是实际按住时长（含进程调度的抖动）
+    assert sleeps == [0.2]
+    held_ms = (events[-1][0] - events[7][0]) * 1000
+    assert held_ms == pytest.approx(200, abs=15)
+    assert controller.last_press["requested_ms"] == 200
+    assert controller.last_press["held_ms"] == pytest.approx(200, abs=15)
+
+
+def test_channel_stays_open(fake_adb):
+    """连续按压复用同一个通道，不再为每次按压启动进程"""
+    adb, events_log = fake_adb
+    controller = AdbTouchDeviceController(adb_path=adb)
+    wait_for_channel(events_log)
+    start = time.perf_counter()
+    for _ in range(5):
+        assert controller.tap(100, 100, duration_ms=20)
+    elapsed = time.perf_counter() - start
+    controller.close()
+
+    assert elapsed < 5 * 0.02 + 0.05
+    assert events_log.read_text().splitlines().count("open") == 1
+    assert len(read_events(events_log, 60)) == 60
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调试面板测试
+"""
+
+import socket
+import threading
+import time
+
+import numpy as np
+
+from debug_dashboard import DashboardServer
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def test_stream_exits_after_client_disconnects():
+    """画面不再更新时客户端断开，推流线程靠定时重发发现断开并退出"""
+    server = DashboardServer(port=0, keepalive=0.1)
+    session = server.add_session("phone")
+    session.publish_frame(np.zeros((40, 30, 3), np.uint8))
+    handlers = []
+    original = server.server.RequestHandlerClass._stream
+
+    def tracked_stream(handler, session):
+        handlers.append(threading.current_thread())
+        original(handler, session)
+
+    server.server.RequestHandlerClass._stream = tracked_stream
+    try:
+        client = socket.create_connection(("127.0.0.1", server.port))
+        client.sendall(b"GET /stream/phone HTTP/1.1\r\nHost: x\r\n\r\n")
+        received = b""
+        while b"--frame" not in received:
+            received += client.recv(65536)
+        client.close()
+
+        wait_for(lambda: handlers and not handlers[0].is_alive())
+    finally:
+        server.close()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调试画面渲染测试
+渲染在后台线程，OpenCV窗口只在主线程中操作
+"""
+
+import threading
+import time
+
+import numpy as np
+
+import debug_overlay
+from debug_overlay import OverlayRenderer
+
+
+def test_window_calls_stay_on_main_thread(monkeypatch):
+    """后台线程渲染并交给sinks，imshow/waitKey由主线程的 poll_key() 调用"""
+    calls = []
+
+    def record(name, result=None):
+        def call(*args):
+            calls.append((name, threading.current_thread() is threading.main_thread()))
+            return result
+
+        return call
+
+    monkeypatch.setattr(debug_overlay.cv2, "namedWindow", record("namedWindow"))
+    monkeypatch.setattr(debug_overlay.cv2, "resizeWindow", record("resizeWindow"))
+    monkeypatch.setattr(debug_overlay.cv2, "imshow", record("imshow"))
+    monkeypatch.setattr(debug_overlay.cv2, "waitKey", record("waitKey", ord("q")))
+    monkeypatch.setattr(debug_overlay.cv2, "destroyWindow", record("destroyWindow"))
+
+    sunk = []
+    renderer = OverlayRenderer("debug", sinks=[sunk.append])
+    frame = np.zeros((60, 80, 3), np.uint8)
+    detections = np.array([[10, 10, 30, 30, 0.9, 1]], dtype=np.float32)
+    renderer.submit(frame, detections, {"distance": 0, "reason": "no_platform"})
+
+    deadline = time.monotonic() + 5
+    while not sunk:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert calls == []  # 渲染线程没有碰窗口
+
+    time.sleep(0.05)  # 等渲染结果交给主线程
+    assert renderer.poll_key() == ord("q")
+    renderer.close()
+    names = [name for name, _ in calls]
+    assert "imshow" in names and names[-1] == "destroyWindow"
+    assert all(on_main for _, on_main in calls)
+    assert sunk[0].shape == frame.shape
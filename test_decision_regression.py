@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+决策回归测试
+不需要模型的部分用手工构造的检测结果验证选目标、按压时间和误差判断；
+完整流程在设置了 JUMP_REGRESSION_CORPUS（含 golden.json 的语料目录）时运行
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from decision_regression import GOLDEN_FILE, check, compare_rows, replay_selection
+
+
+def make_golden(k: float = 1.61) -> dict:
+    """构造三帧检测结果：正常跳跃、没有玩家、目标太近"""
+    player = [500, 1000, 560, 1150, 0.9, 1]
+    frames = [
+        [player, [300, 700, 500, 800, 0.8, 0], [600, 760, 700, 820, 0.7, 0]],
+        [[300, 700, 500, 800, 0.8, 0]],
+        [player, [500, 1120, 560, 1140, 0.8, 0]],
+    ]
+    golden = {"k": k, "frames": []}
+    for index, detections in enumerate(frames):
+        golden["frames"].append({"frame": f"frame_{index}.png", "detections": detections})
+    # 用当前代码生成基准结果
+    golden["frames"] = replay_selection(golden)["rows"]
+    return golden
+
+
+def write_golden(folder, golden: dict) -> str:
+    path = os.path.join(folder, GOLDEN_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(golden, f)
+    return str(folder)
+
+
+def test_selection_matches_golden(tmp_path):
+    """回放保存的检测结果，决策应与基准完全一致，并报告吞吐"""
+    golden = make_golden()
+    assert [row["reason"] for row in golden["frames"]] == [
+        "ok",
+        "no_player",
+        "too_close",
+    ]
+    first = golden["frames"][0]
+    assert first["press_time"] == int(first["distance"] * 1.61)
+
+    report = check(write_golden(tmp_path, golden), selection_only=True)
+    assert report["passed"], report["mismatches"]
+    assert report["frames"] == 3
+    assert report["frames_per_second"] > 0
+
+
+def test_detects_changed_decisions(tmp_path):
+    """目标、距离、按压时间或结果变化超出误差时报告不一致"""
+    golden = make_golden()
+    first = golden["frames"][0]
+    # 目标平台移动了10像素
+    first["detections"][1] = list(np.add(first["detections"][1], [10, 0, 10, 0, 0, 0]))
+    # 第二帧多了一个玩家
+    golden["frames"][1]["detections"].append([500, 1000, 560, 1150, 0.9, 1])
+
+    report = check(write_golden(tmp_path, golden), selection_only=True)
+    assert not report["passed"]
+    problems = {m["frame"]: m["problems"] for m in report["mismatches"]}
+    assert set(problems) == {"frame_0.png", "frame_1.png"}
+    assert any("目标中心偏移" in p for p in problems["frame_0.png"])
+    assert problems["frame_1.png"] == ["结果 no_player → ok"]
+
+
+def test_tolerances():
+    """误差以内视为一致"""
+    expected = {
+        "reason": "ok",
+        "target": [400.0, 750.0],
+        "distance": 300.0,
+        "press_time": 483,
+    }
+    close = dict(expected, target=[401.0, 751.0], distance=301.5, press_time=485)
+    assert compare_rows(expected, close) == []
+    far = dict(expected, distance=310.0, press_time=499)
+    assert len(compare_rows(expected, far)) == 2
+    assert compare_rows(expected, far, {"distance_rel": 0.05, "press_ms": 20}) == []
+
+
+@pytest.mark.skipif(
+    not os.path.isfile(
+        os.path.join(os.environ.get("JUMP_REGRESSION_CORPUS", ""), GOLDEN_FILE)
+    ),
+    reason="设置 JUMP_REGRESSION_CORPUS 为含 golden.json 的语料目录后运行",
+)
+def test_full_path_matches_golden():
+    """完整的截图→推理→选目标→按压时间流程与基准一致"""
+    report = check(os.environ["JUMP_REGRESSION_CORPUS"])
+    assert report["passed"], report["mismatches"]
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件日志测试
+"""
+
+import json
+import threading
+
+from event_log import INFO, EventLog
+
+
+def test_flush_writes_all_events(tmp_path, capsys):
+    """flush返回时之前记录的事件都已写出，包括后台线程输出期间追加的事件"""
+    path = tmp_path / "events.jsonl"
+    events = EventLog(str(path), console_level=INFO + 1, capacity=100000, flush_interval=0.001)
+    try:
+        stop = threading.Event()
+
+        def writer():
+            for index in range(20000):
+                if stop.is_set():
+                    return
+                events.info("tick", "tick {index}", index=index)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        for _ in range(20):
+            events.info("mark", "mark")
+            events.flush()
+            marks = [
+                json.loads(line)["event"] for line in path.read_text(encoding="utf-8").splitlines()
+            ].count("mark")
+            assert marks == _ + 1
+        stop.set()
+        thread.join()
+
+        events.console_level = INFO
+        events.info("done", "✅ done")
+        events.flush()
+        print("after")
+        assert capsys.readouterr().out.endswith("✅ done\nafter\n")
+    finally:
+        events.close()
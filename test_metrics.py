@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标导出测试
+"""
+
+from metrics import MetricsRegistry
+
+
+def test_counters_use_registered_label_names():
+    """每个计数器按声明的标签名导出，没有声明时用label"""
+    metrics = MetricsRegistry(summary_interval=0)
+    metrics.register_counter("jump_decisions_total", "reason")
+    metrics.register_counter("model_reloads_total", "result")
+    metrics.inc("jump_decisions_total", "no_player")
+    metrics.inc("model_reloads_total", "swapped", 2)
+    metrics.inc("other_total", "x")
+    metrics.inc("jump_tap_failures_total")
+    metrics.observe("inference", 0.02)
+
+    lines = metrics.render_prometheus().splitlines()
+    assert 'jump_decisions_total{reason="no_player"} 1' in lines
+    assert 'model_reloads_total{result="swapped"} 2' in lines
+    assert 'other_total{label="x"} 1' in lines
+    assert "jump_tap_failures_total 1" in lines
+    assert 'jump_stage_duration_seconds_count{stage="inference"} 1' in lines
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型热更新测试
+用假的Jump对象，不加载真实模型
+"""
+
+import os
+import subprocess
+import sys
+
+import model_reload
+from metrics import MetricsRegistry
+from model_reload import ModelReloader
+
+
+class FakeJump:
+    def __init__(self, model_path: str):
+        self.model = "current"
+        self.model_path = model_path
+        self.cache_params = "current|{}"
+        self.warmup_report = None
+        self.predict_params = {"imgsz": 640}
+        self.metrics = MetricsRegistry()
+        self.cache = None
+
+
+def make_weights(path, content: bytes) -> str:
+    path.write_bytes(content)
+    return str(path)
+
+
+def make_reloader(jump, snapshot_dir, **kwargs) -> ModelReloader:
+    return ModelReloader(
+        jump, watch=False, canary_dir=None, snapshot_dir=str(snapshot_dir), **kwargs
+    )
+
+
+def make_process_reloader(monkeypatch, jump, snapshot_dir, pid: int) -> ModelReloader:
+    """模拟另一个进程的热更新器（快照文件名里用指定的进程号）"""
+    with monkeypatch.context() as m:
+        m.setattr(model_reload.os, "getpid", lambda: pid)
+        return make_reloader(jump, snapshot_dir)
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def ready(reloader, path: str, name: str):
+    """模拟后台线程准备好一个通过验证的新模型"""
+    _, snapshot = reloader._snapshot(path)
+    reloader._ready = {
+        "model": name,
+        "path": snapshot,
+        "params_key": f"{name}|{{}}",
+        "warmup": None,
+    }
+    return snapshot
+
+
+def test_processes_share_snapshot_dir(tmp_path, monkeypatch):
+    """共用快照目录时每个进程只清理自己创建的快照，不留下临时文件"""
+    snapshots = tmp_path / "snapshots"
+    first = make_process_reloader(
+        monkeypatch, FakeJump(make_weights(tmp_path / "a.pt", b"a")), snapshots, os.getpid()
+    )
+    second = make_process_reloader(
+        monkeypatch, FakeJump(make_weights(tmp_path / "b.pt", b"b")), snapshots, os.getppid()
+    )
+    try:
+        first_model = first.jump.model_path
+        for content in (b"c", b"d", b"e"):
+            ready(first, make_weights(tmp_path / "new.pt", content), "new")
+            first.maybe_swap()
+
+        remaining = set(os.listdir(snapshots))
+        assert os.path.basename(second.jump.model_path) in remaining
+        assert os.path.basename(first.jump.model_path) in remaining
+        assert os.path.basename(first.previous["path"]) in remaining
+        assert os.path.basename(first_model) not in remaining
+        assert len(remaining) == 3
+    finally:
+        first.close()
+        second.close()
+
+
+def test_processes_start_from_same_weights(tmp_path, monkeypatch):
+    """两个进程从同一份权重启动：一个进程切换模型后，另一个进程的快照仍然存在"""
+    snapshots = tmp_path / "snapshots"
+    weights = make_weights(tmp_path / "best.pt", b"best")
+    first = make_process_reloader(monkeypatch, FakeJump(weights), snapshots, os.getpid())
+    second = make_process_reloader(monkeypatch, FakeJump(weights), snapshots, os.getppid())
+    try:
+        first_model = first.jump.model_path
+        assert first_model != second.jump.model_path
+        for content in (b"c", b"d"):
+            ready(first, make_weights(tmp_path / "new.pt", content), "new")
+            first.maybe_swap()
+
+        assert not os.path.exists(first_model)
+        with open(second.jump.model_path, "rb") as f:
+            assert f.read() == b"best"
+    finally:
+        first.close()
+        second.close()
+
+
+def test_remove_snapshots_of_exited_processes(tmp_path):
+    """启动时删除已退出的进程留下的快照和临时文件，保留运行中进程的快照"""
+    snapshots = tmp_path / "snapshots"
+    snapshots.mkdir()
+    pid = dead_pid()
+    stale = [f"0123456789abcdef.{pid}.pt", f"incoming_{pid}_x1y2.tmp"]
+    alive = f"0123456789abcdef.{os.getppid()}.pt"
+    for name in stale + [alive, "notes.txt"]:
+        (snapshots / name).write_bytes(b"old")
+
+    reloader = make_reloader(FakeJump(make_weights(tmp_path / "a.pt", b"a")), snapshots)
+    try:
+        remaining = set(os.listdir(snapshots))
+        assert not remaining & set(stale)
+        assert {alive, "notes.txt", os.path.basename(reloader.jump.model_path)} <= remaining
+    finally:
+        reloader.close()
+
+
+def test_rollback_when_failures_rise_after_swap(tmp_path):
+    """切换后识别失败率明显高于切换前时自动回滚"""
+    jump = FakeJump(make_weights(tmp_path / "a.pt", b"a"))
+    reloader = make_reloader(jump, tmp_path / "snapshots", probation_jumps=4)
+    try:
+        original = jump.model_path
+        for reason in (None, None, None, "no_player"):
+            assert not reloader.observe({"reason": reason})
+
+        ready(reloader, make_weights(tmp_path / "bad.pt", b"bad"), "bad")
+        assert reloader.maybe_swap() and jump.model == "bad"
+        results = [reloader.observe({"reason": "no_platform"}) for _ in range(4)]
+        assert results == [False, False, False, True]
+        assert jump.model == "current" and jump.model_path == original
+        assert jump.metrics.counters[("model_reloads_total", "rolled_back")] == 1
+
+        ready(reloader, make_weights(tmp_path / "good.pt", b"good"), "good")
+        assert reloader.maybe_swap()
+        for reason in (None, "no_player", None, None):
+            assert not reloader.observe({"reason": reason})
+        assert jump.model == "good"
+    finally:
+        reloader.close()
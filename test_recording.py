@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+录制和回放控制器测试
+"""
+
+import json
+
+from PIL import Image
+
+from device_controller import (
+    DeviceController,
+    RecordingDeviceController,
+    ReplayDeviceController,
+)
+
+
+class FakeController(DeviceController):
+    def screenshot(self, save_path: str = "./screenshot.png") -> bool:
+        Image.new("RGB", (40, 30)).save(save_path)
+        return True
+
+    def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
+        return True
+
+    def get_screen_size(self) -> tuple:
+        return (40, 30)
+
+
+def test_recording_resumes_existing_session(tmp_path):
+    """继续录制已有会话时帧编号接着往后，不覆盖之前的帧"""
+    session_dir = str(tmp_path / "session")
+    screenshot = str(tmp_path / "screen.png")
+    for _ in range(2):
+        recorder = RecordingDeviceController(FakeController(), session_dir)
+        recorder.screenshot(screenshot)
+        recorder.tap(1, 2, 300)
+        recorder.screenshot(screenshot)
+        recorder.close()
+
+    with open(tmp_path / "session" / "session.jsonl", encoding="utf-8") as f:
+        events = [json.loads(line) for line in f]
+    files = [e["file"] for e in events if e["type"] == "frame"]
+    assert files == [f"frame_{i:06d}.png" for i in range(1, 5)]
+    assert len(ReplayDeviceController(session_dir).frames) == 4
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+screenrecord视频流截图测试
+用本地生成的H.264裸流文件代替手机上的screenrecord输出
+"""
+
+import shutil
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from device_controller import DeviceController
+from screen_stream import ScreenrecordDeviceController, ScreenrecordStream
+
+FRAMES = 30
+WIDTH, HEIGHT = 320, 240
+
+# 把文件写到标准输出后保持运行，像画面静止时的screenrecord一样不再输出
+STREAMER = """
+import sys, time
+data = open(sys.argv[1], "rb").read()
+for start in range(0, len(data), 4096):
+    sys.stdout.buffer.write(data[start:start + 4096])
+    sys.stdout.buffer.flush()
+    time.sleep(0.001)
+time.sleep(float(sys.argv[2]))
+"""
+
+
+def gray(index: int) -> int:
+    return 10 + index * 8
+
+
+@pytest.fixture(scope="module")
+def h264_file(tmp_path_factory):
+    """生成每帧灰度不同的H.264裸流（Annex B，与screenrecord --output-format=h264相同）"""
+    av = pytest.importorskip("av")
+    if "libx264" not in av.codecs_available:
+        pytest.skip("PyAV没有libx264编码器")
+    codec = av.CodecContext.create("libx264", "w")
+    codec.width, codec.height = WIDTH, HEIGHT
+    codec.pix_fmt = "yuv420p"
+    codec.framerate = 30
+    codec.options = {"tune": "zerolatency", "preset": "ultrafast"}
+
+    path = tmp_path_factory.mktemp("stream") / "screen.h264"
+    with open(path, "wb") as f:
+        for index in range(FRAMES):
+            image = np.full((HEIGHT, WIDTH, 3), gray(index), np.uint8)
+            frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+            for packet in codec.encode(frame):
+                f.write(bytes(packet))
+        for packet in codec.encode(None):
+            f.write(bytes(packet))
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def ffmpeg_h264_file(tmp_path_factory):
+    """用ffmpeg编码同样的H.264裸流，没有PyAV时也能测试ffmpeg解码"""
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("没有安装ffmpeg")
+    path = tmp_path_factory.mktemp("stream") / "screen.h264"
+    frames = b"".join(
+        np.full((HEIGHT, WIDTH, 3), gray(index), np.uint8).tobytes() for index in range(FRAMES)
+    )
+    command = (
+        ["ffmpeg", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "bgr24"]
+        + ["-s", f"{WIDTH}x{HEIGHT}", "-r", "30", "-i", "pipe:0"]
+        + ["-c:v", "libx264", "-tune", "zerolatency", "-preset", "ultrafast"]
+        + ["-pix_fmt", "yuv420p", "-f", "h264", str(path)]
+    )
+    if subprocess.run(command, input=frames).returncode != 0:
+        pytest.skip("ffmpeg没有libx264编码器")
+    return str(path)
+
+
+def streamer(path: str, linger: float = 30.0) -> list:
+    return [sys.executable, "-c", STREAMER, path, str(linger)]
+
+
+def wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_latest_frame_after_stream_goes_idle(h264_file):
+    """解码所有帧，画面静止后最后一帧也能拿到（不被解析器扣住）"""
+    stream = ScreenrecordStream(streamer(h264_file), decoder="pyav")
+    try:
+        wait_for(lambda: stream.frames >= FRAMES)
+        frame = stream.latest()
+        assert frame.shape == (HEIGHT, WIDTH, 3)
+        assert abs(int(frame.mean()) - gray(FRAMES - 1)) <= 3
+        assert stream.frames == FRAMES
+    finally:
+        stream.close()
+
+
+def test_restarts_before_time_limit(h264_file):
+    """每段录制到时限前切换到下一段，下一段出帧后才停掉上一段"""
+    stream = ScreenrecordStream(streamer(h264_file), decoder="pyav", restart_after=0.5)
+    try:
+        wait_for(lambda: stream.restarts >= 2)
+        # 每一段都完整解码，画面没有中断
+        wait_for(lambda: stream.frames >= (stream.restarts + 1) * FRAMES)
+        assert stream.latest() is not None
+    finally:
+        stream.close()
+    assert stream._segment.process.poll() is not None
+
+
+def test_restarts_when_recording_ends(h264_file):
+    """录制进程意外退出时重新启动"""
+    stream = ScreenrecordStream(streamer(h264_file, linger=0), decoder="pyav")
+    try:
+        wait_for(lambda: stream.restarts >= 1 and stream.frames >= 2 * FRAMES)
+    finally:
+        stream.close()
+
+
+def test_latest_after_waits_for_new_frame(h264_file):
+    """指定时刻之后没有新帧时等待，超时返回None；有新帧时返回新帧"""
+    stream = ScreenrecordStream(streamer(h264_file, linger=0.5), decoder="pyav")
+    try:
+        wait_for(lambda: stream.frames >= FRAMES)
+        mark = time.perf_counter()
+        assert stream.latest(0.1, after=mark) is None
+        assert stream.latest(0, after=None) is not None
+        # 录制结束后重新启动，新一段的帧在mark之后
+        frame = stream.latest(10, after=mark)
+        assert frame is not None and stream.restarts >= 1
+    finally:
+        stream.close()
+
+
+class FakeController(DeviceController):
+    def __init__(self):
+        self.taps = []
+        self.last_press = None
+
+    def screenshot(self, save_path: str = "./screenshot.png") -> bool:
+        raise AssertionError("截图应来自视频流")
+
+    def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
+        self.taps.append((x, y, duration_ms))
+        self.last_press = {"requested_ms": duration_ms, "held_ms": duration_ms}
+        return True
+
+    def get_screen_size(self) -> tuple:
+        return (WIDTH, HEIGHT)
+
+
+def test_controller_screenshot(h264_file, tmp_path):
+    """截图写出视频流的最新一帧，按压交给被包装的控制器"""
+    inner = FakeController()
+    controller = ScreenrecordDeviceController(
+        inner, decoder="pyav", command=streamer(h264_file), frame_timeout=0.2
+    )
+    try:
+        wait_for(lambda: controller.stream.frames >= FRAMES)
+        path = str(tmp_path / "screen.png")
+        assert controller.screenshot(path)
+        image = cv2.imread(path)
+        assert image.shape == (HEIGHT, WIDTH, 3)
+        assert abs(int(image.mean()) - gray(FRAMES - 1)) <= 3
+
+        assert controller.tap(10, 20, 300)
+        assert inner.taps == [(10, 20, 300)]
+        assert controller.last_press["held_ms"] == 300
+        assert controller.get_screen_size() == (WIDTH, HEIGHT)
+
+        # 按压后画面静止没有新帧：等待frame_timeout后退回最新一帧
+        start = time.perf_counter()
+        frame = controller.latest_frame()
+        assert time.perf_counter() - start >= 0.2
+        assert abs(int(frame.mean()) - gray(FRAMES - 1)) <= 3
+    finally:
+        controller.close()
+
+
+def test_ffmpeg_decoder(ffmpeg_h264_file):
+    """没有PyAV时用ffmpeg管道解码"""
+    stream = ScreenrecordStream(
+        streamer(ffmpeg_h264_file, linger=0), decoder="ffmpeg", frame_size=(WIDTH, HEIGHT)
+    )
+    try:
+        wait_for(lambda: stream.frames >= FRAMES)
+        assert stream.latest().shape == (HEIGHT, WIDTH, 3)
+    finally:
+        stream.close()
+
+
+def test_ffmpeg_latest_frame_after_stream_goes_idle(ffmpeg_h264_file):
+    """ffmpeg解码时画面静止后最后一帧也能拿到，不用等录制结束"""
+    stream = ScreenrecordStream(
+        streamer(ffmpeg_h264_file), decoder="ffmpeg", frame_size=(WIDTH, HEIGHT)
+    )
+    try:
+        wait_for(lambda: stream.frames >= FRAMES)
+        frame = stream.latest()
+        assert abs(int(frame.mean()) - gray(FRAMES - 1)) <= 3
+        assert stream.frames == FRAMES and stream.restarts == 0
+    finally:
+        stream.close()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话统计测试
+直接写入跳跃记录，验证汇总查询
+"""
+
+import sqlite3
+
+from session_stats import SCHEMA, rollup, summarize
+
+
+def add_session(db, device: str, started: float, jumps: int, interval: float) -> int:
+    cursor = db.execute(
+        "INSERT INTO sessions (device, started) VALUES (?, ?)", (device, started)
+    )
+    session_id = cursor.lastrowid
+    db.executemany(
+        "INSERT INTO jumps (session_id, t, outcome) VALUES (?, ?, 'ok')",
+        [(session_id, started + i * interval) for i in range(jumps)],
+    )
+    return session_id
+
+
+def test_rollup_ignores_idle_time_between_sessions():
+    """同一设备两个相隔8小时的会话：每分钟跳跃数只按会话内的时长计算"""
+    db = sqlite3.connect(":memory:")
+    db.executescript(SCHEMA)
+    start = 1_700_000_000.0
+    first = add_session(db, "phone", start, jumps=301, interval=2.0)
+    add_session(db, "phone", start + 8 * 3600, jumps=301, interval=2.0)
+
+    assert summarize(db, first)["jumps_per_minute"] == 30.1
+    (device,) = rollup(db, "device")
+    assert device["sessions"] == 2 and device["jumps"] == 602
+    assert device["jumps_per_minute"] == 30.1
+
+    hours = rollup(db, "hour")
+    assert sum(h["jumps"] for h in hours) == 602
+    assert all(h["jumps_per_minute"] > 29 for h in hours if h["jumps"] > 1)
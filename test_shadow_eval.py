@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+影子评估测试
+验证逐帧比较和切换结论，不启动影子进程
+"""
+
+import json
+
+from shadow_eval import compare_decisions, promotion_report
+
+
+def decision(
+    player=(100.0, 500.0, 40.0, 80.0), target=(300.0, 400.0, 120.0, 60.0), distance=250.0
+):
+    reason = None if player is not None and target is not None else "no_target"
+    return {"player": player, "target": target, "distance": distance, "reason": reason}
+
+
+def write_rows(path, rows: list) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    return str(path)
+
+
+def row(primary_reason="ok", shadow_reason="ok", distance_delta=0.0, target_agree=True):
+    return {
+        "primary_reason": primary_reason,
+        "shadow_reason": shadow_reason,
+        "primary_distance": 250.0,
+        "shadow_distance": 250.0 + (distance_delta or 0.0),
+        "distance_delta": distance_delta,
+        "player_agree": True,
+        "target_agree": target_agree,
+        "primary_ms": 20.0,
+        "shadow_ms": 60.0,
+    }
+
+
+def test_compare_decisions_agree_and_disagree():
+    """目标中心在容差内算同一目标；一方找不到玩家或目标时算不一致"""
+    same = compare_decisions(
+        decision(), decision(target=(310.0, 405.0, 118.0, 62.0), distance=258.0)
+    )
+    assert same == {"player_agree": True, "target_agree": True, "distance_delta": 8.0}
+
+    moved = compare_decisions(decision(), decision(target=(330.0, 400.0, 120.0, 60.0)))
+    assert not moved["target_agree"] and moved["distance_delta"] == 0.0
+
+    missing = compare_decisions(decision(), decision(player=None, target=None))
+    assert not missing["player_agree"] and not missing["target_agree"]
+    assert missing["distance_delta"] is None
+
+    neither = compare_decisions(decision(target=None), decision(target=None))
+    assert neither["target_agree"] and neither["distance_delta"] is None
+
+
+def test_compare_decisions_tolerance():
+    """容差按生产模型目标宽高较小值的比例计算，小目标至少10像素"""
+    primary = decision(target=(300.0, 400.0, 120.0, 60.0))  # 半径 0.25 × 60 = 15
+    near = decision(target=(314.0, 400.0, 120.0, 60.0))
+    far = decision(target=(316.0, 400.0, 120.0, 60.0))
+    assert compare_decisions(primary, near)["target_agree"]
+    assert not compare_decisions(primary, far)["target_agree"]
+    assert compare_decisions(
+        primary, decision(target=(320.0, 400.0, 120.0, 60.0)), target_tolerance=0.5
+    )["target_agree"]
+
+    tiny = decision(target=(300.0, 400.0, 8.0, 8.0))  # 半径取下限10
+    assert compare_decisions(tiny, decision(target=(309.0, 400.0, 8.0, 8.0)))["target_agree"]
+    assert not compare_decisions(tiny, decision(target=(311.0, 400.0, 8.0, 8.0)))["target_agree"]
+
+
+def test_promotion_report_passes(tmp_path):
+    report = promotion_report(write_rows(tmp_path / "shadow.jsonl", [row()] * 20))
+    assert report["promote"] and report["failures"] == []
+    assert report["frames"] == 20 and report["target_agreement"] == 1.0
+    assert "speedup_p50" not in report
+
+
+def test_promotion_report_without_data(tmp_path):
+    report = promotion_report(str(tmp_path / "missing.jsonl"))
+    assert report["frames"] == 0 and not report["promote"]
+
+
+def test_promotion_report_failure_thresholds(tmp_path):
+    """成功率下降、目标一致率和距离误差p95各自超过阈值时不切换"""
+    rows = [row()] * 97 + [row(shadow_reason="no_target", distance_delta=None)] * 3
+    report = promotion_report(write_rows(tmp_path / "ok.jsonl", rows))
+    assert not report["promote"] and len(report["failures"]) == 1
+    assert "成功率" in report["failures"][0]
+    assert promotion_report(str(tmp_path / "ok.jsonl"), max_ok_drop=0.05)["promote"]
+
+    rows = [row()] * 94 + [row(target_agree=False)] * 6
+    report = promotion_report(write_rows(tmp_path / "agree.jsonl", rows))
+    assert not report["promote"] and len(report["failures"]) == 1
+    assert "目标一致率" in report["failures"][0]
+
+    rows = [row()] * 90 + [row(distance_delta=25.0)] * 10  # 相对误差10%
+    report = promotion_report(write_rows(tmp_path / "distance.jsonl", rows))
+    assert report["distance_error_p95"] == 0.1
+    assert not report["promote"] and len(report["failures"]) == 1
+    assert "距离误差" in report["failures"][0]
+    assert promotion_report(str(tmp_path / "distance.jsonl"), max_distance_error=0.1)["promote"]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+超参数搜索测试
+用假的训练函数代替真实训练，验证试验报告和权重路径
+"""
+
+import threading
+from types import SimpleNamespace
+
+import sweep
+import train_yolo
+
+
+def test_run_trial_reports_weights(tmp_path, monkeypatch):
+    """训练结果（DetMetrics）没有save_dir，权重路径由project和试验名得出"""
+    calls = {}
+
+    def fake_train_model(epochs, batch_size, img_size, model_name, **kwargs):
+        calls.update(kwargs, epochs=epochs, img_size=img_size, model=model_name)
+        return SimpleNamespace(box=SimpleNamespace(map50=0.91234, map=0.65432))
+
+    def fake_latency(weights, images, imgsz, runs=20):
+        calls["latency_weights"] = weights
+        return 12.345
+
+    monkeypatch.setattr(train_yolo, "train_model", fake_train_model)
+    monkeypatch.setattr(sweep, "measure_cpu_latency", fake_latency)
+
+    task = {
+        "trial_id": "trial_007",
+        "params": {"model": "yolov8n.pt", "imgsz": 320, "mosaic": 0.0},
+        "data": "data.yaml",
+        "epochs": 3,
+        "batch": 4,
+        "project": str(tmp_path),
+        "best_curve": {},
+        "lock": threading.Lock(),
+        "margin": 0.3,
+        "min_epochs": 5,
+        "latency_images": [],
+    }
+    report = sweep.run_trial(task)
+
+    weights = tmp_path / "trial_007" / "weights" / "best.pt"
+    assert calls["latency_weights"] == weights
+    assert calls["name"] == "trial_007" and calls["mosaic"] == 0.0
+    assert report["weights"] == str(weights)
+    assert report["map50"] == 0.9123 and report["map50_95"] == 0.6543
+    assert report["latency_ms"] == 12.35
+    assert report["params"]["model"] == "yolov8n.pt"
+
+
+def test_rank_trials_skips_trials_without_latency():
+    """没有测出延迟的试验不参与排名和帕累托前沿，排在最后"""
+    reports = [
+        {"trial_id": "slow", "map50_95": 0.60, "latency_ms": 30.0},
+        {"trial_id": "no_latency", "map50_95": 0.70, "latency_ms": None, "error": "无图片"},
+        {"trial_id": "failed", "map50_95": None, "latency_ms": None, "error": "训练失败"},
+        {"trial_id": "fast", "map50_95": 0.59, "latency_ms": 10.0},
+        {"trial_id": "worse", "map50_95": 0.50, "latency_ms": 20.0},
+    ]
+    ranked = sweep.rank_trials(reports)
+
+    assert [r["trial_id"] for r in ranked] == ["fast", "slow", "worse", "no_latency", "failed"]
+    assert ranked[0]["accurate"] and ranked[1]["accurate"] and not ranked[2]["accurate"]
+    assert [r["pareto"] for r in ranked[:3]] == [True, True, False]
+    assert "pareto" not in ranked[3]
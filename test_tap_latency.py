@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按压注入标定测试
+用已知偏差的假控制器验证拟合和补偿
+"""
+
+import random
+
+import pytest
+
+import tap_latency
+from device_controller import DeviceController
+from main import press_time_for
+from tap_latency import compensate, fit_press_model, load_calibration, measure_taps
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BiasedController(DeviceController):
+    """实际按住时长 = 1.05 × 请求时长 + 12ms，外加最多2ms的抖动"""
+
+    def __init__(self, clock: FakeClock, report_held: bool = True):
+        self.clock = clock
+        self.report_held = report_held
+        self.rng = random.Random(0)
+
+    def screenshot(self, save_path: str = "./screenshot.png") -> bool:
+        return True
+
+    def tap(self, x: int, y: int, duration_ms: int = 100) -> bool:
+        held = 1.05 * duration_ms + 12 + self.rng.uniform(-2, 2)
+        start_delay = 300 + self.rng.uniform(-50, 50)  # 如启动app_process
+        self.clock.now += (start_delay + held) / 1000
+        if self.report_held:
+            self.last_press = {
+                "requested_ms": duration_ms,
+                "start_delay_ms": start_delay,
+                "held_ms": held,
+            }
+        return True
+
+    def get_screen_size(self) -> tuple:
+        return (1080, 1920)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tap_latency.time, "perf_counter", clock)
+    monkeypatch.setattr(tap_latency.time, "sleep", lambda seconds: None)
+    return clock
+
+
+def test_fit_from_held_duration(clock):
+    """控制器报告实际按住时长时，拟合出斜率和固定偏差，补偿后误差在抖动以内"""
+    samples = measure_taps(BiasedController(clock), repeats=4)
+    assert len(samples) == 4 * len(tap_latency.DEFAULT_DURATIONS)
+
+    calibration = fit_press_model(samples)
+    assert calibration["method"] == "held"
+    assert calibration["slope"] == pytest.approx(1.05, abs=0.01)
+    assert calibration["offset_ms"] == pytest.approx(12, abs=2)
+    assert calibration["overhead_ms"] == pytest.approx(300, abs=50)
+    assert calibration["jitter_ms"] < 2
+
+    for wanted in (150, 600, 1000):
+        requested = compensate(wanted, calibration)
+        assert abs(1.05 * requested + 12 - wanted) <= 2
+
+
+def test_fit_from_call_duration(clock):
+    """只能测到调用耗时时，截距算作固定开销，按住时长只按斜率补偿"""
+    calibration = fit_press_model(
+        measure_taps(BiasedController(clock, report_held=False), repeats=4)
+    )
+    assert calibration["method"] == "wall"
+    assert calibration["slope"] == pytest.approx(1.05, abs=0.02)
+    assert calibration["offset_ms"] == 0
+    assert calibration["overhead_ms"] == pytest.approx(312, abs=40)
+
+
+def test_press_time_compensation(tmp_path):
+    """没有标定时按压时间不变，有标定时反向补偿，距离为0时不按压"""
+    calibration = {"slope": 1.05, "offset_ms": 12.0}
+    assert press_time_for(300, 1.61) == 483
+    assert press_time_for(300, 1.61, calibration) == round((483 - 12) / 1.05)
+    assert press_time_for(0, 1.61, calibration) == 0
+
+    path = str(tmp_path / "tap_calibration.json")
+    assert load_calibration("host/AdbDeviceController", path) is None
+    tap_latency.save_calibration("host/AdbDeviceController", calibration, path)
+    tap_latency.save_calibration("host/Other", {"slope": 1.0, "offset_ms": 0.0}, path)
+    loaded = load_calibration("host/AdbDeviceController", path)
+    assert loaded["slope"] == 1.05 and "measured_at" in loaded
+
+
+def test_calibration_label_follows_wrapped_controller(tmp_path):
+    """包装控制器和被包装的控制器用同一个标定，不同序列号的手机各用各的"""
+    from device_controller import AdbDeviceController, RecordingDeviceController
+    from session_stats import device_label
+
+    phone = AdbDeviceController(serial="phone-1")
+    wrapped = RecordingDeviceController(phone, str(tmp_path / "session"))
+    wrapped.close()
+    assert device_label(wrapped) == device_label(phone)
+    assert device_label(phone).endswith("/AdbDeviceController/phone-1")
+    assert device_label(phone) != device_label(AdbDeviceController(serial="phone-2"))
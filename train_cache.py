@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+训练图片缓存工具
+把yolo_dataset中各划分的图片预先缩放到训练尺寸，保存为可直接np.load的.npy
+（cache="disk"训练时读取的格式），标注同步换算，并生成指向缓存的data.yaml。
+ultralytics扫描数据集时仍需要图片文件，所以另存一份压缩的PNG，只在扫描时读取。
+源文件内容变化时按哈希增量重建。
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+SPLITS = ("train", "val", "test")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+MANIFEST_NAME = "cache_manifest.json"
+CACHE_VERSION = 2
+
+
+def file_signature(path: Path) -> str:
+    """文件签名：文件名和内容哈希（复制或还原的数据集修改时间可能不变）"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{path.name}:{digest.hexdigest()}"
+
+
+def resize_image(image: np.ndarray, img_size: int, pad: bool):
+    """
+    按长边缩放到img_size，可选补边成正方形
+
+    Args:
+        image: BGR图像
+        img_size: 训练尺寸
+        pad: 是否补边（letterbox）成img_size×img_size
+
+    Returns:
+        tuple: (处理后的图像, 缩放比例, (左补边, 上补边))
+    """
+    h, w = image.shape[:2]
+    ratio = img_size / max(h, w)
+    new_w, new_h = max(1, round(w * ratio)), max(1, round(h * ratio))
+    if (new_w, new_h) != (w, h):
+        interpolation = cv2.INTER_AREA if ratio < 1 else cv2.INTER_LINEAR
+        image = cv2.resize(image, (new_w, new_h), interpolation=interpolation)
+
+    if not pad:
+        return image, ratio, (0, 0)
+
+    left = (img_size - new_w) // 2
+    top = (img_size - new_h) // 2
+    image = cv2.copyMakeBorder(
+        image,
+        top,
+        img_size - new_h - top,
+        left,
+        img_size - new_w - left,
+        cv2.BORDER_CONSTANT,
+        value=(114, 114, 114),
+    )
+    return image, ratio, (left, top)
+
+
+def convert_labels(
+    lines: list, size: tuple, resized: tuple, offset: tuple, img_size: int, pad: bool
+) -> list:
+    """
+    换算YOLO标注
+
+    不补边时归一化坐标在等比缩放下不变；补边时需要加上偏移并按新画布归一化。
+    """
+    if not pad:
+        return lines
+
+    w, h = size
+    new_w, new_h = resized
+    left, top = offset
+    converted = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) != 5:
+            continue
+        cls, cx, cy, bw, bh = parts[0], *map(float, parts[1:])
+        converted.append(
+            f"{cls} {(cx * new_w + left) / img_size:.6f} "
+            f"{(cy * new_h + top) / img_size:.6f} "
+            f"{bw * new_w / img_size:.6f} {bh * new_h / img_size:.6f}"
+        )
+    return converted
+
+
+def _cache_one(task: tuple) -> bool:
+    """缓存单张图片及其标注"""
+    src_image, src_label, dst_image, dst_label, img_size, pad = task
+    image = cv2.imread(str(src_image))
+    if image is None:
+        return False
+
+    h, w = image.shape[:2]
+    resized, ratio, offset = resize_image(image, img_size, pad)
+    # 先写图片再写.npy，.npy不比图片旧，ultralytics不会重新生成
+    cv2.imwrite(str(dst_image), resized, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+    np.save(dst_image.with_suffix(".npy"), resized, allow_pickle=False)
+
+    lines = []
+    if src_label.exists():
+        lines = [l for l in src_label.read_text().splitlines() if l.strip()]
+    new_w, new_h = max(1, round(w * ratio)), max(1, round(h * ratio))
+    dst_label.write_text(
+        "\n".join(convert_labels(lines, (w, h), (new_w, new_h), offset, img_size, pad))
+        + ("\n" if lines else "")
+    )
+    return True
+
+
+def build_cache(
+    dataset_folder: str = "./dataset/yolo_dataset",
+    img_size: int = 640,
+    cache_folder: str = None,
+    pad: bool = False,
+    workers: int = 8,
+) -> str:
+    """
+    构建或增量更新训练图片缓存
+
+    Args:
+        dataset_folder: 源数据集目录（包含data.yaml和images/labels）
+        img_size: 训练尺寸
+        cache_folder: 缓存目录，默认为 dataset/yolo_cache_{img_size}
+        pad: 是否补边成正方形；默认只按长边缩放，和ultralytics自己的加载逻辑一致
+        workers: 线程数
+
+    Returns:
+        str: 缓存的data.yaml路径
+    """
+    dataset = Path(dataset_folder)
+    cache = Path(cache_folder or dataset.parent / f"yolo_cache_{img_size}")
+    manifest_path = cache / MANIFEST_NAME
+    params = {"version": CACHE_VERSION, "img_size": img_size, "pad": pad}
+
+    manifest = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("params") != params:
+        # 参数变化，整个缓存失效
+        if cache.exists():
+            shutil.rmtree(cache)
+        manifest = {}
+    entries = manifest.get("files", {})
+
+    tasks = []
+    new_entries = {}
+    for split in SPLITS:
+        src_images = dataset / "images" / split
+        if not src_images.exists():
+            continue
+        (cache / "images" / split).mkdir(parents=True, exist_ok=True)
+        (cache / "labels" / split).mkdir(parents=True, exist_ok=True)
+
+        for src_image in sorted(src_images.iterdir()):
+            if src_image.suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            src_label = dataset / "labels" / split / f"{src_image.stem}.txt"
+            signature = hashlib.sha1(
+                (
+                    file_signature(src_image)
+                    + "|"
+                    + (file_signature(src_label) if src_label.exists() else "")
+                ).encode()
+            ).hexdigest()
+
+            key = f"{split}/{src_image.stem}"
+            new_entries[key] = signature
+            dst_image = cache / "images" / split / f"{src_image.stem}.png"
+            if (
+                entries.get(key) == signature
+                and dst_image.exists()
+                and dst_image.with_suffix(".npy").exists()
+            ):
+                continue
+            tasks.append(
+                (
+                    src_image,
+                    src_label,
+                    dst_image,
+                    cache / "labels" / split / f"{src_image.stem}.txt",
+                    img_size,
+                    pad,
+                )
+            )
+
+    # 删除源中已不存在的缓存文件
+    removed = set(entries) - set(new_entries)
+    for key in removed:
+        split, stem = key.split("/", 1)
+        for path in (
+            cache / "images" / split / f"{stem}.png",
+            cache / "images" / split / f"{stem}.npy",
+            cache / "labels" / split / f"{stem}.txt",
+        ):
+            path.unlink(missing_ok=True)
+
+    print(f"🗃️ 缓存 {len(new_entries)} 张图片，其中需要重建 {len(tasks)} 张")
+    if tasks:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            failed = [t[0] for t, ok in zip(tasks, pool.map(_cache_one, tasks)) if not ok]
+        for src_image in failed:
+            print(f"⚠️ 无法读取图像: {src_image}")
+            new_entries.pop(f"{src_image.parent.name}/{src_image.stem}", None)
+
+    # ultralytics会缓存标注扫描结果，源变化后旧的.cache也要删掉
+    if tasks or removed:
+        for stale in (cache / "labels").glob("*.cache"):
+            stale.unlink()
+
+    source_hash = hashlib.sha1(
+        json.dumps(new_entries, sort_keys=True).encode()
+    ).hexdigest()
+    manifest_path.write_text(
+        json.dumps(
+            {"params": params, "source_hash": source_hash, "files": new_entries},
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+
+    with open(dataset / "data.yaml", "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config["path"] = str(cache.resolve())
+    for split in SPLITS:
+        if (cache / "images" / split).exists():
+            config[split] = f"images/{split}"
+    data_path = cache / "data.yaml"
+    with open(data_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+
+    print(f"✅ 缓存就绪: {cache} (源哈希 {source_hash[:12]})")
+    return str(data_path)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="训练图片缓存工具")
+    parser.add_argument("--dataset", default="./dataset/yolo_dataset", help="源数据集目录")
+    parser.add_argument("--imgsz", type=int, default=640, help="训练尺寸")
+    parser.add_argument("--cache", help="缓存目录")
+    parser.add_argument("--pad", action="store_true", help="补边成正方形")
+    parser.add_argument("--workers", type=int, default=8, help="线程数")
+
+    args = parser.parse_args()
+
+    build_cache(args.dataset, args.imgsz, args.cache, args.pad, args.workers)
+
+
+if __name__ == "__main__":
+    main()
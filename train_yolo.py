@@ -7,10 +7,16 @@ YOLO模型训练脚本
 
 import os
 import sys
-from ultralytics import YOLO
+import argparse
 import yaml
 from pathlib import Path
 
+from train_cache import build_cache
+
+def count_images(folder):
+    """统计目录下的图片数量（png/jpg，合成数据可能是jpg）"""
+    return sum(len(list(Path(folder).glob(pattern))) for pattern in ("*.png", "*.jpg"))
+
 def check_dataset_structure():
     """检查数据集结构是否完整"""
     print("🔍 检查数据集结构...")
@@ -37,9 +43,9 @@ def check_dataset_structure():
         return False
     
     # 检查数据集文件数量
-    train_images = len(list(Path("dataset/yolo_dataset/images/train").glob("*.png")))
+    train_images = count_images("dataset/yolo_dataset/images/train")
     train_labels = len(list(Path("dataset/yolo_dataset/labels/train").glob("*.txt")))
-    val_images = len(list(Path("dataset/yolo_dataset/images/val").glob("*.png")))
+    val_images = count_images("dataset/yolo_dataset/images/val")
     val_labels = len(list(Path("dataset/yolo_dataset/labels/val").glob("*.txt")))
     
     print(f"📊 数据集统计:")
@@ -70,21 +76,34 @@ def load_config():
         print(f"❌ 加载配置文件失败: {e}")
         return None
 
-def train_model(epochs=100, batch_size=16, img_size=640, model_name="yolov8n.pt"):
-    """训练YOLO模型"""
+def train_model(epochs=100, batch_size=16, img_size=640, model_name="yolov8n.pt",
+                data="./dataset/yolo_dataset/data.yaml", cache=False,
+                project="runs/detect", name="train", callbacks=None, **overrides):
+    """
+    训练YOLO模型
+
+    overrides会覆盖下面的默认训练参数（如device、workers、mosaic等），
+    callbacks为 {事件名: 回调函数} 字典，注册到ultralytics的训练回调上
+    """
     print(f"🚀 开始训练YOLO模型...")
     print(f"   模型: {model_name}")
+    print(f"   数据集: {data}")
     print(f"   训练轮数: {epochs}")
     print(f"   批次大小: {batch_size}")
     print(f"   图片尺寸: {img_size}")
     
     try:
+        from ultralytics import YOLO  # 延迟导入，看 --help 时不用等torch加载
+
         # 加载预训练模型
         model = YOLO(model_name)
+        for event, callback in (callbacks or {}).items():
+            model.add_callback(event, callback)
         
-        # 开始训练
-        results = model.train(
-            data="./dataset/yolo_dataset/data.yaml",
+        # 训练参数
+        train_args = dict(
+            data=data,
+            cache=cache,
             epochs=epochs,
             batch=batch_size,
             imgsz=img_size,
@@ -92,8 +111,8 @@ def train_model(epochs=100, batch_size=16, img_size=640, model_name="yolov8n.pt"
             save=True,
             device='auto',  # 自动选择GPU或CPU
             workers=4,
-            project='runs/detect',
-            name='train',
+            project=project,
+            name=name,
             exist_ok=True,
             pretrained=True,
             optimizer='auto',
@@ -137,9 +156,13 @@ def train_model(epochs=100, batch_size=16, img_size=640, model_name="yolov8n.pt"
             mixup=0.0,
             copy_paste=0.0
         )
+        train_args.update(overrides)
+        
+        # 开始训练
+        results = model.train(**train_args)
         
         print("✅ 训练完成!")
-        print(f"📁 模型保存在: runs/detect/train/weights/")
+        print(f"📁 模型保存在: {project}/{name}/weights/")
         print(f"📊 训练结果: {results}")
         
         return results
@@ -157,6 +180,8 @@ def validate_model(model_path="runs/detect/train/weights/best.pt"):
     print(f"🧪 验证模型: {model_path}")
     
     try:
+        from ultralytics import YOLO
+
         model = YOLO(model_path)
         
         # 在验证集上评估
@@ -173,6 +198,15 @@ def validate_model(model_path="runs/detect/train/weights/best.pt"):
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="训练跳一跳YOLO模型")
+    parser.add_argument("--epochs", type=int, default=100, help="训练轮数")
+    parser.add_argument("--batch", type=int, default=16, help="批次大小")
+    parser.add_argument("--imgsz", type=int, default=640, help="图片尺寸")
+    parser.add_argument(
+        "--model", default="yolov8n.pt", help="预训练模型: yolov8n/s/m/l/x.pt"
+    )
+    args = parser.parse_args()
+
     print("🎮 跳一跳YOLO模型训练")
     print("=" * 50)
     
@@ -188,10 +222,10 @@ def main():
         return
     
     # 训练参数
-    epochs = 100
-    batch_size = 16
-    img_size = 640
-    model_name = "yolov8n.pt"  # 可选: yolov8s.pt, yolov8m.pt, yolov8l.pt, yolov8x.pt
+    epochs = args.epochs
+    batch_size = args.batch
+    img_size = args.imgsz
+    model_name = args.model  # 可选: yolov8s.pt, yolov8m.pt, yolov8l.pt, yolov8x.pt
     
     print(f"\n🎯 训练参数:")
     print(f"   预训练模型: {model_name}")
@@ -199,8 +233,11 @@ def main():
     print(f"   批次大小: {batch_size}")
     print(f"   图片尺寸: {img_size}")
     
+    # 预先把图片缩放到训练尺寸，避免每个epoch都在CPU上解码和缩放原始截图
+    data = build_cache(img_size=img_size)
+
     # 开始训练
-    results = train_model(epochs, batch_size, img_size, model_name)
+    results = train_model(epochs, batch_size, img_size, model_name, data=data, cache="disk")
     
     if results:
         # 验证模型
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻推理进程（可选）
+后台进程保持解释器、torch/ultralytics和已加载的模型常驻，命令行工具通过Unix套接字
+把检测任务交给它，结果逐张流式返回，省掉每次调用几秒钟的导入和加载权重；
+空闲超过一定时间后自动退出。客户端部分只依赖标准库，单张截图的分析在毫秒级返回
+
+协议：每条请求是一行JSON，detect请求后面紧跟所有画面的原始像素；
+每条响应是一行JSON，最后一行带 "done": true
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+DEFAULT_SOCKET = os.environ.get(
+    "JUMP_WORKER_SOCKET",
+    os.path.join(tempfile.gettempdir(), f"jump_worker_{getattr(os, 'getuid', lambda: 0)()}.sock"),
+)
+DEFAULT_MODEL = "./best.pt"
+DEFAULT_PARAMS = {"conf": 0.2, "iou": 0.9, "imgsz": 640}  # 与Jump.predict一致
+
+
+class WorkerError(RuntimeError):
+    """常驻进程返回的错误"""
+
+
+# ---------------------------------------------------------------- 客户端
+
+
+def connect(socket_path: str = DEFAULT_SOCKET, timeout: float = 1.0):
+    """
+    连接常驻进程
+
+    Returns:
+        socket.socket: 连接，常驻进程没有运行（或平台不支持Unix套接字）时返回None
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def request(message: dict, payload: bytes = b"", socket_path: str = DEFAULT_SOCKET):
+    """
+    发送一条请求并逐条产出响应
+
+    Yields:
+        dict: 响应，最后一条带 "done": True
+
+    Raises:
+        WorkerError: 常驻进程没有运行或返回了错误
+    """
+    sock = connect(socket_path)
+    if sock is None:
+        raise WorkerError(f"常驻进程没有运行: {socket_path}")
+    with sock, sock.makefile("rb") as reader:
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n" + payload)
+        for line in reader:
+            response = json.loads(line)
+            if "error" in response:
+                raise WorkerError(response["error"])
+            yield response
+            if response.get("done"):
+                return
+    raise WorkerError("常驻进程意外断开连接")
+
+
+def start_daemon(
+    socket_path: str = DEFAULT_SOCKET,
+    idle_timeout: float = 600.0,
+    models: list = None,
+    wait: float = 60.0,
+) -> bool:
+    """
+    在后台启动常驻进程并等待它就绪（已经在运行时直接返回）
+
+    Args:
+        socket_path: Unix套接字路径
+        idle_timeout: 空闲多少秒后自动退出
+        models: 启动时预先加载的模型
+        wait: 最长等待时间（秒）
+
+    Returns:
+        bool: 常驻进程是否就绪
+    """
+    sock = connect(socket_path)
+    if sock is not None:
+        sock.close()
+        return True
+
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--socket",
+        socket_path,
+        "serve",
+        "--idle",
+        str(idle_timeout),
+    ]
+    for model in models or []:
+        command += ["--model", model]
+    with open(socket_path + ".log", "ab") as log_file:
+        subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,  # 不随启动它的终端退出
+        )
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        sock = connect(socket_path)
+        if sock is not None:
+            sock.close()
+            return True
+        time.sleep(0.1)
+    return False
+
+
+class WorkerDetector:
+    """与 CachedDetector 接口相同，检测交给常驻进程完成"""
+
+    def __init__(self, model_path: str, socket_path: str = DEFAULT_SOCKET, **params):
+        self.model_path = os.path.abspath(model_path) if os.path.exists(model_path) else model_path
+        self.socket_path = socket_path
+        self.params = params
+        self.cache = None  # 缓存在常驻进程里
+        self._names = None
+
+    @property
+    def names(self) -> dict:
+        """类别名称"""
+        if self._names is None:
+            message = {"op": "names", "model": self.model_path, "params": self.params}
+            for response in request(message, socket_path=self.socket_path):
+                names = response.get("names")
+            self._names = {int(k): v for k, v in names.items()}
+        return self._names
+
+    def detect_batch(self, frames: list) -> list:
+        """
+        检测一批画面（原始像素通过套接字发送，不需要重新编码）
+
+        Returns:
+            list: 每个画面的 [x1, y1, x2, y2, conf, cls] 数组
+        """
+        import numpy as np
+
+        frames = [np.ascontiguousarray(frame) for frame in frames]
+        message = {
+            "op": "detect",
+            "model": self.model_path,
+            "params": self.params,
+            "frames": [[list(frame.shape), str(frame.dtype)] for frame in frames],
+        }
+        payload = b"".join(frame.tobytes() for frame in frames)
+        outputs = [None] * len(frames)
+        for response in request(message, payload, self.socket_path):
+            if "index" in response:
+                outputs[response["index"]] = np.asarray(
+                    response["detections"], dtype=np.float32
+                ).reshape(-1, 6)
+        return outputs
+
+    def detect(self, frame):
+        """检测一个画面"""
+        return self.detect_batch([frame])[0]
+
+
+def get_detector(model_path: str, socket_path: str = DEFAULT_SOCKET, **params):
+    """
+    常驻进程在运行时返回 WorkerDetector，否则返回在本进程推理的 CachedDetector
+
+    常驻进程需要先用 `python warm_worker.py start` 启动，没有启动时行为和原来一样
+    """
+    sock = connect(socket_path)
+    if sock is not None:
+        sock.close()
+        print("⚡ 使用常驻推理进程")
+        return WorkerDetector(model_path, socket_path, **params)
+
+    from detection_cache import CachedDetector
+
+    return CachedDetector(model_path, **params)
+
+
+# ---------------------------------------------------------------- 常驻进程
+
+
+class WarmWorker:
+    """常驻推理进程：保持已加载的模型，按 (模型, 推理参数) 复用检测器"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, idle_timeout: float = 600.0):
+        """
+        Args:
+            socket_path: Unix套接字路径
+            idle_timeout: 空闲多少秒后自动退出，0表示不退出
+        """
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.models = {}
+        self.detectors = {}
+        self.jobs = 0
+        self.frames = 0
+        self.started = time.time()
+        self._active = 0
+        self._last_active = time.monotonic()
+        self._state_lock = threading.Lock()
+        self._inference_lock = threading.Lock()  # 同一时间只有一个任务推理
+        self.server = None
+
+    def preload(self, models: list = None):
+        """预先导入torch/ultralytics和分析用到的模块，加载模型并空跑一次推理"""
+        import cv2  # noqa: F401
+        import numpy as np
+        import ultralytics  # noqa: F401  导入本身就要好几秒
+
+        import main  # noqa: F401  analyze请求用到的select_target
+
+        for model in models or []:
+            path = os.path.abspath(model) if os.path.exists(model) else model
+            self.detector(path, {})
+            # 第一次推理要初始化算子和内存，放在启动时而不是第一个任务里
+            blank = np.zeros((DEFAULT_PARAMS["imgsz"],) * 2 + (3,), dtype=np.uint8)
+            self.models[path].predict(blank, verbose=False, **DEFAULT_PARAMS)
+            print(f"📦 已加载模型: {model}")
+
+    def detector(self, model_path: str, params: dict):
+        """取出（或创建）对应模型和参数的检测器，同一模型的检测器共用一份已加载的模型"""
+        from detection_cache import CachedDetector
+
+        key = (model_path, json.dumps(params, sort_keys=True))
+        with self._inference_lock:
+            detector = self.detectors.get(key)
+            if detector is None:
+                detector = CachedDetector(model_path, **params)
+                if model_path in self.models:
+                    detector._model = self.models[model_path]
+                else:
+                    self.models[model_path] = detector.model  # 常驻进程里直接加载，保持常驻
+                self.detectors[key] = detector
+        return detector
+
+    def serve(self):
+        """在前台运行，直到空闲超时或收到stop请求"""
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(handler):
+                worker._begin()
+                try:
+                    line = handler.rfile.readline()
+                    if not line:
+                        return
+                    message = json.loads(line)
+                    for response in worker.handle(message, handler.rfile):
+                        handler.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 客户端提前退出
+                except Exception as e:
+                    try:
+                        handler.wfile.write(
+                            json.dumps({"error": f"{type(e).__name__}: {e}"}).encode("utf-8")
+                            + b"\n"
+                        )
+                    except OSError:
+                        pass
+                finally:
+                    worker._end()
+
+        if os.path.exists(self.socket_path):
+            sock = connect(self.socket_path)
+            if sock is not None:
+                sock.close()
+                print(f"⚠️ 常驻进程已在运行: {self.socket_path}")
+                return
+            os.unlink(self.socket_path)  # 上次异常退出留下的套接字文件
+
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self.server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)  # 只允许当前用户连接
+        threading.Thread(target=self._watch_idle, daemon=True).start()
+        print(f"🔥 常驻推理进程已启动: {self.socket_path} (pid {os.getpid()})")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            print(f"👋 常驻进程退出，共处理 {self.jobs} 个任务, {self.frames} 张画面")
+
+    def handle(self, message: dict, reader):
+        """
+        处理一条请求
+
+        Yields:
+            dict: 响应
+        """
+        op = message.get("op")
+        self.jobs += 1
+        if op == "status":
+            yield dict(self.status(), done=True)
+        elif op == "stop":
+            yield {"done": True}
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif op == "names":
+            detector = self.detector(message["model"], message.get("params", {}))
+            yield {"names": detector.names, "done": True}
+        elif op == "detect":
+            yield from self._detect(message, reader)
+        elif op == "analyze":
+            yield from self._analyze(message)
+        else:
+            raise ValueError(f"未知请求: {op}")
+
+    def _detect(self, message: dict, reader):
+        """检测客户端发来的原始像素"""
+        import numpy as np
+
+        start = time.perf_counter()
+        frames = []
+        for shape, dtype in message["frames"]:
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            data = reader.read(size)
+            if len(data) != size:
+                raise ValueError("画面数据不完整")
+            frames.append(np.frombuffer(data, dtype=dtype).reshape(shape))
+
+        detector = self.detector(message["model"], message.get("params", {}))
+        with self._inference_lock:
+            outputs = detector.detect_batch(frames)
+        self.frames += len(frames)
+        for index, detections in enumerate(outputs):
+            yield {"index": index, "detections": detections.tolist()}
+        yield {"done": True, "ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    def _analyze(self, message: dict, batch_size: int = 16):
+        """分析图片文件：解码、检测、选择目标，每批处理完立即返回结果"""
+        import cv2
+
+        from main import box_center, select_target
+
+        start = time.perf_counter()
+        detector = self.detector(message["model"], message.get("params", {}))
+        paths = message["images"]
+        for offset in range(0, len(paths), batch_size):
+            batch = [(path, cv2.imread(path)) for path in paths[offset : offset + batch_size]]
+            valid = [(path, frame) for path, frame in batch if frame is not None]
+            for path, frame in batch:
+                if frame is None:
+                    yield {"image": path, "error_message": "无法读取图像"}
+            with self._inference_lock:
+                outputs = detector.detect_batch([frame for _, frame in valid])
+            self.frames += len(valid)
+            for (path, frame), detections in zip(valid, outputs):
+                decision = select_target(detections)
+                yield {
+                    "image": path,
+                    "detections": len(detections),
+                    "distance": round(float(decision["distance"]), 2),
+                    "reason": decision["reason"] or "ok",
+                    "player": box_center(decision["player"]),
+                    "target": box_center(decision["target"]),
+                }
+        yield {"done": True, "ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    def status(self) -> dict:
+        with self._state_lock:
+            idle = time.monotonic() - self._last_active if not self._active else 0.0
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 1),
+            "idle": round(idle, 1),
+            "idle_timeout": self.idle_timeout,
+            "jobs": self.jobs,
+            "frames": self.frames,
+            "models": sorted(self.models),
+        }
+
+    def _begin(self):
+        with self._state_lock:
+            self._active += 1
+            self._last_active = time.monotonic()
+
+    def _end(self):
+        with self._state_lock:
+            self._active -= 1
+            self._last_active = time.monotonic()
+
+    def _watch_idle(self):
+        """空闲超时后退出（有任务在执行时不算空闲）"""
+        if not self.idle_timeout:
+            return
+        while True:
+            time.sleep(min(1.0, self.idle_timeout))
+            with self._state_lock:
+                idle = not self._active and (
+                    time.monotonic() - self._last_active >= self.idle_timeout
+                )
+            if idle:
+                print(f"💤 空闲超过 {self.idle_timeout:.0f} 秒，自动退出")
+                self.server.shutdown()
+                return
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="常驻推理进程")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix套接字路径")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help in (("serve", "在前台运行"), ("start", "在后台启动")):
+        command = subparsers.add_parser(name, help=help)
+        command.add_argument("--idle", type=float, default=600.0, help="空闲多少秒后退出，0表示不退出")
+        command.add_argument("--model", action="append", help="预先加载的模型（可重复）")
+    subparsers.add_parser("stop", help="停止常驻进程")
+    subparsers.add_parser("status", help="查看常驻进程状态")
+    analyze = subparsers.add_parser("analyze", help="分析截图（结果逐张返回）")
+    analyze.add_argument("images", nargs="+", help="图片路径")
+    analyze.add_argument("--model", default=DEFAULT_MODEL, help="模型文件路径")
+    analyze.add_argument("--start", action="store_true", help="常驻进程没有运行时先启动它")
+    analyze.add_argument("--json", action="store_true", help="每张图片输出一行JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        worker = WarmWorker(args.socket, args.idle)
+        worker.preload(args.model)
+        worker.serve()
+    elif args.command == "start":
+        if start_daemon(args.socket, args.idle, args.model):
+            print(f"🔥 常驻推理进程就绪: {args.socket}")
+        else:
+            print(f"❌ 常驻推理进程启动失败，查看日志: {args.socket}.log")
+            sys.exit(1)
+    elif args.command in ("stop", "status"):
+        try:
+            response = next(request({"op": args.command}, socket_path=args.socket))
+        except WorkerError as e:
+            print(f"📭 {e}")
+            return
+        if args.command == "stop":
+            print("👋 已通知常驻进程退出")
+        else:
+            for key, value in response.items():
+                if key != "done":
+                    print(f"   {key}: {value}")
+    else:
+        if args.start and not start_daemon(args.socket, models=[args.model]):
+            print(f"❌ 常驻推理进程启动失败，查看日志: {args.socket}.log")
+            sys.exit(1)
+        model = os.path.abspath(args.model) if os.path.exists(args.model) else args.model
+        message = {
+            "op": "analyze",
+            "model": model,
+            "params": DEFAULT_PARAMS,
+            "images": [os.path.abspath(path) for path in args.images],
+        }
+        start = time.perf_counter()
+        try:
+            for response in request(message, socket_path=args.socket):
+                if args.json:
+                    print(json.dumps(response, ensure_ascii=False), flush=True)
+                elif response.get("done"):
+                    print(
+                        f"⏱️ {len(args.images)} 张, 常驻进程耗时 {response['ms']:.1f}ms, "
+                        f"总耗时 {(time.perf_counter() - start) * 1000:.1f}ms"
+                    )
+                elif "error_message" in response:
+                    print(f"❌ {response['image']}: {response['error_message']}", flush=True)
+                else:
+                    print(
+                        f"🎯 {response['image']}: 距离 {response['distance']:.1f} "
+                        f"({response['reason']}, {response['detections']} 个检测框)",
+                        flush=True,
+                    )
+        except WorkerError as e:
+            print(f"❌ {e}，先运行 python warm_worker.py start 或加 --start")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()